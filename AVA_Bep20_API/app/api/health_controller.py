@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Query, Response, status
+from app.services.health_service import health_monitor
+
+health_router = APIRouter()
+
+# 背景檢查尚未完成第一輪時回傳的 body
+STARTING_BODY = b'{"status":"starting"}'
+
+
+@health_router.get("/healthz")
+async def healthz():
+    """
+    存活檢查：事件迴圈可回應即為存活，附上最近一次背景檢查的結果（不做任何 I/O）
+    """
+    snapshot = health_monitor.snapshot
+    return Response(
+        snapshot.body if snapshot else STARTING_BODY, media_type="application/json"
+    )
+
+
+@health_router.get("/readyz")
+async def readyz(monitor: bool = Query(False)):
+    """
+    就緒檢查：資料庫正常且背景檢查未過期時回傳 200，否則 503
+
+    節點與區塊監聽狀態記錄在 body 的 monitor_status；monitor=1 時一併要求其正常。
+    """
+    ready, snapshot = health_monitor.is_ready(include_monitor=monitor)
+    return Response(
+        snapshot.body if snapshot else STARTING_BODY,
+        status_code=(
+            status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+        media_type="application/json",
+    )
@@ -1,20 +1,86 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Body
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, status, Body, Query, Header
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from datetime import datetime
 from decimal import Decimal
-from app.schemas.transaction import TransactionResult
+from typing import Iterator, Literal, Optional
+from app.schemas.transaction import TransactionResult, TransactionRecord
 from app.services.transaction_service import TransactionService
+from app.services.payout_service import PayoutBatcher
+from app.services.token_registry import token_registry
 from app.repositories.wallet_repository import WalletRepository
-from app.repositories.transaction_repository import TransactionRepository
+from app.repositories.transaction_repository import (
+    TransactionRepository,
+    TRANSACTION_HISTORY_FIELDS,
+)
+from app.models.core_wallet_transaction import TransactionTypeEnum
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.responses import (
+    ORJSONDecimalResponse,
+    encode_csv_rows,
+    encode_ndjson_rows,
+    encode_sse_event,
+)
 from app.core.security import get_current_user
+from app.services.event_bus import (
+    event_bus,
+    publish_event,
+    ConnectionLimitExceeded,
+)
 from app.core.dependencies import (
     get_wallet_repository,
     get_transaction_service,
     get_transaction_repository,
+    get_payout_batcher,
 )
 
 transaction_router = APIRouter()
 
 
-@transaction_router.get("/get-deposit-transactions")
+def render_transaction_rows(rows: list[tuple]) -> ORJSONDecimalResponse:
+    """
+    將交易記錄 tuple 直接序列化為 JSON 回應，略過 jsonable_encoder
+    """
+    return ORJSONDecimalResponse(
+        [dict(zip(TRANSACTION_HISTORY_FIELDS, row)) for row in rows]
+    )
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def stream_transaction_export(
+    partitions: Iterator[list[tuple]], export_format: str, filename: str
+) -> StreamingResponse:
+    """
+    將分批讀取的交易記錄逐批編碼後串流輸出，每批一個 chunk
+    """
+
+    def body():
+        if export_format == "csv":
+            yield encode_csv_rows((), header=TRANSACTION_HISTORY_FIELDS)
+            for rows in partitions:
+                yield encode_csv_rows(rows)
+        else:
+            for rows in partitions:
+                yield encode_ndjson_rows(TRANSACTION_HISTORY_FIELDS, rows)
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format}"'
+        },
+    )
+
+
+@transaction_router.get(
+    "/get-deposit-transactions",
+    response_model=list[TransactionRecord],
+    response_class=ORJSONDecimalResponse,
+)
 def get_deposit_transactions(
     user: str = Depends(get_current_user),
     wallet_repository: WalletRepository = Depends(get_wallet_repository),
@@ -24,12 +90,17 @@ def get_deposit_transactions(
     取得用戶的入金交易記錄
     """
     user_wallet = wallet_repository.get_wallet_by_user(user)
-    return transaction_repository.get_deposit_transactions_by_wallet(
-        user_wallet.SubWalletID
+    rows = transaction_repository.get_transaction_rows_by_wallet(
+        user_wallet.SubWalletID, TransactionTypeEnum.deposit
     )
+    return render_transaction_rows(rows)
 
 
-@transaction_router.get("/get-withdraw-transactions")
+@transaction_router.get(
+    "/get-withdraw-transactions",
+    response_model=list[TransactionRecord],
+    response_class=ORJSONDecimalResponse,
+)
 def get_withdraw_transactions(
     user: str = Depends(get_current_user),
     wallet_repository: WalletRepository = Depends(get_wallet_repository),
@@ -39,82 +110,278 @@ def get_withdraw_transactions(
     取得用戶的提領交易記錄
     """
     user_wallet = wallet_repository.get_wallet_by_user(user)
-    return transaction_repository.get_withdraw_transactions_by_wallet(
-        user_wallet.SubWalletID
+    rows = transaction_repository.get_transaction_rows_by_wallet(
+        user_wallet.SubWalletID, TransactionTypeEnum.withdrawal
+    )
+    return render_transaction_rows(rows)
+
+
+@transaction_router.get("/export-transactions")
+def export_transactions(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    start_time: Optional[datetime] = Query(None),
+    end_time: Optional[datetime] = Query(None),
+    transaction_type: Optional[TransactionTypeEnum] = Query(None),
+    user: str = Depends(get_current_user),
+    wallet_repository: WalletRepository = Depends(get_wallet_repository),
+    transaction_repository: TransactionRepository = Depends(get_transaction_repository),
+):
+    """
+    串流匯出用戶的完整交易記錄（NDJSON 或 CSV），可依時間區間與交易類型篩選
+    """
+    user_wallet = wallet_repository.get_wallet_by_user(user)
+    partitions = transaction_repository.stream_transaction_rows(
+        sub_wallet_id=user_wallet.SubWalletID,
+        start_time=start_time,
+        end_time=end_time,
+        transaction_type=transaction_type,
+    )
+    return stream_transaction_export(
+        partitions, export_format, f"transactions-{user_wallet.SubWalletID}"
+    )
+
+
+@transaction_router.get("/export-all-transactions")
+def export_all_transactions(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    start_time: Optional[datetime] = Query(None),
+    end_time: Optional[datetime] = Query(None),
+    transaction_type: Optional[TransactionTypeEnum] = Query(None),
+    user: str = Depends(get_current_user),
+    transaction_repository: TransactionRepository = Depends(get_transaction_repository),
+):
+    """
+    串流匯出全平台交易記錄，僅限 EXPORT_ADMIN_ACCOUNTS 中的帳號
+    """
+    if user not in settings.EXPORT_ADMIN_ACCOUNTS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to export platform transactions",
+        )
+    partitions = transaction_repository.stream_transaction_rows(
+        start_time=start_time,
+        end_time=end_time,
+        transaction_type=transaction_type,
+    )
+    return stream_transaction_export(partitions, export_format, "transactions-all")
+
+
+@transaction_router.get("/events")
+async def stream_events(
+    last_event_id: Optional[int] = Header(None),
+    user: str = Depends(get_current_user),
+    wallet_repository: WalletRepository = Depends(get_wallet_repository),
+):
+    """
+    以 Server-Sent Events 推播用戶的入金與提領事件，重連時依 Last-Event-ID 補送
+    """
+    user_wallet = await asyncio.to_thread(wallet_repository.get_wallet_by_user, user)
+    if not user_wallet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found"
+        )
+    try:
+        subscription = event_bus.subscribe(user_wallet.SubWalletID)
+    except ConnectionLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        )
+
+    async def release():
+        # 在事件迴圈中執行（同步函式會被丟到 threadpool）
+        event_bus.unsubscribe(subscription)
+
+    async def body():
+        try:
+            sent_id = last_event_id or 0
+            for event in event_bus.get_history(user_wallet.SubWalletID, sent_id):
+                sent_id = event.id
+                yield encode_sse_event(event.id, event.type, event.data)
+            while not subscription.overflowed:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), settings.EVENT_STREAM_KEEPALIVE
+                    )
+                except asyncio.TimeoutError:
+                    # 註解行維持連線，避免被代理伺服器視為閒置
+                    yield b": keepalive\n\n"
+                    continue
+                # 訂閱後、補送前發布的事件會同時出現在歷史與佇列中
+                if event.id <= sent_id:
+                    continue
+                sent_id = event.id
+                yield encode_sse_event(event.id, event.type, event.data)
+            # 用戶端消化太慢，關閉連線讓其依 Last-Event-ID 重連補送
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # 用戶端在第一個 chunk 前斷線時 body() 不會執行，由 background 確保釋放連線數
+        background=BackgroundTask(release),
+    )
+
+
+@transaction_router.get("/poll-events", response_class=ORJSONDecimalResponse)
+async def poll_events(
+    cursor: int = Query(0, ge=0),
+    timeout: float = Query(25.0, gt=0, le=60),
+    user: str = Depends(get_current_user),
+    wallet_repository: WalletRepository = Depends(get_wallet_repository),
+):
+    """
+    長輪詢：回傳 cursor 之後的事件，沒有新事件時最多等待 timeout 秒
+
+    回應中的 cursor 為下次請求應帶入的值。
+    """
+    user_wallet = await asyncio.to_thread(wallet_repository.get_wallet_by_user, user)
+    if not user_wallet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found"
+        )
+    try:
+        events = await event_bus.wait_events(user_wallet.SubWalletID, cursor, timeout)
+    except ConnectionLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        )
+    return ORJSONDecimalResponse(
+        {
+            "cursor": events[-1].id if events else cursor,
+            "events": [
+                {"id": event.id, "type": event.type, "data": event.data}
+                for event in events
+            ],
+        }
     )
 
 
 @transaction_router.post("/withdraw-usdt", response_model=TransactionResult)
-def withdraw_usdt(
+async def withdraw_usdt(
     recipient_address: str = Body(..., embed=True),
     amount: Decimal = Body(..., embed=True),
     user: str = Depends(get_current_user),
     transaction_service: TransactionService = Depends(get_transaction_service),
     wallet_repository: WalletRepository = Depends(get_wallet_repository),
     transaction_repository: TransactionRepository = Depends(get_transaction_repository),
+    payout_batcher: PayoutBatcher = Depends(get_payout_batcher),
 ):
     """
     進行 USDT 代幣提領(扣除系統餘額)
+
+    PAYOUT_BATCH_ENABLED 時與其他提領合併為一筆 Disperse 交易送出。
+    資料庫與鏈上呼叫在 thread 中進行，等待批次送出期間不佔用 threadpool。
     """
 
+    # 手續費 1 USDT
+    fee = Decimal(1)
+    if amount < 10:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Amount must be greater than $10 USDT",
+        )
+
     try:
-        # 手續費 1 USDT
-        fee = Decimal(1)
+        usdt = token_registry.get_by_symbol("USDT")
         # 取得user錢包
-        user_wallet = wallet_repository.get_wallet_by_user(user)
-        # 檢查用戶USDT餘額是否足夠
-        user_system_balance = wallet_repository.get_system_balance_by_wallet(
-            user_wallet.SubWalletID
+        user_wallet = await asyncio.to_thread(
+            wallet_repository.get_wallet_by_user, user
         )
-        result = [
-            balance["AvailableBalance"]
-            for balance in user_system_balance
-            if balance["CurrencyID"] == 2
-        ]
-        available_balance = result[0] if result else 0
-
-        if available_balance < amount:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User USDT balance is not enough",
-            )
 
-        if amount < 10:
+        # 預留餘額（Available -> Locked），餘額不足時不會扣款
+        if not await asyncio.to_thread(
+            wallet_repository.reserve_balance,
+            user_wallet.SubWalletID,
+            usdt.currency_id,
+            amount,
+        ):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Amount must be greater than $10 USDT",
+                detail="User USDT balance is not enough",
             )
+    except HTTPException as http_ex:
+        raise http_ex
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
 
-        # 進行提領交易(核心錢包地址發送)
-        real_withdraw_amount = amount - fee
-        transaction_result = transaction_service.withdraw_system_usdt(
+    # 進行提領交易(核心錢包地址發送)
+    real_withdraw_amount = amount - fee
+    if settings.PAYOUT_BATCH_ENABLED:
+        transaction_result = await payout_batcher.withdraw(
             recipient_address, real_withdraw_amount
         )
+    else:
+        transaction_result = await asyncio.to_thread(
+            transaction_service.withdraw_system_usdt,
+            recipient_address,
+            real_withdraw_amount,
+        )
 
-        if not transaction_result.success:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY, detail="Transfer failed"
+    if not transaction_result.success:
+        if transaction_result.tx_hash:
+            # 已廣播但結果不明，保留鎖定金額待人工對帳
+            logger.error(
+                f"Withdrawal {transaction_result.tx_hash} of SubWalletID="
+                f"{user_wallet.SubWalletID} has unknown status, balance kept locked: "
+                f"{transaction_result.error_message}"
             )
+        else:
+            try:
+                await asyncio.to_thread(
+                    wallet_repository.release_balance,
+                    user_wallet.SubWalletID,
+                    usdt.currency_id,
+                    amount,
+                )
+            except Exception as e:
+                logger.error(
+                    f"Failed to release reserved balance of SubWalletID="
+                    f"{user_wallet.SubWalletID}: {e}"
+                )
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY, detail="Transfer failed"
+        )
 
-        # 呼叫存儲程序進行提領交易(扣除系統餘額)
-        transaction_repository.execute_withdraw_transaction(
+    try:
+        # 解除預留並呼叫存儲程序扣除系統餘額（同一個交易）
+        await asyncio.to_thread(
+            transaction_repository.finalize_withdraw_transaction,
             from_sub_wallet_id=user_wallet.SubWalletID,
-            currency_id=2,
+            currency_id=usdt.currency_id,
             to_address=transaction_result.recipient_address,
             amount=amount,
             gas_used=transaction_result.gas_used,
             fee=fee,
             tx_hash=transaction_result.tx_hash,
         )
-
-        return transaction_result
-    except HTTPException as http_ex:
-        raise http_ex
     except Exception as e:
+        # 資金已轉出，鎖定金額不可退回可用餘額
+        logger.error(
+            f"Failed to record withdrawal {transaction_result.tx_hash} of SubWalletID="
+            f"{user_wallet.SubWalletID}, balance kept locked: {e}"
+        )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         )
 
+    publish_event(
+        user_wallet.SubWalletID,
+        "withdrawal",
+        {
+            "tx_hash": transaction_result.tx_hash,
+            "currency_id": usdt.currency_id,
+            "to_address": transaction_result.recipient_address,
+            "amount": amount,
+            "fee": fee,
+        },
+    )
+
+    return transaction_result
+
 
 # @transaction_router.post(
 #     "/withdraw-bnb", response_model=TransactionResult, status_code=status.HTTP_200_OK
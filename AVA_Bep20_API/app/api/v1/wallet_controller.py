@@ -4,12 +4,19 @@ from app.schemas.wallet import (
     WalletCreate,
     WalletBalanceFromBlockChain,
     WalletBalanceFromSystem,
+    PendingDeposit,
 )
 from app.services.wallet_service import WalletService
 from app.repositories.wallet_repository import WalletRepository
+from app.repositories.pending_deposit_repository import PendingDepositRepository
+from app.models.core_wallet_pending_deposit import PendingDepositStatusEnum
 from app.core.security import get_current_user
 from app.utils.encryption import encrypt_wallet_address
-from app.core.dependencies import get_wallet_repository, get_wallet_service
+from app.core.dependencies import (
+    get_wallet_repository,
+    get_wallet_service,
+    get_pending_deposit_repository,
+)
 
 wallet_router = APIRouter()
 
@@ -117,3 +124,40 @@ async def check_wallet_exists(
         }
     else:
         return {"has_wallet": False, "message": "User does not have a wallet yet."}
+
+
+@wallet_router.get("/pending-deposits", response_model=list[PendingDeposit])
+def get_pending_deposits(
+    user: str = Depends(get_current_user),
+    wallet_repository: WalletRepository = Depends(get_wallet_repository),
+    pending_deposit_repository: PendingDepositRepository = Depends(
+        get_pending_deposit_repository
+    ),
+):
+    """
+    查詢尚未入帳的入金（mempool 中或已上鏈等待確認），需啟用 MEMPOOL_WATCH_ENABLED
+    """
+    wallet = wallet_repository.get_wallet_by_user(user)
+    if not wallet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found"
+        )
+
+    try:
+        deposits = pending_deposit_repository.get_by_address(
+            wallet.SubWalletAddress,
+            [PendingDepositStatusEnum.pending, PendingDepositStatusEnum.mined],
+        )
+        return [
+            PendingDeposit(
+                TxHash=deposit.TxHash,
+                CurrencyID=deposit.CurrencyID,
+                Amount=deposit.Amount,
+                Status=deposit.Status.value,
+                BlockNumber=deposit.BlockNumber,
+                SeenTime=deposit.SeenTime,
+            )
+            for deposit in deposits
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,225 @@
+"""
+歷史入金補掃
+
+重新掃描 [--from-block, --to-block] 區間，沿用 MonitorService 的入金偵測邏輯，
+補上節點中斷、服務未運作等原因漏掉的入金：
+
+    cd AVA_Bep20_API
+    python -m app.cli.backfill --from-block 40000000 --to-block 40010000 --workers 8
+    python -m app.cli.backfill --from-block 40000000 --to-block 40010000 --dry-run
+
+區間切成多段由 worker 平行抓取與偵測，最後依地址合併入帳：
+已依 TxHash 入帳的轉帳會略過，歸集時以資料庫鎖與監聽服務互斥，可在監聽服務運作時執行。
+"""
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.repositories.monitored_repository import MonitoredRepository
+from app.repositories.wallet_repository import WalletRepository
+from app.schemas.transaction import DetectedDeposit
+from app.services.monitor_service import MonitorService
+from app.services.token_registry import token_registry
+from app.services.transaction_service import TransactionService
+
+
+@dataclass
+class BackfillProgress:
+    total_blocks: int
+    blocks: int = 0
+    failed_blocks: list[int] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    def log(self, deposits: int):
+        elapsed = time.perf_counter() - self.started
+        rate = self.blocks / elapsed if elapsed else 0.0
+        remaining = (self.total_blocks - self.blocks) / rate if rate else 0.0
+        logger.info(
+            f"Backfill {self.blocks}/{self.total_blocks} blocks "
+            f"({self.blocks / self.total_blocks:.1%}), {rate:.1f} blocks/s, "
+            f"deposits found: {deposits}, ETA {remaining:.0f}s"
+        )
+
+
+def pending_count(monitor: MonitorService) -> int:
+    return sum(map(len, monitor.pending_deposits.values()))
+
+
+async def fetch_with_retry(monitor: MonitorService, block_number: int, retries: int):
+    for attempt in range(retries + 1):
+        try:
+            return await asyncio.to_thread(monitor.fetch_block, block_number)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"Failed to fetch block {block_number}: {e}, retrying")
+            await asyncio.sleep(2**attempt)
+
+
+async def scan_range(
+    monitor: MonitorService,
+    from_block: int,
+    to_block: int,
+    workers: int,
+    chunk_size: int,
+    retries: int = 3,
+) -> BackfillProgress:
+    """
+    將區間切成 chunk_size 個區塊一段，由 workers 個 worker 平行抓取並偵測入金
+
+    抓取在 thread 中執行，偵測在事件迴圈中執行，待確認入金不需要額外加鎖。
+    """
+    progress = BackfillProgress(total_blocks=to_block - from_block + 1)
+    chunks = asyncio.Queue()
+    for start in range(from_block, to_block + 1, chunk_size):
+        chunks.put_nowait((start, min(start + chunk_size - 1, to_block)))
+
+    async def worker():
+        while not chunks.empty():
+            start, end = chunks.get_nowait()
+            for block_number in range(start, end + 1):
+                try:
+                    block = await fetch_with_retry(monitor, block_number, retries)
+                    await monitor.detect_deposits(block)
+                except Exception as e:
+                    logger.error(f"Failed to scan block {block_number}: {e}")
+                    progress.failed_blocks.append(block_number)
+                progress.blocks += 1
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(5)
+            progress.log(pending_count(monitor))
+
+    reporter_task = asyncio.create_task(reporter())
+    try:
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    finally:
+        reporter_task.cancel()
+    progress.log(pending_count(monitor))
+    return progress
+
+
+def report_deposits(
+    deposits: list[DetectedDeposit],
+    monitored_repository: MonitoredRepository,
+    wallet_repository: WalletRepository,
+):
+    """
+    --dry-run：列出偵測到的入金及是否已入帳
+    """
+    for deposit in sorted(deposits, key=lambda d: d.block_number):
+        token = token_registry.by_currency_id.get(deposit.currency_id)
+        sub_wallet = wallet_repository.get_wallet_by_address(deposit.to_address)
+        recorded = bool(sub_wallet) and bool(
+            monitored_repository.get_recorded_tx_hashes(
+                sub_wallet.SubWalletID, deposit.currency_id, [deposit.tx_hash]
+            )
+        )
+        print(
+            f"{deposit.block_number}\t{deposit.tx_hash}\t{deposit.to_address}\t"
+            f"{token.from_base_units(deposit.amount) if token else deposit.amount}\t"
+            f"{token.symbol if token else deposit.currency_id}\t"
+            f"{'recorded' if recorded else 'missing'}"
+        )
+
+
+async def credit_with_retry(monitor: MonitorService, retries: int, delay: float):
+    """
+    入帳；地址正由監聽服務歸集或餘額查詢失敗的入金會被放回佇列，稍後重試
+    """
+    for attempt in range(retries + 1):
+        deposits = [
+            deposit
+            for block_deposits in monitor.pending_deposits.values()
+            for deposit in block_deposits
+        ]
+        monitor.pending_deposits.clear()
+        if not deposits:
+            return
+        if attempt:
+            logger.info(f"Retrying {len(deposits)} deferred deposits")
+        await monitor.credit_deposits(deposits)
+        await monitor.sweep_scheduler.join()
+        if monitor.pending_deposits:
+            await asyncio.sleep(delay)
+    logger.error(f"{pending_count(monitor)} deposits could not be credited")
+
+
+async def run(args) -> int:
+    try:
+        token_registry.load()
+    except Exception as e:
+        logger.error(f"Failed to load currencies, using defaults: {e}")
+
+    monitored_repository = MonitoredRepository()
+    wallet_repository = WalletRepository()
+    monitor = MonitorService(
+        monitored_repository, wallet_repository, TransactionService()
+    )
+    monitor.load_monitored_addresses()
+    # 補掃結束後程序即退出，不延後小額歸集
+    monitor.sweep_scheduler.max_gas_price = 0
+
+    # 只補掃已達確認數的區塊，尚未確認的區塊交給監聽服務處理
+    safe_block = monitor.web3.eth.block_number - settings.DEPOSIT_CONFIRMATIONS
+    to_block = min(args.to_block, safe_block)
+    if to_block < args.to_block:
+        logger.warning(
+            f"--to-block lowered to {to_block} "
+            f"(DEPOSIT_CONFIRMATIONS={settings.DEPOSIT_CONFIRMATIONS})"
+        )
+    if to_block < args.from_block:
+        logger.error("Nothing to backfill in the given range")
+        return 1
+
+    logger.info(
+        f"Backfilling blocks {args.from_block}..{to_block} for "
+        f"{len(monitor.monitored_addresses)} addresses with {args.workers} workers"
+    )
+    progress = await scan_range(
+        monitor, args.from_block, to_block, args.workers, args.chunk_size
+    )
+
+    if args.dry_run:
+        report_deposits(
+            [d for block in monitor.pending_deposits.values() for d in block],
+            monitored_repository,
+            wallet_repository,
+        )
+    else:
+        await credit_with_retry(monitor, args.credit_retries, args.retry_delay)
+
+    if progress.failed_blocks:
+        logger.error(
+            f"{len(progress.failed_blocks)} blocks failed, rerun for: "
+            f"{sorted(progress.failed_blocks)}"
+        )
+        return 1
+    return 0 if not monitor.pending_deposits or args.dry_run else 1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--from-block", type=int, required=True)
+    parser.add_argument("--to-block", type=int, required=True)
+    parser.add_argument("--workers", type=int, default=8, help="平行抓取的 worker 數")
+    parser.add_argument("--chunk-size", type=int, default=100, help="每段區塊數")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="只列出偵測到的入金，不歸集與入帳"
+    )
+    parser.add_argument("--credit-retries", type=int, default=5)
+    parser.add_argument("--retry-delay", type=float, default=30.0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    raise SystemExit(asyncio.run(run(parse_args(argv))))
+
+
+if __name__ == "__main__":
+    main()
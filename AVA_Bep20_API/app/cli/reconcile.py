@@ -0,0 +1,273 @@
+"""
+鏈上餘額與帳本對帳
+
+逐批讀取所有子錢包，以 Multicall 批次查詢各幣種的鏈上餘額，與 core_wallet_balance 比對：
+
+    - 子錢包：入金歸集後鏈上餘額應低於入金限制，超過即為未歸集（unswept）
+    - 核心錢包：鏈上持有量應不少於全平台系統餘額合計，不足即為短缺（shortfall）
+
+報告為 JSON Lines（預設只輸出異常的子錢包），結束時另外輸出彙總。
+每批完成後寫入檢查點，中斷後加上 --resume 從上次完成的子錢包之後繼續：
+
+    cd AVA_Bep20_API
+    python -m app.cli.reconcile --output reconcile.jsonl --workers 8
+    python -m app.cli.reconcile --output reconcile.jsonl --resume
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.web3_client import get_web3
+from app.repositories.wallet_repository import WalletRepository
+from app.schemas.currency import TokenInfo
+from app.services.token_registry import token_registry
+from app.utils.multicall import Multicall
+
+
+def empty_totals(tokens: list[TokenInfo]) -> dict[str, dict]:
+    return {
+        token.symbol: {"sub_wallet_onchain": Decimal(0), "unswept": 0, "errors": 0}
+        for token in tokens
+    }
+
+
+def reconcile_batch(
+    multicall: Multicall,
+    wallet_repository: WalletRepository,
+    tokens: list[TokenInfo],
+    wallets: list[tuple[int, str]],
+    include_all: bool = False,
+) -> tuple[list[dict], dict[str, dict]]:
+    """
+    對帳一批子錢包：一次 Multicall 查詢所有地址、所有幣種的鏈上餘額，一次查詢帳本餘額
+
+    :return: (報告記錄, 本批各幣種的合計)
+    """
+    balances = multicall.get_balances(
+        [
+            (token.contract_address, address)
+            for _, address in wallets
+            for token in tokens
+        ]
+    )
+    ledger = wallet_repository.get_balances_by_wallets(
+        [sub_wallet_id for sub_wallet_id, _ in wallets]
+    )
+
+    records = []
+    totals = empty_totals(tokens)
+    balance_iter = iter(balances)
+    for sub_wallet_id, address in wallets:
+        for token in tokens:
+            raw_balance = next(balance_iter)
+            available, locked = ledger.get(
+                (sub_wallet_id, token.currency_id), (Decimal(0), Decimal(0))
+            )
+            token_totals = totals[token.symbol]
+            if raw_balance is None:
+                status, onchain = "error", None
+                token_totals["errors"] += 1
+            else:
+                onchain = token.from_base_units(raw_balance)
+                token_totals["sub_wallet_onchain"] += onchain
+                # 鏈上餘額達到入金限制代表有入金尚未歸集（或仍在等待確認）
+                if onchain >= token.deposit_limit:
+                    status = "unswept"
+                    token_totals["unswept"] += 1
+                else:
+                    status = "ok"
+
+            if status != "ok" or include_all:
+                records.append(
+                    {
+                        "SubWalletID": sub_wallet_id,
+                        "SubWalletAddress": address,
+                        "Currency": token.symbol,
+                        "OnChainBalance": onchain,
+                        "AvailableBalance": available,
+                        "LockedBalance": locked,
+                        "Status": status,
+                    }
+                )
+    return records, totals
+
+
+def merge_totals(totals: dict[str, dict], batch_totals: dict[str, dict]):
+    for symbol, values in batch_totals.items():
+        target = totals.setdefault(
+            symbol, {"sub_wallet_onchain": Decimal(0), "unswept": 0, "errors": 0}
+        )
+        for key, value in values.items():
+            target[key] += value
+
+
+def load_checkpoint(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    for values in state["totals"].values():
+        values["sub_wallet_onchain"] = Decimal(values["sub_wallet_onchain"])
+    return state
+
+
+def save_checkpoint(path: str, state: dict):
+    # 先寫入暫存檔再取代，避免中斷時留下不完整的檢查點
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, default=str)
+    os.replace(temp_path, path)
+
+
+def build_summary(
+    multicall: Multicall,
+    wallet_repository: WalletRepository,
+    tokens: list[TokenInfo],
+    totals: dict[str, dict],
+    wallet_count: int,
+) -> dict:
+    """
+    彙總：核心錢包鏈上持有量與全平台帳本餘額合計的差異
+    """
+    core_balances = multicall.get_balances(
+        [(token.contract_address, settings.CORE_WALLET_ADDRESS) for token in tokens]
+    )
+    ledger_totals = wallet_repository.get_total_balances()
+
+    currencies = {}
+    for token, core_balance in zip(tokens, core_balances):
+        available, locked = ledger_totals.get(
+            token.currency_id, (Decimal(0), Decimal(0))
+        )
+        core_onchain = (
+            token.from_base_units(core_balance) if core_balance is not None else None
+        )
+        surplus = (
+            core_onchain - available - locked if core_onchain is not None else None
+        )
+        currencies[token.symbol] = {
+            "ledger_available": available,
+            "ledger_locked": locked,
+            "core_wallet_onchain": core_onchain,
+            "surplus": surplus,
+            "shortfall": surplus is not None and surplus < 0,
+            **totals.get(token.symbol, {}),
+        }
+    return {"wallets": wallet_count, "currencies": currencies}
+
+
+def run(args) -> dict:
+    try:
+        token_registry.load()
+    except Exception as e:
+        logger.error(f"Failed to load currencies, using defaults: {e}")
+    tokens = token_registry.tokens
+
+    web3 = get_web3()
+    multicall = Multicall(web3)
+    wallet_repository = WalletRepository()
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint"
+
+    if args.resume and os.path.exists(checkpoint_path):
+        state = load_checkpoint(checkpoint_path)
+        logger.info(
+            f"Resuming reconciliation after SubWalletID {state['last_id']} "
+            f"({state['wallets']} wallets done)"
+        )
+    else:
+        state = {"last_id": 0, "wallets": 0, "report_offset": 0, "totals": {}}
+
+    # 捨棄上次中斷時寫入、但尚未記錄在檢查點中的報告內容，避免重複記錄
+    mode = "r+" if args.resume and os.path.exists(args.output) else "w"
+    resumed_wallets = state["wallets"]
+    started = time.perf_counter()
+    with open(args.output, mode, encoding="utf-8") as report:
+        report.seek(state["report_offset"])
+        report.truncate()
+
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            in_flight = deque()
+
+            def complete_oldest():
+                # 依提交順序完成，檢查點永遠對應連續完成的子錢包範圍
+                wallets, future = in_flight.popleft()
+                records, batch_totals = future.result()
+                for record in records:
+                    report.write(json.dumps(record, default=str) + "\n")
+                report.flush()
+
+                merge_totals(state["totals"], batch_totals)
+                state["last_id"] = wallets[-1][0]
+                state["wallets"] += len(wallets)
+                state["report_offset"] = report.tell()
+                save_checkpoint(checkpoint_path, state)
+
+                elapsed = time.perf_counter() - started
+                rate = (state["wallets"] - resumed_wallets) / max(elapsed, 1e-9)
+                logger.info(
+                    f"Reconciled {state['wallets']} wallets "
+                    f"(last SubWalletID {state['last_id']}, {rate:.0f} wallets/s)"
+                )
+
+            for wallets in wallet_repository.iter_sub_wallet_batches(
+                state["last_id"], args.batch_size
+            ):
+                in_flight.append(
+                    (
+                        wallets,
+                        executor.submit(
+                            reconcile_batch,
+                            multicall,
+                            wallet_repository,
+                            tokens,
+                            wallets,
+                            args.all,
+                        ),
+                    )
+                )
+                # 限制同時進行的批次數量，記憶體不隨子錢包總數增加
+                if len(in_flight) >= args.workers * 2:
+                    complete_oldest()
+            while in_flight:
+                complete_oldest()
+
+    summary = build_summary(
+        multicall, wallet_repository, tokens, state["totals"], state["wallets"]
+    )
+    summary["elapsed_s"] = time.perf_counter() - started
+    with open(f"{args.output}.summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, default=str, indent=2)
+    # 沒有子錢包或續跑時已全部完成，不會寫出檢查點
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", default="reconcile.jsonl", help="報告檔案")
+    parser.add_argument("--checkpoint", help="檢查點檔案，預設為 <output>.checkpoint")
+    parser.add_argument("--resume", action="store_true", help="從檢查點繼續")
+    parser.add_argument("--workers", type=int, default=8, help="同時查詢的批次數")
+    parser.add_argument("--batch-size", type=int, default=500, help="每批子錢包數量")
+    parser.add_argument("--all", action="store_true", help="報告包含正常的子錢包")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    summary = run(parse_args(argv))
+    print(json.dumps(summary, default=str, indent=2))
+    if any(
+        values["shortfall"] or values.get("errors")
+        for values in summary["currencies"].values()
+    ):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # Settings
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
+from decimal import Decimal
 
 
 class Settings(BaseSettings):
@@ -22,6 +23,95 @@ class Settings(BaseSettings):
     # 核心錢包資訊
     CORE_WALLET_ADDRESS: str = Field(..., env="CORE_WALLET_ADDRESS")
     CORE_WALLET_PRIVATE_KEY: str = Field(..., env="CORE_WALLET_PRIVATE_KEY")
+    # RPC 預算：每個操作（例如 "POST /api/v1/transaction/withdraw-usdt"、"monitor.block"）
+    # 允許的節點呼叫次數，0 表示不限制；超出時依 RPC_BUDGET_ACTION 記錄 log 或發出 warning
+    RPC_BUDGET_DEFAULT: int = 0
+    RPC_BUDGETS: dict[str, int] = {}
+    RPC_BUDGET_ACTION: str = "log"
+    # 監聽服務協調：同一時間只有持有租約的實例執行監聽
+    MONITOR_COORDINATION_ENABLED: bool = True
+    # 分片數量，大於 1 時依地址將監聽工作分散到多個實例
+    MONITOR_SHARD_COUNT: int = 1
+    # 每個實例最多持有的分片數，0 表示不限制（其他實例失效時可全部接手）；
+    # 分片模式下建議設為 ceil(分片數 / 實例數) 再加上容錯餘量，分片才會平均分散
+    MONITOR_MAX_SHARDS_PER_INSTANCE: int = 0
+    # 租約有效秒數，leader 失效超過此時間後由其他實例接手
+    MONITOR_LEASE_TTL: int = 30
+    # 實例識別碼，未設定時使用 hostname:pid
+    MONITOR_INSTANCE_ID: str = ""
+    # 入金確認數：區塊之後再出現這麼多個區塊才歸集與入帳，0 表示立即入帳
+    DEPOSIT_CONFIRMATIONS: int = 15
+    # 保留最近區塊 hash 的數量，用於偵測鏈重組，需大於確認數
+    MONITOR_BLOCK_HASH_WINDOW: int = 128
+    # mempool 監看：在交易上鏈前偵測入金並記錄為 pending（需節點開放 pending 交易查詢）
+    MEMPOOL_WATCH_ENABLED: bool = False
+    # 來源："txpool"（每次輪詢一次 txpool_content）或 "filter"（eth_newPendingTransactionFilter，
+    # 每筆新交易各查詢一次，僅供未開放 txpool API 的節點使用）
+    MEMPOOL_SOURCE: str = "txpool"
+    MEMPOOL_POLL_INTERVAL: float = 1.0
+    # pending 記錄超過此秒數仍未上鏈即標記為 dropped
+    MEMPOOL_PENDING_TTL: int = 600
+    # 入金 / 提領事件推播：每個 process 同時連線數上限、每個子錢包保留的事件數（供斷線重連補送）
+    EVENT_STREAM_MAX_CONNECTIONS: int = 1000
+    EVENT_HISTORY_SIZE: int = 50
+    EVENT_STREAM_KEEPALIVE: float = 15.0
+    # Disperse 合約地址（批次提領與批次補 gas 共用），未設定時無法啟用批次功能
+    DISPERSE_CONTRACT_ADDRESS: str = ""
+    # 批次提領：收集 PAYOUT_BATCH_WINDOW 秒內（或滿 PAYOUT_BATCH_MAX_SIZE 筆）的提領一次送出
+    PAYOUT_BATCH_ENABLED: bool = False
+    PAYOUT_BATCH_WINDOW: float = 2.0
+    PAYOUT_BATCH_MAX_SIZE: int = 100
+    # 補 gas：合併 GAS_STATION_BATCH_WINDOW 秒內的請求，每批最多 GAS_STATION_MAX_BATCH 個地址
+    GAS_STATION_BATCH_WINDOW: float = 0.2
+    GAS_STATION_MAX_BATCH: int = 100
+    # 每次補足幾次代幣歸集所需的 gas（大於 1 時後續歸集可省略補 gas）
+    GAS_STATION_TOPUP_MULTIPLIER: Decimal = Decimal("1")
+    # gas limit 學習：取最近 GAS_LIMIT_SAMPLES 筆實際 gasUsed 的最大值，加上 GAS_LIMIT_MARGIN 比例的餘量
+    GAS_LIMIT_SAMPLES: int = 20
+    GAS_LIMIT_MARGIN: Decimal = Decimal("0.2")
+    # 歸集排程：本實例同時歸集數上限；所有實例合計上限（0 表示不限制，以資料庫租約實作）
+    SWEEP_MAX_CONCURRENCY: int = 4
+    SWEEP_GLOBAL_CONCURRENCY: int = 0
+    # gas price 高於此值（gwei，0 表示停用）時，金額未達 SWEEP_DEFER_MIN_AMOUNTS（依幣種代號）的歸集延後，
+    # 最多延後 SWEEP_DEFER_MAX_AGE 秒
+    SWEEP_DEFER_MAX_GAS_PRICE_GWEI: Decimal = Decimal("0")
+    SWEEP_DEFER_MIN_AMOUNTS: dict[str, Decimal] = {}
+    SWEEP_DEFER_MAX_AGE: int = 3600
+    # 歸集單一地址時持有的跨實例鎖秒數（需涵蓋補 gas 與歸集兩筆交易的確認時間）
+    SWEEP_LOCK_TTL: int = 300
+    # 歸集轉帳失敗時，入金放回待確認佇列重試的次數上限（超過後記錄 log 待人工處理）
+    SWEEP_MAX_ATTEMPTS: int = 5
+    # 監聽時預先抓取的區塊數量（含目前處理中的區塊），1 表示不預抓
+    MONITOR_PREFETCH_WINDOW: int = 4
+    # 以 debug_traceBlockByNumber 偵測經由合約轉入的 BNB（內部轉帳），需節點支援 debug API
+    MONITOR_TRACE_INTERNAL_TRANSFERS: bool = False
+    # 日誌：輸出格式（text 或 json）、背景寫出佇列的容量（滿時丟棄），
+    # 以及指定限流鍵的高頻記錄每秒允許筆數與瞬間上限
+    LOG_FORMAT: str = "text"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_RATE_LIMIT_PER_SECOND: float = 5.0
+    LOG_RATE_LIMIT_BURST: int = 50
+    # 健康檢查：背景檢查間隔與單項檢查逾時（秒），監聽落後超過此區塊數時 /readyz?monitor=1 回報未就緒（0 表示不檢查）
+    HEALTH_CHECK_INTERVAL: float = 2.0
+    HEALTH_CHECK_TIMEOUT: float = 3.0
+    HEALTH_MAX_MONITOR_LAG_BLOCKS: int = 50
+    # 背景任務（區塊監聽、租約續約等）異常結束時重新啟動的等待秒數：從 INITIAL 起倍增，最多 MAX
+    BACKGROUND_RETRY_INITIAL_DELAY: float = 1.0
+    BACKGROUND_RETRY_MAX_DELAY: float = 30.0
+    # 地址 checksum 轉換的 LRU 快取大小（監聽地址與代幣合約會重複轉換）
+    CHECKSUM_ADDRESS_CACHE_SIZE: int = 65536
+    # Multicall3 合約地址（BSC 主網與測試網相同），留空則逐一查詢餘額
+    MULTICALL3_ADDRESS: str = "0xcA11bde05977b3631167028862bE2a173976CA11"
+    # 每次 aggregate3 合併的呼叫數量
+    MULTICALL_BATCH_SIZE: int = 200
+    # 交易記錄匯出：每批從資料庫串流讀取的筆數，以及可匯出全平台記錄的帳號
+    EXPORT_BATCH_SIZE: int = 1000
+    EXPORT_ADMIN_ACCOUNTS: list[str] = []
+    # core_wallet_currency 未設定 DepositLimit / DepositFee 時使用的預設值
+    DEFAULT_DEPOSIT_LIMIT: Decimal = Decimal("10")
+    # 原生幣（BNB）未設定 DepositLimit 時使用的預設值
+    DEFAULT_NATIVE_DEPOSIT_LIMIT: Decimal = Decimal("0.01")
+    DEFAULT_DEPOSIT_FEE: Decimal = Decimal("0.00")
 
     # 指定 .env 檔案
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
@@ -3,9 +3,11 @@ from fastapi import Depends
 from app.db.session import get_db
 from app.services.wallet_service import WalletService
 from app.services.transaction_service import TransactionService
+from app.services.payout_service import PayoutBatcher, payout_batcher
 from app.repositories.wallet_repository import WalletRepository
 from app.repositories.transaction_repository import TransactionRepository
 from app.repositories.monitored_repository import MonitoredRepository
+from app.repositories.pending_deposit_repository import PendingDepositRepository
 
 
 # wallet_service
@@ -31,3 +33,13 @@ def get_transaction_repository() -> TransactionRepository:
 # monitored_repository
 def get_monitored_repository() -> MonitoredRepository:
     return MonitoredRepository()
+
+
+# pending_deposit_repository
+def get_pending_deposit_repository() -> PendingDepositRepository:
+    return PendingDepositRepository()
+
+
+# payout_batcher（全域共用，批次才能跨請求合併）
+def get_payout_batcher() -> PayoutBatcher:
+    return payout_batcher
@@ -1,37 +1,155 @@
 import asyncio
-from app.core.logger import logger
+import time
+from functools import partial
+from typing import Awaitable, Callable, Optional
+from app.core.logger import logger, setup_logging, stop_logging
 from contextlib import asynccontextmanager
+from app.core.metrics import BACKGROUND_TASK_RESTARTS
 from app.services.monitor_service import MonitorService
 from app.repositories.monitored_repository import MonitoredRepository
 from app.repositories.wallet_repository import WalletRepository
+from app.repositories.lease_repository import LeaseRepository
+from app.repositories.pending_deposit_repository import PendingDepositRepository
+from app.repositories.transaction_repository import TransactionRepository
 from app.services.transaction_service import TransactionService
+from app.services.coordination_service import MonitorCoordinator
+from app.services.gas_limit_cache import seed_withdraw_gas_limits
+from app.services.health_service import health_monitor
+from app.services.token_registry import token_registry
+from app.core.config import settings
 
 
 @asynccontextmanager
 async def lifespan(app):
     """
     Lifespan context manager，用於處理應用的啟動和關閉事件
+
+    啟動時只建立背景任務即開始接受請求；鏈上服務於背景建立，
+    節點或資料庫暫時無法連線時持續重試，由 /readyz 回報狀態。
     """
+    # 日誌改由背景 thread 寫出，避免 I/O 阻塞事件迴圈
+    setup_logging()
     logger.info("Application startup: Initializing resources.")
 
-    # 手動初始化依賴
-    monitored_repository = MonitoredRepository()
-    wallet_repository = WalletRepository()
-    transaction_service = TransactionService()
-    monitor_service = MonitorService(
-        monitored_repository, wallet_repository, transaction_service
-    )
-
-    # 啟動監聽任務
-    refresh_task = asyncio.create_task(monitor_service.refresh_addresses())
-    monitor_task = asyncio.create_task(monitor_service.monitor_blockchain())
+    services = BackgroundServices()
+    # 健康檢查最先啟動，/readyz 依背景快照回應
+    services.spawn("health", health_monitor.run)
+    services.spawn("startup", services.start)
 
     # 提供 lifespan scope 的上下文
     yield
 
     logger.info("Application shutdown: Cleaning up resources.")
-    refresh_task.cancel()
-    monitor_task.cancel()
+    await services.stop()
+
+    # 寫出剩餘的日誌
+    stop_logging()
+
+
+class BackgroundServices:
+    """
+    lifespan 期間的背景任務：建立監聽服務並啟動監聽、租約續約等任務
+    """
+
+    def __init__(self):
+        self.tasks: list[asyncio.Task] = []
+        self.coordinator: Optional[MonitorCoordinator] = None
+
+    def spawn(self, name: str, start: Callable[[], Awaitable]):
+        self.tasks.append(
+            asyncio.create_task(run_with_retry(name, start), name=f"background:{name}")
+        )
+
+    async def start(self):
+        # 建立服務時會匯入 web3 並建立 Web3 實例，在 thread 中進行以免阻塞事件迴圈
+        monitor_service, mempool_watcher = await asyncio.to_thread(self.build)
+        self.coordinator = monitor_service.coordinator
+        health_monitor.monitor_service = monitor_service
+
+        if self.coordinator is not None:
+            self.spawn("coordinator", self.coordinator.run)
+        self.spawn("refresh_addresses", monitor_service.refresh_addresses)
+        self.spawn("monitor", monitor_service.monitor_blockchain)
+        if mempool_watcher is not None:
+            self.spawn("mempool", mempool_watcher.run)
+
+        # 以最近的提領收據預先學習 gas limit，失敗時由之後的交易自行學習
+        self.spawn(
+            "seed_gas_limits",
+            partial(seed_gas_limits, monitor_service.transaction_service),
+        )
+        logger.info("Background services started.")
+
+    @staticmethod
+    def build():
+        # 多個 worker 時僅由持有租約者監聽，避免重複掃描與重複歸集
+        coordinator = (
+            MonitorCoordinator(LeaseRepository())
+            if settings.MONITOR_COORDINATION_ENABLED
+            else None
+        )
+        # mempool 監看啟用時，區塊監聽同步更新 pending 入金的狀態
+        pending_deposit_repository = (
+            PendingDepositRepository() if settings.MEMPOOL_WATCH_ENABLED else None
+        )
+        monitor_service = MonitorService(
+            MonitoredRepository(),
+            WalletRepository(),
+            TransactionService(),
+            coordinator,
+            pending_deposit_repository=pending_deposit_repository,
+        )
+        mempool_watcher = None
+        if pending_deposit_repository is not None:
+            # 未啟用時不載入（依賴 web3 的資料結構）
+            from app.services.mempool_service import MempoolWatcher
+
+            mempool_watcher = MempoolWatcher(
+                monitor_service, pending_deposit_repository
+            )
+        return monitor_service, mempool_watcher
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+
+        # 確保取消的任務已完成
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+        # 釋放租約，讓其他實例立即接手
+        if self.coordinator is not None:
+            await asyncio.to_thread(self.coordinator.release_all)
+
+
+async def run_with_retry(name: str, start: Callable[[], Awaitable]):
+    """
+    執行背景任務，異常結束時等待後重新啟動；正常結束則不再執行
+
+    等待秒數從 BACKGROUND_RETRY_INITIAL_DELAY 起倍增至 BACKGROUND_RETRY_MAX_DELAY，
+    任務已持續執行超過 BACKGROUND_RETRY_MAX_DELAY 秒才失敗時重新從初始值計算。
+    """
+    delay = settings.BACKGROUND_RETRY_INITIAL_DELAY
+    while True:
+        started = time.monotonic()
+        try:
+            await start()
+            return
+        except Exception as e:
+            if time.monotonic() - started > settings.BACKGROUND_RETRY_MAX_DELAY:
+                delay = settings.BACKGROUND_RETRY_INITIAL_DELAY
+            BACKGROUND_TASK_RESTARTS.labels(name).inc()
+            logger.error(f"Background task {name} failed, retrying in {delay}s: {e}")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, settings.BACKGROUND_RETRY_MAX_DELAY)
+
 
-    # 確保取消的任務已完成
-    await asyncio.gather(refresh_task, monitor_task, return_exceptions=True)
+async def seed_gas_limits(transaction_service: TransactionService):
+    try:
+        await asyncio.to_thread(
+            seed_withdraw_gas_limits,
+            transaction_service.web3,
+            TransactionRepository(),
+            token_registry.get_by_symbol("USDT"),
+        )
+    except Exception as e:
+        logger.warning(f"Failed to seed gas limits: {e}")
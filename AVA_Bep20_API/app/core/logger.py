@@ -1,4 +1,14 @@
+import json
 import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Optional
+from app.core.config import settings
+from app.core.metrics import LOG_RECORDS_DROPPED
 
 
 # 初始化 Uvicorn 的 logger
@@ -10,5 +20,205 @@ def get_logger(name: str = "uvicorn"):
     return logger
 
 
+class Lazy:
+    """
+    延後計算的日誌欄位，只在記錄真正輸出時（背景 thread 中）才呼叫 func
+
+        logger.info("...", extra=log_extra(amount=Lazy(token.from_base_units, amount)))
+    """
+
+    __slots__ = ("func", "args")
+
+    def __init__(self, func: Callable, *args):
+        self.func = func
+        self.args = args
+
+    def __str__(self) -> str:
+        return str(self.func(*self.args))
+
+    def value(self):
+        return self.func(*self.args)
+
+
+# 可延後到背景 thread 才格式化的參數型別（不可變，跨 thread 讀取安全）
+DEFERRABLE_ARG_TYPES = (str, int, float, Decimal, bool, type(None), Lazy)
+
+
+def log_extra(rate_limit: Optional[str] = None, **fields) -> dict:
+    """
+    組成 logger 的 extra 參數
+
+    :param rate_limit: 限流鍵，同一鍵的記錄受 LOG_RATE_LIMIT_PER_SECOND / LOG_RATE_LIMIT_BURST 限制
+    :param fields: 結構化欄位（JSON 輸出為獨立欄位，文字輸出附加於訊息後）
+    """
+    extra = {"fields": fields}
+    if rate_limit is not None:
+        extra["rate_limit"] = rate_limit
+    return extra
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    依 record.rate_limit 分別以 token bucket 限流，未指定限流鍵的記錄不受影響
+
+    被略過的筆數計入 LOG_RECORDS_DROPPED，並附加在同一鍵下一筆輸出記錄的 suppressed 欄位。
+    """
+
+    def __init__(self, rate: float = None, burst: int = None):
+        super().__init__()
+        self.rate = rate if rate is not None else settings.LOG_RATE_LIMIT_PER_SECOND
+        self.burst = max(1, burst or settings.LOG_RATE_LIMIT_BURST)
+        self._lock = threading.Lock()
+        # 限流鍵 -> [剩餘額度, 上次補充時間, 略過筆數]
+        self._buckets: dict[str, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "rate_limit", None)
+        if key is None or self.rate <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                LOG_RECORDS_DROPPED.labels("rate_limited").inc()
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.fields = {**getattr(record, "fields", {}), "suppressed": suppressed}
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    將記錄放入有界佇列，由 QueueListener 在背景 thread 格式化與寫出
+
+    - 佇列已滿時直接丟棄並計入 LOG_RECORDS_DROPPED，不阻塞呼叫端（事件迴圈）
+    - 參數皆為不可變型別時不在呼叫端格式化訊息，由背景 thread 處理
+    """
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels("queue_full").inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args and not (
+            isinstance(args, tuple)
+            and all(isinstance(arg, DEFERRABLE_ARG_TYPES) for arg in args)
+        ):
+            # 參數可能在之後被修改，先格式化
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info and not record.exc_text:
+            # traceback 需在例外仍有效時格式化
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+def _field_value(value: Any):
+    if isinstance(value, Lazy):
+        value = value.value()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    每筆記錄輸出為一行 JSON：時間、等級、logger、訊息與結構化欄位
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in getattr(record, "fields", {}).items():
+            payload[key] = _field_value(value)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class FieldsFormatter(logging.Formatter):
+    """
+    在既有的文字格式後附加 key=value 形式的結構化欄位
+    """
+
+    def __init__(self, base: Optional[logging.Formatter] = None):
+        super().__init__()
+        self.base = base or logging.Formatter("%(levelname)s:     %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = self.base.format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            message += " " + " ".join(
+                f"{key}={_field_value(value)}" for key, value in fields.items()
+            )
+        return message
+
+
+_listener: Optional[QueueListener] = None
+_original_handlers: dict[str, list[logging.Handler]] = {}
+
+
+def setup_logging(name: str = "uvicorn"):
+    """
+    將 logger 的輸出改為經由佇列在背景 thread 寫出（重複呼叫不會重複設定）
+
+    原有的 handler（例如 Uvicorn 的 console handler）移到 QueueListener，
+    依 LOG_FORMAT 改用 JSON 或附加結構化欄位的文字格式。
+    """
+    global _listener
+    if _listener is not None:
+        return
+    target = logging.getLogger(name)
+    _original_handlers[name] = list(target.handlers)
+    handlers = target.handlers or [logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(
+            JSONFormatter()
+            if settings.LOG_FORMAT == "json"
+            else FieldsFormatter(handler.formatter)
+        )
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    queue_handler.addFilter(RateLimitFilter())
+    _listener = QueueListener(
+        queue_handler.queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+    target.handlers = [queue_handler]
+    if target.level == logging.NOTSET:
+        target.setLevel(logging.INFO)
+
+
+def stop_logging():
+    """
+    寫出佇列中剩餘的記錄並停止背景 thread，之後的記錄改回同步寫出
+    """
+    global _listener
+    if _listener is None:
+        return
+    handlers = _listener.handlers
+    for name, original in _original_handlers.items():
+        logging.getLogger(name).handlers = original or list(handlers)
+    _original_handlers.clear()
+    _listener.stop()
+    _listener = None
+
+
 # 預設導出 Uvicorn 的 logger
 logger = get_logger()
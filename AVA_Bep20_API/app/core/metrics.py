@@ -0,0 +1,178 @@
+import os
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+
+# RPC 與資料庫延遲的 bucket（秒），涵蓋本機節點到公共節點的常見範圍
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# 入金偵測到入帳、歸集等鏈上流程的 bucket（秒）
+CHAIN_FLOW_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+
+# ---------------------------------------------------------------- 區塊監聽
+CHAIN_HEAD_BLOCK = Gauge(
+    "bep20_chain_head_block", "Latest block number reported by the node"
+)
+MONITOR_PROCESSED_BLOCK = Gauge(
+    "bep20_monitor_processed_block", "Last block number processed by monitor_blockchain"
+)
+MONITOR_LAG_BLOCKS = Gauge(
+    "bep20_monitor_lag_blocks", "Chain head minus last processed block"
+)
+CHAIN_REORGS = Counter(
+    "bep20_chain_reorgs_total", "Chain reorganisations detected by the monitor"
+)
+PENDING_DEPOSITS = Gauge(
+    "bep20_pending_deposits", "Detected deposits waiting for confirmations"
+)
+DEPOSIT_CREDIT_LATENCY = Histogram(
+    "bep20_deposit_credit_latency_seconds",
+    "Time from deposit detection to ledger credit",
+    buckets=CHAIN_FLOW_BUCKETS,
+)
+SWEEP_DURATION = Histogram(
+    "bep20_sweep_duration_seconds",
+    "Duration of sweeping a sub-wallet into the core wallet",
+    ["result"],
+    buckets=CHAIN_FLOW_BUCKETS,
+)
+# 每分鐘歸集數：rate(bep20_sweep_duration_seconds_count[1m]) * 60
+SWEEP_QUEUE_SIZE = Gauge("bep20_sweep_queue_size", "Sweeps waiting in the scheduler")
+SWEEP_QUEUE_AGE = Histogram(
+    "bep20_sweep_queue_age_seconds",
+    "Time a sweep waited in the scheduler before starting",
+    buckets=CHAIN_FLOW_BUCKETS,
+)
+SWEEPS_DEFERRED = Gauge(
+    "bep20_sweeps_deferred", "Small sweeps deferred until gas price drops"
+)
+
+# ---------------------------------------------------------------- 節點 RPC
+RPC_LATENCY = Histogram(
+    "bep20_rpc_latency_seconds",
+    "JSON-RPC round trip latency per method",
+    ["method"],
+    buckets=LATENCY_BUCKETS,
+)
+RPC_ERRORS = Counter(
+    "bep20_rpc_errors_total",
+    "JSON-RPC calls that raised or returned an error",
+    ["method"],
+)
+
+# ---------------------------------------------------------------- 資料庫
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "bep20_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool",
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "bep20_db_pool_checked_out", "Connections currently checked out of the pool"
+)
+
+# ---------------------------------------------------------------- API
+HTTP_REQUEST_LATENCY = Histogram(
+    "bep20_http_request_latency_seconds",
+    "API request latency per route",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS = Counter(
+    "bep20_http_requests_total",
+    "API requests per route and status",
+    ["method", "route", "status"],
+)
+
+# ---------------------------------------------------------------- 背景任務
+BACKGROUND_TASK_RESTARTS = Counter(
+    "bep20_background_task_restarts_total",
+    "Background tasks restarted after failing, e.g. node unreachable at startup",
+    ["task"],
+)
+
+
+# ---------------------------------------------------------------- 日誌
+LOG_RECORDS_DROPPED = Counter(
+    "bep20_log_records_dropped_total",
+    "Log records dropped because the log queue was full or rate limited",
+    ["reason"],
+)
+
+
+# labels() 每次都需查表加鎖，熱路徑上先快取各 method 的 child
+_rpc_latency_children = {}
+
+
+def observe_rpc_latency(method: str, seconds: float):
+    """
+    記錄單次 RPC 延遲
+    """
+    child = _rpc_latency_children.get(method)
+    if child is None:
+        child = _rpc_latency_children[method] = RPC_LATENCY.labels(method)
+    child.observe(seconds)
+
+
+def _collect_registry():
+    """
+    多 worker 部署時（設定 PROMETHEUS_MULTIPROC_DIR）彙整所有 process 的指標
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+async def metrics_endpoint(request: Request):
+    return Response(
+        generate_latest(_collect_registry()), media_type=CONTENT_TYPE_LATEST
+    )
+
+
+def setup_metrics(app: FastAPI):
+    """
+    配置 /metrics 端點與每個路由的請求延遲統計
+    """
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+    @app.middleware("http")
+    async def record_request_latency(request: Request, call_next):
+        start = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            # 使用路由樣板而非實際路徑，避免 label 數量無限增長
+            route = request.scope.get("route")
+            route_path = route.path if route else "unmatched"
+            HTTP_REQUEST_LATENCY.labels(request.method, route_path).observe(
+                time.perf_counter() - start
+            )
+            HTTP_REQUESTS.labels(request.method, route_path, status_code).inc()
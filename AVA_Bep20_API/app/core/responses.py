@@ -0,0 +1,73 @@
+import csv
+import io
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Iterable
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _orjson_default(value: Any):
+    """
+    orjson 不支援的型別轉換；Decimal 與 jsonable_encoder 相同以 JSON 數字輸出，
+    既有端點的金額格式不變
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONDecimalResponse(JSONResponse):
+    """
+    以 orjson 序列化的 JSON 回應，支援 Decimal、datetime 與 Enum
+
+    端點直接回傳此物件時，FastAPI 會略過 jsonable_encoder 與 response_model 驗證。
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS
+        )
+
+
+def encode_ndjson_rows(fields: tuple[str, ...], rows: Iterable[tuple]) -> bytes:
+    """
+    將一批 tuple 編碼為 NDJSON（每行一筆 JSON 物件）
+    """
+    return b"".join(
+        orjson.dumps(dict(zip(fields, row)), default=_orjson_default) + b"\n"
+        for row in rows
+    )
+
+
+def _csv_value(value: Any):
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def encode_csv_rows(rows: Iterable[tuple], header: tuple[str, ...] = None) -> bytes:
+    """
+    將一批 tuple 編碼為 CSV，提供 header 時先輸出標題列
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header is not None:
+        writer.writerow(header)
+    writer.writerows(tuple(map(_csv_value, row)) for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def encode_sse_event(event_id: int, event_type: str, data: Any) -> bytes:
+    """
+    編碼一則 Server-Sent Event，data 以 JSON 輸出
+    """
+    return (
+        f"id: {event_id}\nevent: {event_type}\ndata: ".encode()
+        + orjson.dumps(data, default=_orjson_default)
+        + b"\n\n"
+    )
@@ -0,0 +1,142 @@
+import time
+import warnings
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+from fastapi import FastAPI, Request
+from prometheus_client import Counter as MetricCounter
+from app.core.config import settings
+from app.core.logger import logger
+
+RPC_BUDGET_EXCEEDED = MetricCounter(
+    "bep20_rpc_budget_exceeded_total",
+    "Operations that used more RPC calls than their budget",
+    ["operation"],
+)
+
+
+class RPCBudgetExceededWarning(RuntimeWarning):
+    """
+    單一操作的節點呼叫次數超出設定的 RPC 預算
+    """
+
+
+@dataclass
+class RPCCall:
+    method: str
+    duration: float
+    request_bytes: int
+    response_bytes: int
+
+
+@dataclass
+class RPCPayload:
+    """
+    單次 RPC 呼叫的 payload 大小，由 TracingHTTPProvider 填入
+    """
+
+    request_bytes: int = 0
+    response_bytes: int = 0
+
+
+@dataclass
+class RPCTrace:
+    """
+    單一操作（一個 API 請求或一個監聽區塊）期間的所有 RPC 呼叫
+    """
+
+    operation: str
+    detail: str = ""
+    started: float = field(default_factory=time.perf_counter)
+    calls: list[RPCCall] = field(default_factory=list)
+
+    def record(self, method: str, duration: float, payload: RPCPayload):
+        self.calls.append(
+            RPCCall(method, duration, payload.request_bytes, payload.response_bytes)
+        )
+
+    @property
+    def rpc_time(self) -> float:
+        return sum(call.duration for call in self.calls)
+
+    @property
+    def payload_bytes(self) -> int:
+        return sum(call.request_bytes + call.response_bytes for call in self.calls)
+
+    def summary(self) -> str:
+        methods = Counter(call.method for call in self.calls)
+        breakdown = ", ".join(f"{method}x{count}" for method, count in methods.items())
+        return (
+            f"{self.operation}{f' ({self.detail})' if self.detail else ''}: "
+            f"{len(self.calls)} RPC calls, {self.rpc_time * 1000:.1f} ms, "
+            f"{self.payload_bytes} bytes [{breakdown}]"
+        )
+
+
+# 目前執行中的操作，asyncio task 與 threadpool 皆會複製 context，因此可跨越 await 與同步端點
+current_rpc_trace: ContextVar[Optional[RPCTrace]] = ContextVar(
+    "current_rpc_trace", default=None
+)
+# 目前這次 RPC 呼叫的 payload 大小；同一個 trace 可能同時有多個 thread 在呼叫，因此每次呼叫各自一份
+current_rpc_payload: ContextVar[Optional[RPCPayload]] = ContextVar(
+    "current_rpc_payload", default=None
+)
+
+
+def get_rpc_budget(operation: str) -> int:
+    return settings.RPC_BUDGETS.get(operation, settings.RPC_BUDGET_DEFAULT)
+
+
+def finish_rpc_trace(trace: RPCTrace):
+    """
+    檢查 RPC 預算並輸出摘要
+    """
+    budget = get_rpc_budget(trace.operation)
+    if budget and len(trace.calls) > budget:
+        RPC_BUDGET_EXCEEDED.labels(trace.operation).inc()
+        message = f"RPC budget exceeded (budget={budget}) - {trace.summary()}"
+        if settings.RPC_BUDGET_ACTION == "warn":
+            warnings.warn(message, RPCBudgetExceededWarning, stacklevel=2)
+        else:
+            logger.warning(message)
+    elif trace.calls:
+        logger.debug(trace.summary())
+
+
+@contextmanager
+def rpc_trace(operation: str, detail: str = ""):
+    """
+    將區塊內所有 RPC 呼叫歸屬到指定操作，例如：
+
+        with rpc_trace("monitor.block", detail=str(block_number)):
+            ...
+    """
+    trace = RPCTrace(operation, detail)
+    token = current_rpc_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_rpc_trace.reset(token)
+        finish_rpc_trace(trace)
+
+
+def setup_rpc_tracing(app: FastAPI):
+    """
+    為每個 API 請求建立 RPCTrace
+    """
+
+    @app.middleware("http")
+    async def trace_request_rpc(request: Request, call_next):
+        trace = RPCTrace(f"{request.method} {request.url.path}")
+        token = current_rpc_trace.set(trace)
+        try:
+            return await call_next(request)
+        finally:
+            current_rpc_trace.reset(token)
+            # 預算以路由樣板為鍵，避免路徑參數造成設定無法對應
+            route = request.scope.get("route")
+            if route is not None:
+                trace.operation = f"{request.method} {route.path}"
+            finish_rpc_trace(trace)
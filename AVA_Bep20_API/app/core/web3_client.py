@@ -0,0 +1,49 @@
+import threading
+from typing import TYPE_CHECKING
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from web3 import Web3
+
+BSC_NODE_URL = settings.BSC_MAINNET_NODE_URL  # BSC 主網節點 URL
+
+_instances: dict[str, "Web3"] = {}
+_lock = threading.Lock()
+
+
+def get_web3(node_url: str = BSC_NODE_URL) -> "Web3":
+    """
+    取得共用的 Web3 實例（每個節點 URL 只建立一次）
+
+    所有服務共用同一個 provider 與中介層，RPC 指標才能集中統計。
+    第一次取得時才建立（lifespan 於背景預先建立，請求與背景 thread 同時取得時只建立一個）。
+    """
+    web3 = _instances.get(node_url)
+    if web3 is None:
+        with _lock:
+            web3 = _instances.get(node_url)
+            if web3 is None:
+                web3 = _instances[node_url] = _create_web3(node_url)
+    return web3
+
+
+def _create_web3(node_url: str) -> "Web3":
+    # web3 匯入需數百毫秒，匯入 app.main 時不載入
+    from web3 import Web3
+    from web3.middleware import ExtraDataToPOAMiddleware
+    from app.core.web3_middleware import (
+        RPCMetricsMiddleware,
+        RPCTracingMiddleware,
+        TracingHTTPProvider,
+    )
+
+    web3 = Web3(TracingHTTPProvider(node_url))
+
+    # 添加 POA 中間件
+    web3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+    # 記錄每個 RPC method 的延遲
+    web3.middleware_onion.add(RPCMetricsMiddleware, "rpc_metrics")
+    # 將 RPC 呼叫歸屬到目前的 API 請求或監聽區塊
+    web3.middleware_onion.add(RPCTracingMiddleware, "rpc_tracing")
+
+    return web3
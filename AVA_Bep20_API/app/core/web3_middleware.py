@@ -0,0 +1,76 @@
+"""
+Web3 的 provider 與中介層
+
+繼承自 web3 的類別集中於此，僅在 get_web3() 第一次建立實例時匯入，
+匯入 app.main 時不需載入 web3。
+"""
+
+import time
+from web3 import HTTPProvider
+from web3.middleware import Web3Middleware
+from app.core.metrics import RPC_ERRORS, observe_rpc_latency
+from app.core.rpc_tracing import RPCPayload, current_rpc_payload, current_rpc_trace
+
+
+class RPCMetricsMiddleware(Web3Middleware):
+    """
+    Web3 中介層，記錄每個 JSON-RPC method 的延遲與錯誤次數
+    """
+
+    def wrap_make_request(self, make_request):
+        def middleware(method, params):
+            start = time.perf_counter()
+            try:
+                response = make_request(method, params)
+            except Exception:
+                RPC_ERRORS.labels(method).inc()
+                raise
+            finally:
+                observe_rpc_latency(method, time.perf_counter() - start)
+            if "error" in response:
+                RPC_ERRORS.labels(method).inc()
+            return response
+
+        return middleware
+
+
+class TracingHTTPProvider(HTTPProvider):
+    """
+    記錄每次請求與回應 payload 大小的 HTTPProvider
+    """
+
+    def encode_rpc_request(self, method, params) -> bytes:
+        request_data = super().encode_rpc_request(method, params)
+        payload = current_rpc_payload.get()
+        if payload is not None:
+            payload.request_bytes = len(request_data)
+        return request_data
+
+    def decode_rpc_response(self, raw_response: bytes):
+        payload = current_rpc_payload.get()
+        if payload is not None:
+            payload.response_bytes = len(raw_response)
+        return super().decode_rpc_response(raw_response)
+
+
+class RPCTracingMiddleware(Web3Middleware):
+    """
+    Web3 中介層，將每次 RPC 的 method 與耗時記錄到目前的 RPCTrace
+    """
+
+    def wrap_make_request(self, make_request):
+        def middleware(method, params):
+            trace = current_rpc_trace.get()
+            if trace is None:
+                return make_request(method, params)
+
+            payload = RPCPayload()
+            token = current_rpc_payload.set(payload)
+            start = time.perf_counter()
+            try:
+                return make_request(method, params)
+            finally:
+                current_rpc_payload.reset(token)
+                trace.record(method, time.perf_counter() - start, payload)
+
+        return middleware
@@ -1,7 +1,12 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
+import time
+from typing import Optional
+from sqlalchemy import Engine, create_engine, inspect, text
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from app.models.base import Base
 from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUT_WAIT
 from dotenv import load_dotenv
 
 # 確保載入環境變數
@@ -11,18 +16,69 @@ load_dotenv()
 if not settings.DATABASE_URL:
     raise ValueError("DATABASE_URL 未設置，請檢查設定或 .env 文件")
 
-# 創建資料庫引擎
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=False,  # 在調試階段顯示 SQL 語句，生產環境可設為 False
-    pool_size=10,  # 設置連接池大小
-    max_overflow=20,  # 超出連接池大小的額外連接數量
-    pool_timeout=30,  # 連接超時秒數
-    pool_recycle=1800,  # 回收空閒連接，防止 MySQL 的空閒連接超時
-)
+
+# 連線池大小與可額外建立的連線數（健康檢查以兩者合計判斷連線池是否已滿）
+DB_POOL_SIZE = 10
+DB_MAX_OVERFLOW = 20
+
+
+class MeteredQueuePool(QueuePool):
+    """
+    記錄從連線池取得連線所花費等待時間的 QueuePool
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """
+    取得資料庫引擎，第一次使用時才建立（create_engine 會載入方言與資料庫驅動）
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
+    return _engine
+
+
+def _create_engine() -> Engine:
+    # 創建資料庫引擎
+    engine = create_engine(
+        settings.DATABASE_URL,
+        echo=False,  # 在調試階段顯示 SQL 語句，生產環境可設為 False
+        pool_size=DB_POOL_SIZE,  # 設置連接池大小
+        max_overflow=DB_MAX_OVERFLOW,  # 超出連接池大小的額外連接數量
+        pool_timeout=30,  # 連接超時秒數
+        pool_recycle=1800,  # 回收空閒連接，防止 MySQL 的空閒連接超時
+        poolclass=MeteredQueuePool,  # 記錄連線等待時間
+    )
+
+    # 目前被取用的連線數，於 /metrics 抓取時才計算
+    DB_POOL_CHECKED_OUT.set_function(engine.pool.checkedout)
+    return engine
+
+
+class EngineSession(Session):
+    """
+    執行查詢時才取得引擎的 Session，建立 Session 本身不需要引擎
+    """
+
+    def get_bind(self, mapper=None, **kwargs):
+        return get_engine()
+
 
 # 建立資料庫會話工廠
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=EngineSession, autocommit=False, autoflush=False)
 
 
 # 資料庫會話依賴，用於 FastAPI
@@ -37,13 +93,53 @@ def get_db():
         db.close()
 
 
-# 初始化資料庫表，只需執行一次
+# 既有資料表後來新增的欄位：create_all 不會修改已存在的資料表，由 init_db 補上
+ADDED_COLUMNS = {
+    "core_wallet_currency": {
+        "ContractAddress": "VARCHAR(42) NULL",
+        "Decimals": "INTEGER NOT NULL DEFAULT 18",
+        "DepositLimit": "NUMERIC(20, 10) NULL",
+        "DepositFee": "NUMERIC(20, 10) NULL",
+    },
+}
+
+
+def add_missing_columns(engine: Engine):
+    """
+    為已存在的資料表補上 ADDED_COLUMNS 中缺少的欄位（可重複執行）
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table, columns in ADDED_COLUMNS.items():
+            if not inspector.has_table(table):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table)}
+            for name, definition in columns.items():
+                if name not in existing:
+                    connection.execute(
+                        text(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                    )
+                    print(f"已新增欄位 {table}.{name}")
+
+
+# 初始化資料庫表，可重複執行（已存在的資料表只補上缺少的欄位）
 def init_db():
     """
     初始化資料庫表結構
     """
     try:
-        Base.metadata.create_all(bind=engine)
+        # 匯入所有模型，確保 metadata 中包含所有資料表
+        import app.models.account
+        import app.models.core_wallet_balance
+        import app.models.core_wallet_currency
+        import app.models.core_wallet_deposit_source
+        import app.models.core_wallet_monitor_lease
+        import app.models.core_wallet_pending_deposit
+        import app.models.core_wallet_sub_wallet
+        import app.models.core_wallet_transaction
+
+        Base.metadata.create_all(bind=get_engine())
+        add_missing_columns(get_engine())
         print("資料庫表初始化成功")
     except Exception as e:
         print(f"資料庫表初始化失敗: {e}")
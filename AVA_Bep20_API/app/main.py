@@ -1,5 +1,7 @@
 from fastapi import FastAPI
 from app.core.config import setup_cors
+from app.core.metrics import setup_metrics
+from app.core.rpc_tracing import setup_rpc_tracing
 from app.routes import setup_routes
 from app.core.lifespan import lifespan
 from app.core.logger import logger
@@ -11,6 +13,12 @@ app = FastAPI(title="BEP20 Wallet API", version="1.0.0", lifespan=lifespan)
 # 配置 CORS
 setup_cors(app)
 
+# 配置 Prometheus 指標
+setup_metrics(app)
+
+# 配置 RPC 呼叫追蹤
+setup_rpc_tracing(app)
+
 # 設置路由
 setup_routes(app)
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Numeric
 from app.models.base import Base
 
 
@@ -7,3 +7,9 @@ class CoreWalletCurrency(Base):
 
     CurrencyID = Column(Integer, primary_key=True, autoincrement=True)
     CurrencyCode = Column(String(10), nullable=False, unique=True)
+    ContractAddress = Column(
+        String(42), nullable=True
+    )  # BEP-20 合約地址，原生幣為 NULL
+    Decimals = Column(Integer, nullable=False, default=18)
+    DepositLimit = Column(Numeric(20, 10), nullable=True)  # 最低入金限制
+    DepositFee = Column(Numeric(20, 10), nullable=True)  # 入金手續費
@@ -0,0 +1,30 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Numeric,
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    UniqueConstraint,
+)
+from app.models.base import Base
+
+
+# 入金來源資料表的模型：一筆入帳記錄對應同一區塊內該地址收到的所有鏈上轉帳
+class CoreWalletDepositSource(Base):
+    __tablename__ = "core_wallet_deposit_source"
+    __table_args__ = (UniqueConstraint("SourceTxHash", "SubWalletID", "CurrencyID"),)
+
+    SourceID = Column(Integer, primary_key=True, autoincrement=True)
+    DepositTxHash = Column(String(255), nullable=False, index=True)  # 入帳記錄的 TxHash
+    SourceTxHash = Column(String(255), nullable=False)  # 鏈上轉帳交易
+    SubWalletID = Column(
+        Integer, ForeignKey("core_wallet_sub_wallet.SubWalletID"), nullable=False
+    )
+    CurrencyID = Column(
+        Integer, ForeignKey("core_wallet_currency.CurrencyID"), nullable=False
+    )
+    Amount = Column(Numeric(38, 18), nullable=False)  # 該筆轉帳金額（幣種單位）
+    BlockNumber = Column(BigInteger, nullable=False)
+    CreateTime = Column(DateTime, nullable=False)
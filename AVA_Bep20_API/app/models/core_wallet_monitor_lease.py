@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from app.models.base import Base
+
+
+# 監聽服務租約資料表的模型（多個 worker / 實例間選出負責監聽的 leader）
+class CoreWalletMonitorLease(Base):
+    __tablename__ = "core_wallet_monitor_lease"
+
+    LeaseName = Column(String(64), primary_key=True)  # 例如 monitor:0/1
+    HolderID = Column(String(128), nullable=True)  # 目前持有者，NULL 表示已釋放
+    ExpireTime = Column(DateTime, nullable=False)  # 租約到期時間（UTC）
+    CheckpointBlock = Column(BigInteger, nullable=True)  # 已處理完成的最後區塊
+    UpdatedTime = Column(DateTime, nullable=False)
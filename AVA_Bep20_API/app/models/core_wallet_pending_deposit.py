@@ -0,0 +1,39 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Numeric,
+    BigInteger,
+    DateTime,
+    Enum,
+    ForeignKey,
+    UniqueConstraint,
+)
+from app.models.base import Base
+from enum import Enum as PyEnum
+
+
+# 定義待入帳入金的狀態
+class PendingDepositStatusEnum(PyEnum):
+    pending = "pending"  # 在 mempool 中看到，尚未上鏈
+    mined = "mined"  # 已上鏈，等待確認數
+    credited = "credited"  # 已歸集並入帳
+    dropped = "dropped"  # 逾時未上鏈（被取代或移出 mempool）
+
+
+# mempool 中偵測到的入金資料表的模型，供用戶端在上鏈前即時顯示
+class CoreWalletPendingDeposit(Base):
+    __tablename__ = "core_wallet_pending_deposit"
+    __table_args__ = (UniqueConstraint("TxHash", "ToAddress", "CurrencyID"),)
+
+    PendingID = Column(Integer, primary_key=True, autoincrement=True)
+    TxHash = Column(String(255), nullable=False)
+    ToAddress = Column(String(42), nullable=False, index=True)  # 小寫子錢包地址
+    CurrencyID = Column(
+        Integer, ForeignKey("core_wallet_currency.CurrencyID"), nullable=False
+    )
+    Amount = Column(Numeric(38, 18), nullable=False)
+    Status = Column(Enum(PendingDepositStatusEnum), nullable=False)
+    BlockNumber = Column(BigInteger, nullable=True)
+    SeenTime = Column(DateTime, nullable=False)
+    UpdatedTime = Column(DateTime, nullable=False)
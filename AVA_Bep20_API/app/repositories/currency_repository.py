@@ -0,0 +1,16 @@
+from app.db.session import SessionLocal
+from app.models.core_wallet_currency import CoreWalletCurrency
+
+
+class CurrencyRepository:
+    def __init__(self):
+        """
+        初始化 Repository
+        """
+
+    def get_all_currencies(self) -> list[CoreWalletCurrency]:
+        """
+        獲取所有幣種設定
+        """
+        with SessionLocal() as session:
+            return session.query(CoreWalletCurrency).all()
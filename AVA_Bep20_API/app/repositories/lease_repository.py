@@ -0,0 +1,138 @@
+from typing import Optional
+from sqlalchemy import DateTime, bindparam, insert, update, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from app.db.session import SessionLocal
+from app.models.core_wallet_monitor_lease import CoreWalletMonitorLease
+
+
+class utc_after(FunctionElement):
+    """
+    資料庫時鐘的目前 UTC 時間加上指定秒數
+
+    租約到期時間一律以資料庫時鐘計算與比較，不受各主機時鐘誤差影響。
+    """
+
+    type = DateTime()
+    inherit_cache = True
+
+    def __init__(self, seconds: int = 0):
+        super().__init__(bindparam("seconds", seconds, unique=True))
+
+
+@compiles(utc_after)
+def _utc_after_default(element, compiler, **kw):
+    seconds = compiler.process(element.clauses, **kw)
+    return f"CURRENT_TIMESTAMP + {seconds} * INTERVAL '1' SECOND"
+
+
+@compiles(utc_after, "mysql")
+def _utc_after_mysql(element, compiler, **kw):
+    seconds = compiler.process(element.clauses, **kw)
+    return f"UTC_TIMESTAMP(6) + INTERVAL {seconds} SECOND"
+
+
+@compiles(utc_after, "sqlite")
+def _utc_after_sqlite(element, compiler, **kw):
+    seconds = compiler.process(element.clauses, **kw)
+    # 與 SQLAlchemy 在 SQLite 儲存 DateTime 的字串格式相同，才能直接比較
+    return f"strftime('%Y-%m-%d %H:%M:%f', 'now', {seconds} || ' seconds')"
+
+
+class LeaseRepository:
+    def __init__(self):
+        """
+        初始化 Repository
+        """
+
+    def try_acquire(self, lease_name: str, holder_id: str, ttl_seconds: int) -> bool:
+        """
+        取得或續約租約：租約未被持有、已過期或本來就屬於 holder_id 時成功
+        """
+        now = utc_after(0)
+        expire_time = utc_after(ttl_seconds)
+
+        with SessionLocal() as session:
+            try:
+                # 以單一條件式 UPDATE 搶佔租約，避免讀取後再寫入的競爭
+                result = session.execute(
+                    update(CoreWalletMonitorLease)
+                    .where(
+                        (CoreWalletMonitorLease.LeaseName == lease_name)
+                        & or_(
+                            CoreWalletMonitorLease.HolderID == holder_id,
+                            CoreWalletMonitorLease.HolderID.is_(None),
+                            CoreWalletMonitorLease.ExpireTime < now,
+                        )
+                    )
+                    .values(HolderID=holder_id, ExpireTime=expire_time, UpdatedTime=now)
+                )
+                if result.rowcount == 1:
+                    session.commit()
+                    return True
+
+                # 租約不存在時建立；若同時有其他實例建立則主鍵衝突，視為搶佔失敗
+                session.execute(
+                    insert(CoreWalletMonitorLease).values(
+                        LeaseName=lease_name,
+                        HolderID=holder_id,
+                        ExpireTime=expire_time,
+                        UpdatedTime=now,
+                    )
+                )
+                session.commit()
+                return True
+            except IntegrityError:
+                session.rollback()
+                return False
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def release(self, lease_name: str, holder_id: str):
+        """
+        釋放租約，讓其他實例可以立即接手
+        """
+        now = utc_after(0)
+        with SessionLocal() as session:
+            try:
+                session.execute(
+                    update(CoreWalletMonitorLease)
+                    .where(
+                        (CoreWalletMonitorLease.LeaseName == lease_name)
+                        & (CoreWalletMonitorLease.HolderID == holder_id)
+                    )
+                    .values(HolderID=None, ExpireTime=now, UpdatedTime=now)
+                )
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def save_checkpoint(self, lease_name: str, holder_id: str, block_number: int):
+        """
+        記錄已處理完成的區塊，僅租約持有者可以寫入
+        """
+        with SessionLocal() as session:
+            try:
+                session.execute(
+                    update(CoreWalletMonitorLease)
+                    .where(
+                        (CoreWalletMonitorLease.LeaseName == lease_name)
+                        & (CoreWalletMonitorLease.HolderID == holder_id)
+                    )
+                    .values(CheckpointBlock=block_number)
+                )
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def get_checkpoint(self, lease_name: str) -> Optional[int]:
+        """
+        查詢租約記錄的區塊檢查點
+        """
+        with SessionLocal() as session:
+            lease = session.get(CoreWalletMonitorLease, lease_name)
+            return lease.CheckpointBlock if lease else None
@@ -1,8 +1,12 @@
+from datetime import datetime
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
 from app.db.session import SessionLocal
 from decimal import Decimal
 from app.models.core_wallet_sub_wallet import CoreWalletSubWallet
+from app.models.core_wallet_deposit_source import CoreWalletDepositSource
+from app.models.core_wallet_transaction import CoreWalletTransaction
 
 
 class MonitoredRepository:
@@ -26,9 +30,13 @@ class MonitoredRepository:
         amount: Decimal,
         fee: Decimal,
         tx_hash: str,
+        sources: list[dict] = None,
     ):
         """
         呼叫存儲程序 core_wallet_DepositTransaction 進行存款交易
+
+        :param sources: 組成此筆入帳的鏈上轉帳（source_tx_hash, amount, block_number），
+                        與入帳記錄在同一個交易中寫入
         """
         with SessionLocal() as session:
             try:
@@ -49,9 +57,47 @@ class MonitoredRepository:
                         "tx_hash": tx_hash,
                     },
                 )
+                now = datetime.utcnow()
+                session.add_all(
+                    CoreWalletDepositSource(
+                        DepositTxHash=tx_hash,
+                        SourceTxHash=source["source_tx_hash"],
+                        SubWalletID=sub_wallet_id,
+                        CurrencyID=currency_id,
+                        Amount=source["amount"],
+                        BlockNumber=source["block_number"],
+                        CreateTime=now,
+                    )
+                    for source in sources or []
+                )
                 # 提交變更
                 session.commit()
             except Exception as e:
                 # 回滾交易以避免資料損壞
                 session.rollback()
                 raise e
+
+    def get_recorded_tx_hashes(
+        self, sub_wallet_id: int, currency_id: int, tx_hashes: list[str]
+    ) -> set[str]:
+        """
+        查詢子錢包已入帳的鏈上交易（入帳記錄本身或其來源），用於避免重掃時重複入帳
+        """
+        if not tx_hashes:
+            return set()
+        with SessionLocal() as session:
+            sources = session.scalars(
+                select(CoreWalletDepositSource.SourceTxHash).where(
+                    (CoreWalletDepositSource.SubWalletID == sub_wallet_id)
+                    & (CoreWalletDepositSource.CurrencyID == currency_id)
+                    & CoreWalletDepositSource.SourceTxHash.in_(tx_hashes)
+                )
+            ).all()
+            deposits = session.scalars(
+                select(CoreWalletTransaction.TxHash).where(
+                    (CoreWalletTransaction.SubWalletID == sub_wallet_id)
+                    & (CoreWalletTransaction.CurrencyID == currency_id)
+                    & CoreWalletTransaction.TxHash.in_(tx_hashes)
+                )
+            ).all()
+            return set(sources) | set(deposits)
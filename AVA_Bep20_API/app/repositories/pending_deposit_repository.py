@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from app.db.session import SessionLocal
+from app.models.core_wallet_pending_deposit import (
+    CoreWalletPendingDeposit,
+    PendingDepositStatusEnum,
+)
+
+
+class PendingDepositRepository:
+    def __init__(self):
+        """
+        初始化 Repository
+        """
+
+    def add_pending(self, records: list[dict]) -> list[dict]:
+        """
+        新增 mempool 中偵測到的入金，已存在的記錄略過
+
+        :param records: 含 tx_hash、to_address、currency_id、amount 的 dict 列表
+        :return: 實際新增的記錄
+        """
+        if not records:
+            return []
+        now = datetime.utcnow()
+        with SessionLocal() as session:
+            try:
+                existing = set(
+                    session.execute(
+                        select(
+                            CoreWalletPendingDeposit.TxHash,
+                            CoreWalletPendingDeposit.ToAddress,
+                            CoreWalletPendingDeposit.CurrencyID,
+                        ).where(
+                            CoreWalletPendingDeposit.TxHash.in_(
+                                {record["tx_hash"] for record in records}
+                            )
+                        )
+                    ).all()
+                )
+                added = [
+                    record
+                    for record in records
+                    if (record["tx_hash"], record["to_address"], record["currency_id"])
+                    not in existing
+                ]
+                session.add_all(
+                    CoreWalletPendingDeposit(
+                        TxHash=record["tx_hash"],
+                        ToAddress=record["to_address"],
+                        CurrencyID=record["currency_id"],
+                        Amount=record["amount"],
+                        Status=PendingDepositStatusEnum.pending,
+                        SeenTime=now,
+                        UpdatedTime=now,
+                    )
+                    for record in added
+                )
+                session.commit()
+                return added
+            except IntegrityError:
+                # 區塊監聽或其他實例同時寫入，視為已存在
+                session.rollback()
+                return []
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def mark_mined(self, tx_hashes: list[str], block_number: int):
+        """
+        同一區塊內的交易已上鏈：pending -> mined
+        """
+        self._update_status(
+            tx_hashes,
+            PendingDepositStatusEnum.mined,
+            [PendingDepositStatusEnum.pending, PendingDepositStatusEnum.dropped],
+            BlockNumber=block_number,
+        )
+
+    def mark_credited(self, tx_hashes: list[str]):
+        """
+        入金已歸集並入帳：pending / mined -> credited
+        """
+        self._update_status(
+            tx_hashes,
+            PendingDepositStatusEnum.credited,
+            [PendingDepositStatusEnum.pending, PendingDepositStatusEnum.mined],
+        )
+
+    def drop_expired(self, ttl_seconds: int) -> int:
+        """
+        超過 ttl_seconds 仍未上鏈的記錄標記為 dropped
+
+        :return: 標記的筆數
+        """
+        now = datetime.utcnow()
+        with SessionLocal() as session:
+            try:
+                result = session.execute(
+                    update(CoreWalletPendingDeposit)
+                    .where(
+                        (
+                            CoreWalletPendingDeposit.Status
+                            == PendingDepositStatusEnum.pending
+                        )
+                        & (
+                            CoreWalletPendingDeposit.SeenTime
+                            < now - timedelta(seconds=ttl_seconds)
+                        )
+                    )
+                    .values(Status=PendingDepositStatusEnum.dropped, UpdatedTime=now)
+                )
+                session.commit()
+                return result.rowcount
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def get_by_address(
+        self, to_address: str, statuses: list[PendingDepositStatusEnum]
+    ) -> list[CoreWalletPendingDeposit]:
+        """
+        查詢子錢包指定狀態的待入帳入金
+        """
+        with SessionLocal() as session:
+            return (
+                session.query(CoreWalletPendingDeposit)
+                .filter(
+                    (CoreWalletPendingDeposit.ToAddress == to_address.lower())
+                    & CoreWalletPendingDeposit.Status.in_(statuses)
+                )
+                .order_by(CoreWalletPendingDeposit.PendingID)
+                .all()
+            )
+
+    def _update_status(
+        self,
+        tx_hashes: list[str],
+        status: PendingDepositStatusEnum,
+        from_statuses: list[PendingDepositStatusEnum],
+        **values,
+    ):
+        now = datetime.utcnow()
+        with SessionLocal() as session:
+            try:
+                session.execute(
+                    update(CoreWalletPendingDeposit)
+                    .where(
+                        CoreWalletPendingDeposit.TxHash.in_(tx_hashes)
+                        & CoreWalletPendingDeposit.Status.in_(from_statuses)
+                    )
+                    .values(Status=status, UpdatedTime=now, **values)
+                )
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
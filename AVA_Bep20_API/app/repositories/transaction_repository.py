@@ -1,13 +1,33 @@
+from datetime import datetime
+from typing import Iterator, Optional
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.sql import text
 from app.db.session import SessionLocal
 from decimal import Decimal
+from app.core.config import settings
+from app.models.core_wallet_balance import CoreWalletBalance
 from app.models.core_wallet_transaction import (
     CoreWalletTransaction,
     TransactionTypeEnum,
 )
 
+# 交易記錄查詢只選取需要的欄位，回傳 tuple 而非 ORM 物件
+TRANSACTION_HISTORY_COLUMNS = (
+    CoreWalletTransaction.TransactionID,
+    CoreWalletTransaction.SubWalletID,
+    CoreWalletTransaction.CurrencyID,
+    CoreWalletTransaction.RecipientAddress,
+    CoreWalletTransaction.Amount,
+    CoreWalletTransaction.GasUsed,
+    CoreWalletTransaction.TxHash,
+    CoreWalletTransaction.TransactionType,
+    CoreWalletTransaction.Success,
+    CoreWalletTransaction.CreateTime,
+)
+TRANSACTION_HISTORY_FIELDS = tuple(column.key for column in TRANSACTION_HISTORY_COLUMNS)
+
 
 class TransactionRepository:
     def __init__(self):
@@ -26,43 +46,59 @@ class TransactionRepository:
                 .first()
             )
 
-    def get_deposit_transactions_by_wallet(
-        self, sub_wallet_id: int
-    ) -> list[CoreWalletTransaction]:
+    def get_transaction_rows_by_wallet(
+        self, sub_wallet_id: int, transaction_type: TransactionTypeEnum
+    ) -> list[tuple]:
         """
-        根據 SubWalletID 查詢入金交易記錄
+        根據 SubWalletID 與交易類型查詢交易記錄，欄位順序同 TRANSACTION_HISTORY_FIELDS
         """
         with SessionLocal() as session:
-            return (
-                session.query(CoreWalletTransaction)
-                .filter(
+            return session.execute(
+                select(*TRANSACTION_HISTORY_COLUMNS)
+                .where(
                     (CoreWalletTransaction.SubWalletID == sub_wallet_id)
-                    & (
-                        CoreWalletTransaction.TransactionType
-                        == TransactionTypeEnum.deposit
-                    )
+                    & (CoreWalletTransaction.TransactionType == transaction_type)
                 )
-                .all()
-            )
+                .order_by(CoreWalletTransaction.TransactionID)
+            ).all()
 
-    def get_withdraw_transactions_by_wallet(
-        self, sub_wallet_id: int
-    ) -> list[CoreWalletTransaction]:
+    def stream_transaction_rows(
+        self,
+        sub_wallet_id: Optional[int] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        transaction_type: Optional[TransactionTypeEnum] = None,
+        batch_size: int = None,
+    ) -> Iterator[list[tuple]]:
         """
-        根據 SubWalletID 查詢提領交易記錄
+        以 server-side cursor 分批讀取交易記錄，欄位順序同 TRANSACTION_HISTORY_FIELDS
+
+        每次只保留一批 batch_size 筆在記憶體中，與總筆數無關；
+        session 在迭代期間保持開啟，迭代結束或 generator 關閉時釋放。
+
+        :param sub_wallet_id: 子錢包 ID，None 表示全平台
+        :param start_time: 起始時間（含）
+        :param end_time: 結束時間（不含）
         """
+        conditions = []
+        if sub_wallet_id is not None:
+            conditions.append(CoreWalletTransaction.SubWalletID == sub_wallet_id)
+        if start_time is not None:
+            conditions.append(CoreWalletTransaction.CreateTime >= start_time)
+        if end_time is not None:
+            conditions.append(CoreWalletTransaction.CreateTime < end_time)
+        if transaction_type is not None:
+            conditions.append(CoreWalletTransaction.TransactionType == transaction_type)
+
         with SessionLocal() as session:
-            return (
-                session.query(CoreWalletTransaction)
-                .filter(
-                    (CoreWalletTransaction.SubWalletID == sub_wallet_id)
-                    & (
-                        CoreWalletTransaction.TransactionType
-                        == TransactionTypeEnum.withdrawal
-                    )
-                )
-                .all()
+            result = session.execute(
+                select(*TRANSACTION_HISTORY_COLUMNS)
+                .where(*conditions)
+                .order_by(CoreWalletTransaction.TransactionID)
+                .execution_options(yield_per=batch_size or settings.EXPORT_BATCH_SIZE)
             )
+            for partition in result.partitions():
+                yield partition
 
     def get_recent_transactions(self, limit: int = 10) -> list[CoreWalletTransaction]:
         """
@@ -76,6 +112,30 @@ class TransactionRepository:
                 .all()
             )
 
+    def get_recent_tx_hashes(
+        self,
+        transaction_type: TransactionTypeEnum,
+        currency_id: int,
+        limit: int,
+    ) -> list[str]:
+        """
+        查詢指定類型與幣種最近成功交易的 TxHash
+        """
+        with SessionLocal() as session:
+            return list(
+                session.scalars(
+                    select(CoreWalletTransaction.TxHash)
+                    .where(
+                        (CoreWalletTransaction.TransactionType == transaction_type)
+                        & (CoreWalletTransaction.CurrencyID == currency_id)
+                        & CoreWalletTransaction.Success.is_(True)
+                        & (CoreWalletTransaction.TxHash.isnot(None))
+                    )
+                    .order_by(CoreWalletTransaction.CreateTime.desc())
+                    .limit(limit)
+                )
+            )
+
     def execute_withdraw_transaction(
         self,
         from_sub_wallet_id: int,
@@ -92,8 +152,7 @@ class TransactionRepository:
         with SessionLocal() as session:
             try:
                 # 建立存儲程序的執行 SQL
-                sql = text(
-                    """
+                sql = text("""
                     CALL core_wallet_WithdrawTransaction(
                         :from_sub_wallet_id,
                         :currency_id,
@@ -103,8 +162,7 @@ class TransactionRepository:
                         :fee,
                         :tx_hash
                     )
-                    """
-                )
+                    """)
                 # 執行存儲程序
                 session.execute(
                     sql,
@@ -125,3 +183,65 @@ class TransactionRepository:
                 session.rollback()
                 print(f"Error occurred while executing withdraw transaction: {e}")
                 raise e
+
+    def finalize_withdraw_transaction(
+        self,
+        from_sub_wallet_id: int,
+        currency_id: int,
+        to_address: str,
+        amount: Decimal,
+        gas_used: Decimal,
+        fee: Decimal,
+        tx_hash: str,
+    ):
+        """
+        完成已預留餘額（WalletRepository.reserve_balance）的提領
+
+        同一個交易中將預留金額移回 AvailableBalance，再呼叫 core_wallet_WithdrawTransaction
+        扣款與寫入交易記錄；更新後的餘額列在提交前保持鎖定，其他提領無法動用這筆金額。
+        """
+        with SessionLocal() as session:
+            try:
+                result = session.execute(
+                    update(CoreWalletBalance)
+                    .where(
+                        (CoreWalletBalance.SubWalletID == from_sub_wallet_id)
+                        & (CoreWalletBalance.CurrencyID == currency_id)
+                        & (CoreWalletBalance.LockedBalance >= amount)
+                    )
+                    .values(
+                        AvailableBalance=CoreWalletBalance.AvailableBalance + amount,
+                        LockedBalance=CoreWalletBalance.LockedBalance - amount,
+                    )
+                )
+                if result.rowcount != 1:
+                    raise ValueError(
+                        f"No reserved balance of {amount} for "
+                        f"SubWalletID={from_sub_wallet_id}, CurrencyID={currency_id}"
+                    )
+                session.execute(
+                    text("""
+                    CALL core_wallet_WithdrawTransaction(
+                        :from_sub_wallet_id,
+                        :currency_id,
+                        :to_address,
+                        :amount,
+                        :gas,
+                        :fee,
+                        :tx_hash
+                    )
+                    """),
+                    {
+                        "from_sub_wallet_id": from_sub_wallet_id,
+                        "currency_id": currency_id,
+                        "to_address": to_address,
+                        "amount": amount,
+                        "gas": gas_used,
+                        "fee": fee,
+                        "tx_hash": tx_hash,
+                    },
+                )
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
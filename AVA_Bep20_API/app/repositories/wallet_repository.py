@@ -1,3 +1,7 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterator
+from sqlalchemy import select, func, update
 from sqlalchemy.orm import Session
 from app.models.core_wallet_sub_wallet import CoreWalletSubWallet
 from app.models.core_wallet_balance import CoreWalletBalance
@@ -76,11 +80,132 @@ class WalletRepository:
                 return [
                     {
                         "CurrencyID": balance.CurrencyID,
-                        "AvailableBalance": float(balance.AvailableBalance),
-                        "LockedBalance": float(balance.LockedBalance),
+                        "AvailableBalance": balance.AvailableBalance,
+                        "LockedBalance": balance.LockedBalance,
                         "LastUpdatedTime": balance.LastUpdatedTime,
                     }
                     for balance in balances
                 ]
             except Exception as e:
                 raise e
+
+    def reserve_balance(
+        self, sub_wallet_id: int, currency_id: int, amount: Decimal
+    ) -> bool:
+        """
+        預留餘額：以單一條件式 UPDATE 將 amount 從 AvailableBalance 移到 LockedBalance
+
+        餘額檢查與扣除在同一個語句中完成，同時提領不會超額扣款。
+
+        :return: 可用餘額不足（或沒有該幣種餘額）時回傳 False
+        """
+        return self._move_balance(sub_wallet_id, currency_id, amount) == 1
+
+    def release_balance(self, sub_wallet_id: int, currency_id: int, amount: Decimal):
+        """
+        取消預留：將 amount 從 LockedBalance 移回 AvailableBalance（提領未送出時）
+        """
+        if self._move_balance(sub_wallet_id, currency_id, -amount) != 1:
+            raise ValueError(
+                f"Locked balance of SubWalletID={sub_wallet_id}, "
+                f"CurrencyID={currency_id} is less than {amount}"
+            )
+
+    def _move_balance(
+        self, sub_wallet_id: int, currency_id: int, amount: Decimal
+    ) -> int:
+        # amount 為正數時 Available -> Locked，負數時 Locked -> Available
+        condition = (
+            CoreWalletBalance.AvailableBalance >= amount
+            if amount > 0
+            else CoreWalletBalance.LockedBalance >= -amount
+        )
+        with SessionLocal() as session:
+            try:
+                result = session.execute(
+                    update(CoreWalletBalance)
+                    .where(
+                        (CoreWalletBalance.SubWalletID == sub_wallet_id)
+                        & (CoreWalletBalance.CurrencyID == currency_id)
+                        & condition
+                    )
+                    .values(
+                        AvailableBalance=CoreWalletBalance.AvailableBalance - amount,
+                        LockedBalance=CoreWalletBalance.LockedBalance + amount,
+                        LastUpdatedTime=datetime.now(),
+                    )
+                )
+                session.commit()
+                return result.rowcount
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def iter_sub_wallet_batches(
+        self, after_id: int = 0, batch_size: int = 1000
+    ) -> Iterator[list[tuple[int, str]]]:
+        """
+        依 SubWalletID 分批列出子錢包 (SubWalletID, SubWalletAddress)
+
+        以 keyset 分頁（SubWalletID > 上一批最後一筆）查詢，每批獨立 session，
+        適合百萬筆等級的全表掃描，並可從任一 SubWalletID 之後繼續。
+        """
+        last_id = after_id
+        while True:
+            with SessionLocal() as session:
+                rows = session.execute(
+                    select(
+                        CoreWalletSubWallet.SubWalletID,
+                        CoreWalletSubWallet.SubWalletAddress,
+                    )
+                    .where(CoreWalletSubWallet.SubWalletID > last_id)
+                    .order_by(CoreWalletSubWallet.SubWalletID)
+                    .limit(batch_size)
+                ).all()
+            if not rows:
+                return
+            yield [tuple(row) for row in rows]
+            last_id = rows[-1][0]
+
+    def get_balances_by_wallets(
+        self, sub_wallet_ids: list[int]
+    ) -> dict[tuple[int, int], tuple[Decimal, Decimal]]:
+        """
+        批次查詢多個子錢包的系統餘額
+
+        :return: (SubWalletID, CurrencyID) -> (AvailableBalance, LockedBalance)
+        """
+        if not sub_wallet_ids:
+            return {}
+        with SessionLocal() as session:
+            rows = session.execute(
+                select(
+                    CoreWalletBalance.SubWalletID,
+                    CoreWalletBalance.CurrencyID,
+                    CoreWalletBalance.AvailableBalance,
+                    CoreWalletBalance.LockedBalance,
+                ).where(CoreWalletBalance.SubWalletID.in_(sub_wallet_ids))
+            ).all()
+            return {
+                (sub_wallet_id, currency_id): (available, locked)
+                for sub_wallet_id, currency_id, available, locked in rows
+            }
+
+    def get_total_balances(self) -> dict[int, tuple[Decimal, Decimal]]:
+        """
+        全平台各幣種的系統餘額合計
+
+        :return: CurrencyID -> (AvailableBalance 合計, LockedBalance 合計)
+        """
+        with SessionLocal() as session:
+            rows = session.execute(
+                select(
+                    CoreWalletBalance.CurrencyID,
+                    func.sum(CoreWalletBalance.AvailableBalance),
+                    func.sum(CoreWalletBalance.LockedBalance),
+                ).group_by(CoreWalletBalance.CurrencyID)
+            ).all()
+            return {
+                currency_id: (Decimal(available or 0), Decimal(locked or 0))
+                for currency_id, available, locked in rows
+            }
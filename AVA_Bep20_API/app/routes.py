@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from app.api.v1.wallet_controller import wallet_router
 from app.api.v1.transaction_controller import transaction_router
+from app.api.health_controller import health_router
 
 
 def setup_routes(app: FastAPI):
@@ -11,3 +12,5 @@ def setup_routes(app: FastAPI):
     app.include_router(
         transaction_router, prefix="/api/v1/transaction", tags=["transaction"]
     )
+    # 負載平衡器探測用，不需驗證
+    app.include_router(health_router, tags=["health"])
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+from typing import Optional
+from decimal import Decimal
+
+
+@dataclass(frozen=True)
+class TokenInfo:
+    """
+    系統支援的幣種（對應 core_wallet_currency）
+    """
+
+    currency_id: int
+    symbol: str
+    contract_address: Optional[str]  # 小寫合約地址，None 表示原生幣（BNB）
+    decimals: int
+    deposit_limit: Decimal  # 最低入金限制
+    deposit_fee: Decimal  # 入金手續費
+
+    @property
+    def is_native(self) -> bool:
+        return self.contract_address is None
+
+    def from_base_units(self, value: int) -> Decimal:
+        """
+        最小單位轉換為幣種單位
+        """
+        return Decimal(value).scaleb(-self.decimals)
+
+    def to_base_units(self, amount: Decimal) -> int:
+        """
+        幣種單位轉換為最小單位
+        """
+        return int(Decimal(amount).scaleb(self.decimals))
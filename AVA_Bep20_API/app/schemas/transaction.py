@@ -1,6 +1,9 @@
 from dataclasses import dataclass
 from typing import Optional
 from decimal import Decimal
+from datetime import datetime
+from pydantic import BaseModel
+from app.models.core_wallet_transaction import TransactionTypeEnum
 
 
 @dataclass
@@ -16,3 +19,35 @@ class TransactionResult:
 
     class Config:
         smart_union = True  # 自動嘗試轉換兼容類型
+
+
+@dataclass
+class DetectedDeposit:
+    """
+    監聽到、尚未入帳的入金
+    """
+
+    tx_hash: str
+    to_address: str
+    currency_id: int  # 對應 core_wallet_currency
+    amount: int  # 轉帳金額（最小單位）
+    block_number: int
+    detected_at: float  # time.perf_counter()
+    sweep_attempts: int = 0  # 歸集轉帳失敗的次數
+
+
+class TransactionRecord(BaseModel):
+    """
+    交易記錄回應（對應 core_wallet_transaction 的欄位）
+    """
+
+    TransactionID: int
+    SubWalletID: int
+    CurrencyID: int
+    RecipientAddress: Optional[str] = None
+    Amount: Decimal
+    GasUsed: Optional[Decimal] = None
+    TxHash: Optional[str] = None
+    TransactionType: TransactionTypeEnum
+    Success: bool
+    CreateTime: datetime
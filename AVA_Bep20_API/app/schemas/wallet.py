@@ -2,6 +2,7 @@ from pydantic import BaseModel
 from decimal import Decimal
 from datetime import datetime
 from dataclasses import dataclass
+from typing import Optional
 
 
 class WalletCreate(BaseModel):
@@ -25,3 +26,15 @@ class WalletBalanceFromSystem(BaseModel):
     AvailableBalance: Decimal
     LockedBalance: Decimal
     LastUpdatedTime: datetime
+
+
+class PendingDeposit(BaseModel):
+    TxHash: str
+    CurrencyID: int
+    Amount: Decimal
+    Status: str
+    BlockNumber: Optional[int] = None
+    SeenTime: datetime
+
+    class Config:
+        from_attributes = True
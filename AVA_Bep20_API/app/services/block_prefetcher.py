@@ -0,0 +1,60 @@
+import asyncio
+from typing import Any, Callable
+from app.core.rpc_tracing import rpc_trace
+
+
+class BlockPrefetcher:
+    """
+    預先抓取後續區塊，讓節點延遲與目前區塊的處理時間重疊
+
+    - 處理區塊 N 時，背景同時抓取 N+1 .. N+window-1（不超過鏈頭）
+    - 只有被取用後才會排程新的區塊，記憶體中最多保留 window 個區塊（back-pressure）
+    - 區塊依序取出，處理與檢查點仍嚴格按照區塊順序
+    """
+
+    def __init__(self, fetch: Callable[[int], Any], window: int):
+        """
+        :param fetch: 同步抓取單一區塊的函式，在 thread 中執行
+        :param window: 同時抓取中或已抓取待處理的區塊數量上限
+        """
+        self.fetch = fetch
+        self.window = max(1, window)
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def schedule(self, block_number: int, head_block: int):
+        """
+        排程 block_number 起、不超過鏈頭的 window 個區塊
+        """
+        last_block = min(block_number + self.window - 1, head_block)
+        for number in range(block_number, last_block + 1):
+            if number not in self._tasks:
+                self._tasks[number] = asyncio.create_task(self._fetch(number))
+
+    async def get(self, block_number: int):
+        """
+        取得指定區塊（需先 schedule），抓取失敗時拋出原本的例外
+        """
+        task = self._tasks.pop(block_number, None)
+        if task is None:
+            task = asyncio.create_task(self._fetch(block_number))
+        return await task
+
+    def reset(self):
+        """
+        捨棄所有預抓的區塊，回溯重掃或重組後呼叫，避免使用舊分叉上的區塊
+        """
+        for task in self._tasks.values():
+            if task.done():
+                if not task.cancelled():
+                    task.exception()  # 取出例外，避免 "never retrieved" 警告
+            else:
+                task.cancel()
+        self._tasks.clear()
+
+    async def _fetch(self, block_number: int):
+        # 預抓在獨立的 trace 中記錄，不計入 monitor.block 的 RPC 預算
+        with rpc_trace("monitor.fetch", detail=str(block_number)):
+            return await asyncio.to_thread(self.fetch, block_number)
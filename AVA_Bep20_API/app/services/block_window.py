@@ -0,0 +1,53 @@
+from collections import deque
+from typing import Optional
+
+
+class BlockHashWindow:
+    """
+    最近已處理區塊的 hash 環狀緩衝區，用於偵測鏈重組（reorg）
+
+    只保存 (區塊號, hash)，新區塊的 parentHash 與緩衝區最後一個 hash 不符即代表發生重組。
+    """
+
+    def __init__(self, size: int):
+        self._blocks: deque[tuple[int, bytes]] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    @property
+    def oldest(self) -> Optional[int]:
+        return self._blocks[0][0] if self._blocks else None
+
+    @property
+    def latest(self) -> Optional[int]:
+        return self._blocks[-1][0] if self._blocks else None
+
+    def get(self, block_number: int) -> Optional[bytes]:
+        if not self._blocks:
+            return None
+        index = block_number - self._blocks[0][0]
+        if 0 <= index < len(self._blocks):
+            return self._blocks[index][1]
+        return None
+
+    def extends(self, block_number: int, parent_hash: bytes) -> bool:
+        """
+        新區塊是否接續在緩衝區的最後一個區塊之後（緩衝區為空或不連續時視為接續）
+        """
+        if not self._blocks or self._blocks[-1][0] != block_number - 1:
+            return True
+        return self._blocks[-1][1] == parent_hash
+
+    def push(self, block_number: int, block_hash: bytes):
+        # 重新處理已存在的區塊時（回溯重掃），先移除該區塊之後的記錄
+        if self._blocks and block_number <= self._blocks[-1][0]:
+            self.truncate(block_number - 1)
+        self._blocks.append((block_number, block_hash))
+
+    def truncate(self, last_block: int):
+        """
+        移除 last_block 之後的所有記錄
+        """
+        while self._blocks and self._blocks[-1][0] > last_block:
+            self._blocks.pop()
@@ -0,0 +1,156 @@
+import asyncio
+import os
+import socket
+import time
+from typing import Optional
+from app.core.config import settings
+from app.core.logger import logger
+from app.repositories.lease_repository import LeaseRepository
+
+
+def default_instance_id() -> str:
+    """
+    實例識別碼：MONITOR_INSTANCE_ID，未設定時使用 hostname:pid
+    """
+    return settings.MONITOR_INSTANCE_ID or f"{socket.gethostname()}:{os.getpid()}"
+
+
+class MonitorCoordinator:
+    """
+    以資料庫租約協調多個 worker / 實例的區塊監聽
+
+    - 預設只有一個分片：持有租約的實例成為 leader，其餘實例待命
+    - MONITOR_SHARD_COUNT > 1 時，依地址雜湊將監聽地址分到各分片，
+      每個實例只處理自己持有分片內的地址，入金與歸集不會重複
+    - leader 停止續約超過 MONITOR_LEASE_TTL 秒後，其他實例自動接手，
+      並從租約記錄的區塊檢查點繼續監聽
+    """
+
+    def __init__(
+        self,
+        lease_repository: LeaseRepository,
+        shard_count: int = None,
+        lease_ttl: int = None,
+        max_shards: int = None,
+        instance_id: str = None,
+    ):
+        self.lease_repository = lease_repository
+        self.shard_count = max(1, shard_count or settings.MONITOR_SHARD_COUNT)
+        self.lease_ttl = lease_ttl or settings.MONITOR_LEASE_TTL
+        max_shards = (
+            settings.MONITOR_MAX_SHARDS_PER_INSTANCE
+            if max_shards is None
+            else max_shards
+        )
+        self.max_shards = max_shards or self.shard_count
+        self.instance_id = instance_id or default_instance_id()
+        # 續約間隔取 TTL 的三分之一，容許連續失敗一次仍不會失去租約
+        self.renew_interval = max(1.0, self.lease_ttl / 3)
+
+        self.owned_shards: frozenset[int] = frozenset()
+        self.checkpoint_block: Optional[int] = None  # 本實例已處理完成的最後區塊
+        self._last_renewed = 0.0
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self.owned_shards)
+
+    def lease_name(self, shard: int) -> str:
+        return f"monitor:{shard}/{self.shard_count}"
+
+    def shard_of(self, address: str) -> int:
+        """
+        地址所屬的分片（地址本身即為雜湊值，取尾端即可均勻分布）
+        """
+        if self.shard_count == 1:
+            return 0
+        return int(address[-8:], 16) % self.shard_count
+
+    def owns_address(self, address: str) -> bool:
+        return self.shard_of(address) in self.owned_shards
+
+    def get_resume_block(self) -> Optional[int]:
+        """
+        接手時應從哪個區塊繼續：持有分片中最舊的檢查點之後
+        """
+        checkpoints = [
+            self.lease_repository.get_checkpoint(self.lease_name(shard))
+            for shard in self.owned_shards
+        ]
+        checkpoints = [block for block in checkpoints if block is not None]
+        return min(checkpoints) + 1 if checkpoints else None
+
+    async def wait_until_active(self):
+        while not self.is_active:
+            await asyncio.sleep(1)
+
+    async def run(self):
+        """
+        定期續約並嘗試取得空閒或過期的分片
+        """
+        logger.info(
+            f"Monitor coordinator started: instance={self.instance_id}, "
+            f"shards={self.shard_count}, ttl={self.lease_ttl}s"
+        )
+        while True:
+            try:
+                owned = await asyncio.to_thread(self._sync_leases)
+                self._last_renewed = time.monotonic()
+                self._set_owned(owned)
+            except Exception as e:
+                logger.error(f"Error renewing monitor leases: {e}")
+                # 無法續約時，在租約過期前主動停止，避免與新 leader 同時運作
+                if time.monotonic() - self._last_renewed > self.lease_ttl * 0.8:
+                    self._set_owned(frozenset())
+            await asyncio.sleep(self.renew_interval)
+
+    def _sync_leases(self) -> frozenset[int]:
+        owned = set()
+        for shard in self.owned_shards:
+            name = self.lease_name(shard)
+            if self.lease_repository.try_acquire(
+                name, self.instance_id, self.lease_ttl
+            ):
+                owned.add(shard)
+                if self.checkpoint_block is not None:
+                    self.lease_repository.save_checkpoint(
+                        name, self.instance_id, self.checkpoint_block
+                    )
+
+        for shard in range(self.shard_count):
+            if len(owned) >= self.max_shards:
+                break
+            if shard in owned:
+                continue
+            if self.lease_repository.try_acquire(
+                self.lease_name(shard), self.instance_id, self.lease_ttl
+            ):
+                owned.add(shard)
+        return frozenset(owned)
+
+    def _set_owned(self, owned: frozenset[int]):
+        if owned == self.owned_shards:
+            return
+        gained = owned - self.owned_shards
+        lost = self.owned_shards - owned
+        self.owned_shards = owned
+        if gained:
+            logger.info(f"Monitor shards acquired: {sorted(gained)}")
+        if lost:
+            logger.warning(f"Monitor shards lost: {sorted(lost)}")
+
+    def release_all(self):
+        """
+        關閉時釋放持有的租約並寫入最後的檢查點
+        """
+        for shard in self.owned_shards:
+            name = self.lease_name(shard)
+            try:
+                if self.checkpoint_block is not None:
+                    self.lease_repository.save_checkpoint(
+                        name, self.instance_id, self.checkpoint_block
+                    )
+                self.lease_repository.release(name, self.instance_id)
+            except Exception as e:
+                logger.error(f"Failed to release monitor lease {name}: {e}")
+        self.owned_shards = frozenset()
@@ -0,0 +1,155 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from app.core.config import settings
+from app.core.logger import logger
+
+
+@dataclass(frozen=True)
+class WalletEvent:
+    id: int  # process 內遞增，作為 SSE 的 Last-Event-ID 與長輪詢的 cursor
+    type: str  # deposit / pending_deposit / withdrawal
+    data: dict[str, Any]
+    created_at: float = field(default_factory=time.time)
+
+
+class Subscription:
+    """
+    單一連線的事件佇列；佇列滿時標記為 overflowed，由連線端關閉後讓用戶端重連補送
+    """
+
+    def __init__(self, sub_wallet_id: int, max_size: int):
+        self.sub_wallet_id = sub_wallet_id
+        self.queue: asyncio.Queue[WalletEvent] = asyncio.Queue(max_size)
+        self.overflowed = False
+
+    def put(self, event: WalletEvent):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class ConnectionLimitExceeded(Exception):
+    pass
+
+
+class EventBus:
+    """
+    process 內的子錢包事件 pub/sub
+
+    - publish 可在任何 thread 呼叫（同步端點在 threadpool 中執行），
+      事件經 call_soon_threadsafe 交給事件迴圈分送，佇列只在事件迴圈中操作
+    - 每個子錢包保留最近 EVENT_HISTORY_SIZE 則事件，斷線重連或長輪詢可依 cursor 補送
+    - 同時連線數上限為 EVENT_STREAM_MAX_CONNECTIONS
+    """
+
+    def __init__(self, max_connections: int = None, history_size: int = None):
+        self.max_connections = max_connections or settings.EVENT_STREAM_MAX_CONNECTIONS
+        self.history_size = history_size or settings.EVENT_HISTORY_SIZE
+        # 以啟動時間（毫秒）為起點，重啟後的事件 id 仍大於用戶端手上的 cursor
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._lock = threading.Lock()
+        self._history: dict[int, deque[WalletEvent]] = {}
+        self._subscriptions: dict[int, set[Subscription]] = {}
+        self._connections = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def connections(self) -> int:
+        return self._connections
+
+    def publish(self, sub_wallet_id: int, event_type: str, data: dict[str, Any]):
+        with self._lock:
+            event = WalletEvent(next(self._ids), event_type, data)
+            self._history.setdefault(
+                sub_wallet_id, deque(maxlen=self.history_size)
+            ).append(event)
+            loop = self._loop
+
+        if loop is None or not self._subscriptions.get(sub_wallet_id):
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(sub_wallet_id, event)
+        else:
+            try:
+                loop.call_soon_threadsafe(self._deliver, sub_wallet_id, event)
+            except RuntimeError:
+                # 事件迴圈已關閉（應用程式結束中）
+                pass
+
+    def _deliver(self, sub_wallet_id: int, event: WalletEvent):
+        for subscription in tuple(self._subscriptions.get(sub_wallet_id, ())):
+            subscription.put(event)
+
+    def get_history(self, sub_wallet_id: int, after_id: int = 0) -> list[WalletEvent]:
+        with self._lock:
+            history = tuple(self._history.get(sub_wallet_id, ()))
+        return [event for event in history if event.id > after_id]
+
+    def subscribe(self, sub_wallet_id: int, max_size: int = 100) -> Subscription:
+        """
+        建立訂閱（必須在事件迴圈中呼叫），超過連線數上限時拋出 ConnectionLimitExceeded
+        """
+        if self._connections >= self.max_connections:
+            raise ConnectionLimitExceeded(
+                f"Event stream connection limit reached ({self.max_connections})"
+            )
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(sub_wallet_id, max_size)
+        self._subscriptions.setdefault(sub_wallet_id, set()).add(subscription)
+        self._connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.sub_wallet_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.sub_wallet_id]
+        self._connections -= 1
+
+    async def wait_events(
+        self, sub_wallet_id: int, after_id: int, timeout: float
+    ) -> list[WalletEvent]:
+        """
+        長輪詢：回傳 cursor 之後的事件，沒有新事件時最多等待 timeout 秒
+        """
+        events = self.get_history(sub_wallet_id, after_id)
+        if events:
+            return events
+        # 先訂閱再檢查一次歷史，避免兩者之間發布的事件遺失
+        subscription = self.subscribe(sub_wallet_id)
+        try:
+            events = self.get_history(sub_wallet_id, after_id)
+            if events:
+                return events
+            try:
+                await asyncio.wait_for(subscription.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return []
+            return self.get_history(sub_wallet_id, after_id)
+        finally:
+            self.unsubscribe(subscription)
+
+
+def publish_event(sub_wallet_id: int, event_type: str, data: dict[str, Any]):
+    """
+    發布事件；推播失敗不影響入金與提領流程
+    """
+    try:
+        event_bus.publish(sub_wallet_id, event_type, data)
+    except Exception as e:
+        logger.error(f"Failed to publish {event_type} event: {e}")
+
+
+event_bus = EventBus()
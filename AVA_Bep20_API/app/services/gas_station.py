@@ -0,0 +1,214 @@
+import asyncio
+import contextvars
+from decimal import Decimal
+from typing import TYPE_CHECKING, Optional
+from app.core.config import settings
+from app.core.logger import logger
+from app.utils.contracts import to_checksum_address
+from app.utils.disperse import Disperse
+from app.utils.transactions import (
+    TransactionStatusUnknown,
+    broadcast,
+    core_wallet_nonces,
+)
+from app.utils.multicall import Multicall
+
+if TYPE_CHECKING:
+    from web3 import Web3
+
+CORE_WALLET_PRIVATE_KEY = settings.CORE_WALLET_PRIVATE_KEY
+BNB_TRANSFER_GAS_LIMIT = 21000  # 標準 BNB 轉帳的 gas limit
+
+
+class GasStation:
+    """
+    歸集前為子錢包補 gas（BNB）
+
+    - ensure_gas 將地址加入佇列，GAS_STATION_BATCH_WINDOW 秒內的請求合併處理：
+      一次 Multicall 查詢餘額，不足的地址以一筆 Disperse.disperseEther 補足；
+      未設定 DISPERSE_CONTRACT_ADDRESS 時改為連續 nonce 一次送出多筆轉帳，再一起等待收據
+    - 記錄每個地址由核心錢包補入、尚未用掉的 gas（gas_float），足夠時不需查詢餘額與補 gas
+    """
+
+    def __init__(
+        self,
+        web3: "Web3",
+        multicall: Multicall,
+        window: float = None,
+        max_batch: int = None,
+        topup_multiplier: Decimal = None,
+    ):
+        self.web3 = web3
+        self.multicall = multicall
+        self.window = (
+            window if window is not None else settings.GAS_STATION_BATCH_WINDOW
+        )
+        self.max_batch = max(1, max_batch or settings.GAS_STATION_MAX_BATCH)
+        self.topup_multiplier = Decimal(
+            topup_multiplier or settings.GAS_STATION_TOPUP_MULTIPLIER
+        )
+        self.disperse = (
+            Disperse(web3, CORE_WALLET_PRIVATE_KEY)
+            if settings.DISPERSE_CONTRACT_ADDRESS
+            else None
+        )
+        # 子錢包地址（小寫）-> 由核心錢包補入、尚未用掉的 BNB（wei）
+        self.gas_float: dict[str, int] = {}
+        self._requests: dict[str, list[tuple[int, asyncio.Future]]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_gas(self, address: str, required_wei: int) -> bool:
+        """
+        確保地址至少有 required_wei 的 BNB 可支付 gas，補 gas 交易確認後才返回
+
+        :return: 補 gas 失敗時回傳 False
+        """
+        address = address.lower()
+        if self.gas_float.get(address, 0) >= required_wei:
+            return True
+        if self._task is None or self._task.done():
+            # 補 gas 迴圈常駐，不沿用第一個請求者（某個歸集）的 RPCTrace
+            self._task = asyncio.create_task(self.run(), context=contextvars.Context())
+        future = asyncio.get_running_loop().create_future()
+        self._requests.setdefault(address, []).append((required_wei, future))
+        self._wakeup.set()
+        return await future
+
+    def record_spent(self, address: str, gas_wei: int):
+        """
+        歸集交易用掉的 gas 從 gas_float 扣除
+        """
+        address = address.lower()
+        if address in self.gas_float:
+            self.gas_float[address] = max(self.gas_float[address] - gas_wei, 0)
+
+    async def run(self):
+        while True:
+            await self._wakeup.wait()
+            # 等待同一時間窗內的其他請求，一起補 gas
+            await asyncio.sleep(self.window)
+            self._wakeup.clear()
+
+            addresses = list(self._requests)[: self.max_batch]
+            batch = {address: self._requests.pop(address) for address in addresses}
+            if self._requests:
+                self._wakeup.set()
+
+            try:
+                results = await asyncio.to_thread(
+                    self.fund,
+                    {
+                        address: max(required for required, _ in waiters)
+                        for address, waiters in batch.items()
+                    },
+                )
+            except Exception as e:
+                logger.error(f"Failed to fund gas for {len(batch)} addresses: {e}")
+                results = {}
+            for address, waiters in batch.items():
+                for _, future in waiters:
+                    if not future.done():
+                        future.set_result(results.get(address, False))
+
+    def fund(self, required: dict[str, int]) -> dict[str, bool]:
+        """
+        查詢餘額並為不足的地址補 gas（在 thread 中執行）
+
+        :param required: 地址 -> 所需 BNB（wei）
+        :return: 地址 -> 是否已有足夠的 gas
+        """
+        addresses = list(required)
+        balances = self.multicall.get_balances(
+            [(None, address) for address in addresses]
+        )
+
+        results = {}
+        topups = {}
+        for address, balance in zip(addresses, balances):
+            if balance is None:
+                logger.error(f"Failed to read BNB balance of {address}")
+                results[address] = False
+            elif balance >= required[address]:
+                results[address] = True
+            else:
+                topups[address] = (
+                    int(required[address] * self.topup_multiplier) - balance
+                )
+        if not topups:
+            return results
+
+        logger.info(
+            f"Funding gas for {len(topups)} addresses: "
+            f"{self.web3.from_wei(sum(topups.values()), 'ether')} BNB"
+        )
+        funded = (
+            self._fund_disperse(topups)
+            if self.disperse is not None and len(topups) > 1
+            else self._fund_pipelined(topups)
+        )
+        for address, value in topups.items():
+            results[address] = address in funded
+            if address in funded:
+                self.gas_float[address] = self.gas_float.get(address, 0) + value
+        return results
+
+    def _fund_disperse(self, topups: dict[str, int]) -> set[str]:
+        try:
+            tx_hash, receipt, _ = self.disperse.disperse_ether(
+                list(topups), list(topups.values())
+            )
+        except Exception as e:
+            logger.error(f"Failed to fund gas with disperseEther: {e}")
+            return set()
+        if receipt.status != 1:
+            logger.error(f"Gas funding {tx_hash} reverted")
+            return set()
+        return set(topups)
+
+    def _fund_pipelined(self, topups: dict[str, int]) -> set[str]:
+        """
+        以連續 nonce 送出所有補 gas 交易後再等待收據，總耗時約為一筆交易的確認時間
+
+        nonce 由 core_wallet_nonces 配發，與同時送出的提領交易不會重複；
+        某筆送出失敗時配發器重新同步，之後的交易不會因 nonce 不連續而卡住。
+        """
+        gas_price = self.web3.eth.gas_price
+        sent = {}
+        for address, value in topups.items():
+            tx = {
+                "to": to_checksum_address(address),
+                "value": value,
+                "gas": BNB_TRANSFER_GAS_LIMIT,
+                "gasPrice": gas_price,
+                "chainId": 56,  # BSC 主網的 Chain ID
+            }
+
+            def sign_and_send(nonce: int, tx: dict = tx):
+                signed_tx = self.web3.eth.account.sign_transaction(
+                    {**tx, "nonce": nonce}, CORE_WALLET_PRIVATE_KEY
+                )
+                return broadcast(self.web3, signed_tx)
+
+            try:
+                sent[address] = core_wallet_nonces.send(self.web3, sign_and_send)
+            except TransactionStatusUnknown as e:
+                # 可能已送出，等待收據確認結果，不另外重送
+                logger.warning(f"Gas funding for {address} has unknown status: {e}")
+                sent[address] = e.tx_hash
+            except Exception as e:
+                logger.error(f"Failed to send gas to {address}: {e}")
+
+        funded = set()
+        for address, tx_hash in sent.items():
+            try:
+                receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
+            except Exception as e:
+                logger.error(
+                    f"Gas funding {self.web3.to_hex(tx_hash)} for {address} "
+                    f"has unknown status: {e}"
+                )
+                continue
+            if receipt.status == 1:
+                funded.add(address)
+        return funded
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+import orjson
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.web3_client import get_web3
+from app.db.session import DB_MAX_OVERFLOW, DB_POOL_SIZE, get_engine
+from app.services.event_bus import event_bus
+from app.services.payout_service import payout_batcher
+
+
+@dataclass
+class HealthSnapshot:
+    """
+    背景檢查的結果；端點直接回傳預先序列化的 body，不在請求中做任何 I/O
+    """
+
+    ready: bool
+    reasons: list[str]
+    # 節點或區塊監聽異常（不影響 API 就緒，/readyz?monitor=1 時才視為未就緒）
+    monitor_reasons: list[str]
+    checked_at: float  # time.monotonic()，判斷快照是否過期
+    body: bytes = field(repr=False)
+
+
+class HealthMonitor:
+    """
+    每 HEALTH_CHECK_INTERVAL 秒檢查一次節點、資料庫、區塊監聽與各佇列狀態
+
+    - 節點與資料庫檢查在 thread 中執行，最多等待 HEALTH_CHECK_TIMEOUT 秒；
+      逾時的檢查不會重複送出，下一輪沿用仍在進行中的檢查
+    - 就緒條件：資料庫可連線、連線池未滿，且快照未過期
+    - 監聽狀態另外回報：背景服務已建立、節點可連線、監聽中時落後不超過
+      HEALTH_MAX_MONITOR_LAG_BLOCKS 個區塊（0 表示不檢查）；節點暫時異常時 API 仍可服務
+    """
+
+    def __init__(self, interval: float = None, timeout: float = None):
+        self.interval = interval or settings.HEALTH_CHECK_INTERVAL
+        self.timeout = timeout or settings.HEALTH_CHECK_TIMEOUT
+        # 背景檢查停止超過此秒數時視為未就緒
+        self.stale_after = self.interval * 3 + self.timeout
+        # 由 lifespan 於背景建立完成後設定；未設定前視為未就緒
+        self.monitor_service = None
+        self.snapshot: Optional[HealthSnapshot] = None
+        self._checks: dict[str, asyncio.Task] = {}
+
+    def is_ready(
+        self, include_monitor: bool = False
+    ) -> tuple[bool, Optional[HealthSnapshot]]:
+        """
+        :param include_monitor: 同時要求節點與區塊監聽正常
+        """
+        snapshot = self.snapshot
+        if snapshot is None:
+            return False, None
+        fresh = time.monotonic() - snapshot.checked_at <= self.stale_after
+        ready = snapshot.ready and not (include_monitor and snapshot.monitor_reasons)
+        return ready and fresh, snapshot
+
+    async def run(self):
+        while True:
+            try:
+                self.snapshot = await self.check()
+            except Exception as e:
+                logger.error(f"Health check failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def check(self) -> HealthSnapshot:
+        node, database = await asyncio.gather(
+            self._run_check("node", check_node),
+            self._run_check("database", check_database),
+        )
+        pool = database_pool_status()
+        monitor = self.monitor_status(node.get("block"))
+        queues = self.queue_depths()
+
+        reasons = []
+        if not database["ok"]:
+            reasons.append(f"database: {database.get('error')}")
+        if pool["checked_out"] >= pool["capacity"]:
+            reasons.append("database pool exhausted")
+
+        monitor_reasons = []
+        if not node["ok"]:
+            monitor_reasons.append(f"node: {node.get('error')}")
+        if self.monitor_service is None:
+            # lifespan 仍在背景建立鏈上服務（或未啟用 lifespan）
+            monitor_reasons.append("background services starting")
+        max_lag = settings.HEALTH_MAX_MONITOR_LAG_BLOCKS
+        if max_lag > 0 and monitor.get("lag_blocks") is not None:
+            if monitor["lag_blocks"] > max_lag:
+                monitor_reasons.append(
+                    f"monitor lag {monitor['lag_blocks']} > {max_lag}"
+                )
+
+        ready = not reasons
+        body = orjson.dumps(
+            {
+                "status": "ready" if ready else "not_ready",
+                "reasons": reasons,
+                "monitor_status": "ok" if not monitor_reasons else "degraded",
+                "monitor_reasons": monitor_reasons,
+                "checked_at": time.time(),
+                "node": node,
+                "database": {**database, "pool": pool},
+                "monitor": monitor,
+                "queues": queues,
+            }
+        )
+        return HealthSnapshot(ready, reasons, monitor_reasons, time.monotonic(), body)
+
+    async def _run_check(self, name: str, func: Callable[[], dict]) -> dict[str, Any]:
+        """
+        在 thread 中執行檢查並量測耗時；上一輪逾時的檢查仍在進行時不重複送出
+        """
+        task = self._checks.get(name)
+        if task is None or task.done():
+            task = self._checks[name] = asyncio.create_task(self._timed(func))
+        done, _ = await asyncio.wait({task}, timeout=self.timeout)
+        if not done:
+            return {"ok": False, "error": f"timed out after {self.timeout}s"}
+        return task.result()
+
+    @staticmethod
+    async def _timed(func: Callable[[], dict]) -> dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(func)
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        return {
+            "ok": True,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            **result,
+        }
+
+    def monitor_status(self, head_block: Optional[int]) -> dict[str, Any]:
+        monitor = self.monitor_service
+        if monitor is None:
+            return {"active": False}
+        coordinator = monitor.coordinator
+        active = coordinator is None or coordinator.is_active
+        processed = monitor.processed_block
+        return {
+            "active": active,
+            "processed_block": processed,
+            # 待命中（未持有租約）或尚未處理任何區塊時不計算落後
+            "lag_blocks": (
+                max(head_block - processed, 0)
+                if active and processed is not None and head_block is not None
+                else None
+            ),
+            "monitored_addresses": len(monitor.monitored_addresses),
+        }
+
+    def queue_depths(self) -> dict[str, int]:
+        depths = {
+            "payouts_queued": payout_batcher.queued,
+            "event_stream_connections": event_bus.connections,
+        }
+        monitor = self.monitor_service
+        if monitor is not None:
+            depths.update(
+                pending_deposits=sum(map(len, monitor.pending_deposits.values())),
+                sweeps_queued=monitor.sweep_scheduler.queued,
+                sweeps_running=monitor.sweep_scheduler.running,
+            )
+        return depths
+
+
+def check_node() -> dict[str, Any]:
+    return {"block": get_web3().eth.block_number}
+
+
+def check_database() -> dict[str, Any]:
+    with get_engine().connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return {}
+
+
+def database_pool_status() -> dict[str, int]:
+    return {
+        "checked_out": get_engine().pool.checkedout(),
+        "capacity": DB_POOL_SIZE + DB_MAX_OVERFLOW,
+    }
+
+
+health_monitor = HealthMonitor()
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from typing import Optional
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+from app.core.config import settings
+from app.core.logger import logger
+from app.repositories.pending_deposit_repository import PendingDepositRepository
+from app.services.monitor_service import MonitorService
+from app.services.event_bus import publish_event
+
+
+class MempoolWatcher:
+    """
+    監看節點 mempool，在交易上鏈前偵測轉入監聽地址的入金並記錄為 pending
+
+    - MEMPOOL_SOURCE="txpool"（預設）：定期讀取 txpool_content，每次輪詢一次呼叫（需節點開放 txpool API）
+    - MEMPOOL_SOURCE="filter"：eth_newPendingTransactionFilter 取得新交易 hash，再逐筆查詢交易；
+      呼叫次數隨 mempool 交易量增加，僅供未開放 txpool API 的節點使用
+
+    比對規則與區塊掃描共用 MonitorService.match_transaction；pending 記錄只供用戶端提前顯示，
+    上鏈後由區塊監聽標記為 mined / credited，逾時未上鏈則標記為 dropped，不影響入帳流程。
+    """
+
+    def __init__(
+        self,
+        monitor_service: MonitorService,
+        repository: PendingDepositRepository,
+        source: str = None,
+        poll_interval: float = None,
+        pending_ttl: int = None,
+    ):
+        self.monitor_service = monitor_service
+        self.web3 = monitor_service.web3
+        self.repository = repository
+        self.source = source or settings.MEMPOOL_SOURCE
+        self.poll_interval = poll_interval or settings.MEMPOOL_POLL_INTERVAL
+        self.pending_ttl = pending_ttl or settings.MEMPOOL_PENDING_TTL
+        self._filter = None
+        # txpool 模式下已比對過的交易 hash，避免每次輪詢重複比對
+        self._seen: dict[str, float] = {}
+        self._last_expired = 0.0
+
+    async def run(self):
+        logger.info(f"Mempool watcher started: source={self.source}")
+        coordinator = self.monitor_service.coordinator
+        while True:
+            try:
+                # 多實例時只由監聽中的實例記錄，地址也只比對本實例持有的分片
+                if coordinator is None or coordinator.is_active:
+                    added = await asyncio.to_thread(self.poll)
+                    if added:
+                        logger.info(f"Mempool deposits seen: {len(added)}")
+                else:
+                    self._filter = None
+            except Exception as e:
+                logger.error(f"Error watching mempool: {e}")
+                # 節點重啟後 filter 會失效，下次重新建立
+                self._filter = None
+            await asyncio.sleep(self.poll_interval)
+
+    def poll(self) -> list[dict]:
+        """
+        讀取一次 mempool 並寫入比對到的入金
+
+        :return: 新增的 pending 入金
+        """
+        transactions = (
+            self._poll_txpool() if self.source == "txpool" else self._poll_filter()
+        )
+        records = []
+        for tx in transactions:
+            match = self.monitor_service.match_transaction(tx)
+            if match is None:
+                continue
+            to_address, token, amount = match
+            records.append(
+                {
+                    "tx_hash": f"0x{tx.hash.hex()}",
+                    "to_address": to_address,
+                    "currency_id": token.currency_id,
+                    "amount": token.from_base_units(amount),
+                }
+            )
+        added = self.repository.add_pending(records)
+        for record in added:
+            self._publish_pending(record)
+
+        now = time.monotonic()
+        if now - self._last_expired > 60:
+            self._last_expired = now
+            dropped = self.repository.drop_expired(self.pending_ttl)
+            if dropped:
+                logger.info(
+                    f"Pending deposits dropped after {self.pending_ttl}s: {dropped}"
+                )
+        return added
+
+    def _publish_pending(self, record: dict):
+        sub_wallet = self.monitor_service.wallet_repository.get_wallet_by_address(
+            record["to_address"]
+        )
+        if sub_wallet:
+            publish_event(sub_wallet.SubWalletID, "pending_deposit", record)
+
+    def _poll_filter(self) -> list:
+        if self._filter is None:
+            self._filter = self.web3.eth.filter("pending")
+        transactions = []
+        for tx_hash in self._filter.get_new_entries():
+            tx = self._get_transaction(tx_hash)
+            if tx is not None:
+                transactions.append(tx)
+        return transactions
+
+    def _get_transaction(self, tx_hash) -> Optional[AttributeDict]:
+        try:
+            return self.web3.eth.get_transaction(tx_hash)
+        except Exception:
+            # 交易可能已被取代或移出 mempool
+            return None
+
+    def _poll_txpool(self) -> list:
+        content = self.web3.manager.request_blocking("txpool_content", [])
+        now = time.monotonic()
+        transactions = []
+        for sender_txs in content.get("pending", {}).values():
+            for raw_tx in sender_txs.values():
+                tx_hash = raw_tx["hash"]
+                if tx_hash in self._seen:
+                    continue
+                self._seen[tx_hash] = now
+                transactions.append(self._normalize_txpool_tx(raw_tx))
+
+        # 只保留 TTL 內看過的 hash，記憶體不隨時間增加
+        expire_before = now - self.pending_ttl
+        self._seen = {h: t for h, t in self._seen.items() if t >= expire_before}
+        return transactions
+
+    @staticmethod
+    def _normalize_txpool_tx(raw_tx) -> AttributeDict:
+        """
+        txpool_content 回傳未格式化的欄位，轉為與 eth_getTransactionByHash 相同的型別
+        """
+        return AttributeDict(
+            {
+                "hash": HexBytes(raw_tx["hash"]),
+                "from": raw_tx["from"],
+                "to": raw_tx.get("to"),
+                "value": int(raw_tx.get("value") or "0x0", 16),
+                "input": HexBytes(raw_tx.get("input") or "0x"),
+            }
+        )
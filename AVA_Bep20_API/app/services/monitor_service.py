@@ -1,32 +1,56 @@
 import asyncio
-from web3 import Web3
+import time
+from typing import Optional
 from decimal import Decimal
 from app.core.config import settings
-from app.core.logger import logger
+from app.core.logger import Lazy, log_extra, logger
+from app.core.metrics import (
+    CHAIN_HEAD_BLOCK,
+    CHAIN_REORGS,
+    DEPOSIT_CREDIT_LATENCY,
+    MONITOR_LAG_BLOCKS,
+    MONITOR_PROCESSED_BLOCK,
+    PENDING_DEPOSITS,
+    SWEEP_DURATION,
+)
+from app.core.rpc_tracing import rpc_trace
+from app.core.web3_client import get_web3
 from app.repositories.monitored_repository import MonitoredRepository
 from app.repositories.wallet_repository import WalletRepository
+from app.repositories.lease_repository import LeaseRepository
+from app.repositories.pending_deposit_repository import PendingDepositRepository
 from app.services.transaction_service import TransactionService
+from app.services.coordination_service import MonitorCoordinator, default_instance_id
+from app.services.block_window import BlockHashWindow
+from app.services.block_prefetcher import BlockPrefetcher
+from app.services.token_registry import token_registry
+from app.services.event_bus import publish_event
+from app.services.gas_station import GasStation
+from app.services.gas_limit_cache import gas_limit_cache
+from app.services.sweep_scheduler import SweepJob, SweepScheduler
+from app.schemas.currency import TokenInfo
+from app.schemas.transaction import DetectedDeposit
 from app.utils.encryption import decrypt_wallet_address
-from web3.middleware import ExtraDataToPOAMiddleware
+from app.utils.contracts import TRANSFER_SELECTOR
+from app.utils.multicall import Multicall
 
-BSC_NODE_URL = settings.BSC_MAINNET_NODE_URL  # BSC 主網節點 URL
-USDT_CONTRACT_ADDRESS = settings.USDT_CONTRACT_ADDRESS  # USDT 合約地址
-TRANSFER_METHOD_ID = settings.TRANSFER_METHOD_ID  # 轉帳方法 ID
 CORE_WALLET_ADDRESS = settings.CORE_WALLET_ADDRESS  # 核心錢包地址
 CORE_WALLET_PRIVATE_KEY = settings.CORE_WALLET_PRIVATE_KEY  # 核心錢包私鑰
 
-USDT_CONTRACT_ABI = [
-    {
-        "constant": True,
-        "inputs": [{"name": "_owner", "type": "address"}],
-        "name": "balanceOf",
-        "outputs": [{"name": "balance", "type": "uint256"}],
-        "type": "function",
-    }
-]
+DEPOSIT_CONFIRMATIONS = settings.DEPOSIT_CONFIRMATIONS  # 入金確認數
+BNB_TRANSFER_GAS_LIMIT = 21000  # 標準 BNB 轉帳的 gas limit
+# 尚未學到 gas 用量時，代幣轉帳預估的固定 gas limit
+DEFAULT_TOKEN_TRANSFER_GAS_LIMIT = 60000
 
-DEPOSIT_FEE = Decimal("0.00")  # 手續費
-DEPOSIT_LIMIT = Decimal("10")  # 最低入金限制
+
+class ChainReorgDetected(Exception):
+    """
+    偵測到鏈重組，需要從 rescan_from 區塊重新掃描
+    """
+
+    def __init__(self, rescan_from: int):
+        super().__init__(f"Chain reorg detected, rescanning from block {rescan_from}")
+        self.rescan_from = rescan_from
 
 
 class MonitorService:
@@ -36,22 +60,50 @@ class MonitorService:
         monitored_repository: MonitoredRepository,
         wallet_repository: WalletRepository,
         transaction_service: TransactionService,
+        coordinator: Optional[MonitorCoordinator] = None,
+        lease_repository: Optional[LeaseRepository] = None,
+        pending_deposit_repository: Optional[PendingDepositRepository] = None,
     ):
         """
         初始化監聽服務
-        """
-        self.web3 = Web3(Web3.HTTPProvider(BSC_NODE_URL))
 
-        # 添加 POA 中間件
-        self.web3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
-
-        if not self.web3.is_connected():
-            raise ConnectionError("Unable to connect to the blockchain node.")
+        :param coordinator: 多實例協調器，未提供時本實例獨立監聽所有地址
+        :param lease_repository: 歸集時的跨實例地址鎖，未提供時使用資料庫租約
+        :param pending_deposit_repository: mempool 入金記錄，提供時同步更新其狀態
+        """
+        # 不在建構時檢查節點連線（節點緩慢時會卡住啟動），連線狀態由健康檢查回報
+        self.web3 = get_web3()
 
         self.monitored_repository = monitored_repository
         self.wallet_repository = wallet_repository
         self.transaction_service = transaction_service
+        self.coordinator = coordinator
+        self.lease_repository = lease_repository or LeaseRepository()
+        self.pending_deposit_repository = pending_deposit_repository
+        self.instance_id = (
+            coordinator.instance_id if coordinator else default_instance_id()
+        )
         self.monitored_addresses = set()  # 使用 set 儲存地址，避免重複
+        # 最近區塊 hash，用於偵測重組
+        self.block_window = BlockHashWindow(settings.MONITOR_BLOCK_HASH_WINDOW)
+        # 依區塊號存放尚未達到確認數的入金
+        self.pending_deposits: dict[int, list[DetectedDeposit]] = {}
+        # 入金餘額以 Multicall3 批次查詢
+        self.multicall = Multicall(self.web3)
+        # 歸集前批次補 gas
+        self.gas_station = GasStation(self.web3, self.multicall)
+        # 已確認的入金交由排程器歸集與入帳，不阻塞區塊監聽
+        self.sweep_scheduler = SweepScheduler(
+            execute=self.sweep,
+            busy=self.requeue_deposits,
+            get_gas_price=lambda: self.web3.eth.gas_price,
+            lease_repository=self.lease_repository,
+            instance_id=self.instance_id,
+        )
+        # 節點不支援 debug API 時自動關閉內部轉帳偵測
+        self.trace_internal_transfers = settings.MONITOR_TRACE_INTERNAL_TRANSFERS
+        # 最後處理完成的區塊，供健康檢查計算落後區塊數
+        self.processed_block: Optional[int] = None
 
     async def refresh_addresses(self, interval: int = 15):
         """
@@ -59,43 +111,117 @@ class MonitorService:
         """
         while True:
             try:
-                addresses = (
-                    self.monitored_repository.get_all_addresses()
-                )  # 從 repository 獲取所有地址
-                new_addresses = {address.lower() for address in addresses}
-
-                # 計算新加入的地址
-                added_addresses = new_addresses - self.monitored_addresses
-
-                # 更新地址列表
-                self.monitored_addresses = new_addresses
-                # 印出新加入的地址（如果有）
-                if added_addresses:
-                    logger.info(f"New monitored addresses: {added_addresses}")
-
+                token_registry.load()
+            except Exception as e:
+                logger.error(f"Error refreshing currencies: {e}")
+            try:
+                self.load_monitored_addresses()
             except Exception as e:
                 logger.error(f"Error refreshing addresses: {e}")
             await asyncio.sleep(interval)  # 每隔 interval 秒刷新一次
 
+    def load_monitored_addresses(self):
+        """
+        從 repository 載入監聽地址，分片模式下只保留本實例持有分片內的地址
+        """
+        addresses = self.monitored_repository.get_all_addresses()
+        new_addresses = {address.lower() for address in addresses}
+        if self.coordinator is not None:
+            new_addresses = {
+                address
+                for address in new_addresses
+                if self.coordinator.owns_address(address)
+            }
+
+        # 計算新加入的地址
+        added_addresses = new_addresses - self.monitored_addresses
+
+        # 更新地址列表
+        self.monitored_addresses = new_addresses
+        # 印出新加入的地址（如果有）
+        if added_addresses:
+            logger.info(f"New monitored addresses: {added_addresses}")
+
+    async def resolve_start_block(self) -> int:
+        """
+        決定開始監聽的區塊：有協調器時等待取得租約，並從檢查點之後繼續
+        """
+        if self.coordinator is not None:
+            await self.coordinator.wait_until_active()
+            resume_block = await asyncio.to_thread(self.coordinator.get_resume_block)
+            if resume_block is not None:
+                return resume_block
+        return self.web3.eth.block_number
+
     async def monitor_blockchain(self):
         """
         監聽區塊鏈，檢測是否有交易發生到監聽地址
         """
-        latest_block = self.web3.eth.block_number
+        latest_block = await self.resolve_start_block()
+        active_shards = self.coordinator.owned_shards if self.coordinator else None
         logger.info(f"Starting monitoring from block: {latest_block}")
+        prefetcher = BlockPrefetcher(self.fetch_block, settings.MONITOR_PREFETCH_WINDOW)
+        try:
+            await self._monitor_loop(latest_block, active_shards, prefetcher)
+        finally:
+            prefetcher.reset()
 
+    async def _monitor_loop(
+        self,
+        latest_block: int,
+        active_shards: Optional[frozenset[int]],
+        prefetcher: BlockPrefetcher,
+    ):
         while True:
             try:
+                # 持有的分片有變動（失去租約或接手其他分片）時重新決定起點與監聽地址
+                if (
+                    self.coordinator is not None
+                    and self.coordinator.owned_shards != active_shards
+                ):
+                    still_active = bool(active_shards) and self.coordinator.is_active
+                    if not self.coordinator.is_active:
+                        logger.warning("Monitor lease lost, standing by.")
+                    resume_block = await self.resolve_start_block()
+                    # 接手額外分片時回溯到其檢查點，避免前任 leader 未處理的區塊被遺漏
+                    latest_block = (
+                        min(latest_block, resume_block)
+                        if still_active
+                        else resume_block
+                    )
+                    self.rewind(latest_block)
+                    prefetcher.reset()
+                    active_shards = self.coordinator.owned_shards
+                    self.load_monitored_addresses()
+                    logger.info(f"Resuming monitoring from block: {latest_block}")
+
                 # 確保區塊號不超出最新區塊
                 current_block = self.web3.eth.block_number
+                CHAIN_HEAD_BLOCK.set(current_block)
                 if latest_block > current_block:
                     await asyncio.sleep(2)
                     continue
 
-                # 查詢並處理區塊
-                await self.process_block(latest_block)
+                # 背景預抓後續區塊，處理仍依序進行
+                prefetcher.schedule(latest_block, current_block)
+                block = await prefetcher.get(latest_block)
+
+                # 處理區塊
+                with rpc_trace("monitor.block", detail=str(latest_block)):
+                    await self.process_block(latest_block, block)
+                self.processed_block = latest_block
+                MONITOR_PROCESSED_BLOCK.set(latest_block)
+                MONITOR_LAG_BLOCKS.set(current_block - latest_block)
+                if self.coordinator is not None:
+                    self.coordinator.checkpoint_block = self.checkpoint_block(
+                        latest_block
+                    )
 
                 latest_block += 1  # 移動到下一個區塊
+            except ChainReorgDetected as reorg:
+                logger.warning(str(reorg))
+                prefetcher.reset()
+                latest_block = reorg.rescan_from
             except ConnectionError as ce:
                 logger.error(f"Connection error: {ce}. Retrying in 5 seconds...")
                 await asyncio.sleep(5)  # 等待後重新嘗試
@@ -103,159 +229,664 @@ class MonitorService:
                 logger.error(f"Unexpected error: {e}. Retrying in 1 second...")
                 await asyncio.sleep(1)  # 控制頻率
 
-    async def process_block(self, block_number: int):
+    def checkpoint_block(self, processed_block: int) -> int:
+        """
+        可安全記錄的檢查點：不可越過仍在等待確認或歸集的入金，接手者才會重新偵測到它們
+        """
+        blocks = list(self.pending_deposits)
+        scheduled_block = self.sweep_scheduler.oldest_block()
+        if scheduled_block is not None:
+            blocks.append(scheduled_block)
+        if blocks:
+            return min(processed_block, min(blocks) - 1)
+        return processed_block
+
+    def rewind(self, block_number: int):
+        """
+        回溯到指定區塊重新掃描：捨棄該區塊之後的 hash 記錄與待確認入金
+        """
+        self.block_window.truncate(block_number - 1)
+        for pending_block in [n for n in self.pending_deposits if n >= block_number]:
+            del self.pending_deposits[pending_block]
+        PENDING_DEPOSITS.set(sum(map(len, self.pending_deposits.values())))
+
+    def find_fork_point(self, block_number: int) -> int:
+        """
+        從 block_number 往回比對節點上的區塊 hash，找出與本地記錄一致的最後一個區塊
+
+        僅在偵測到重組時呼叫，每回溯一個區塊多一次 header 查詢。
+        """
+        number = block_number
+        oldest = self.block_window.oldest
+        while oldest is not None and number >= oldest:
+            header = self.web3.eth.get_block(number)
+            if header.hash == self.block_window.get(number):
+                return number
+            number -= 1
+
+        # 重組深度超過緩衝區，只能從緩衝區最舊的區塊開始重掃
+        logger.error(
+            f"Chain reorg deeper than the {len(self.block_window)}-block hash window "
+            f"at block {block_number}"
+        )
+        return (oldest or block_number + 1) - 1
+
+    def fetch_block(self, block_number: int):
+        """
+        查詢含完整交易的區塊
+        """
+        return self.web3.eth.get_block(block_number, full_transactions=True)
+
+    async def process_block(self, block_number: int, block=None):
         """
-        查詢並處理指定區塊的交易
+        處理指定區塊的交易
+
+        :param block: 已預先抓取的區塊，未提供時直接查詢
         """
-        block = self.web3.eth.get_block(block_number, full_transactions=True)
+        if block is None:
+            block = self.fetch_block(block_number)
+
+        # parentHash 與本地記錄不符代表前面的區塊已被重組
+        if not self.block_window.extends(block.number, block.parentHash):
+            CHAIN_REORGS.inc()
+            fork_point = self.find_fork_point(block.number - 1)
+            if block.number - 1 - fork_point > DEPOSIT_CONFIRMATIONS:
+                logger.error(
+                    f"Reorg depth {block.number - 1 - fork_point} exceeds "
+                    f"DEPOSIT_CONFIRMATIONS={DEPOSIT_CONFIRMATIONS}; deposits credited "
+                    f"from blocks {fork_point + 1}..{block.number - 1} must be reviewed"
+                )
+            self.rewind(fork_point + 1)
+            raise ChainReorgDetected(fork_point + 1)
+        self.block_window.push(block.number, block.hash)
+
+        await self.detect_deposits(block)
+        await self.confirm_deposits(block_number)
 
+    async def detect_deposits(self, block):
+        """
+        偵測區塊內轉入監聽地址的代幣與 BNB，加入待確認入金（不做重組檢查與入帳）
+        """
         for tx in block.transactions:
-            # 檢查是否是 USDT 合約的交易
-            if tx.to and tx.to.lower() == USDT_CONTRACT_ADDRESS.lower():
-                await self.process_transaction(tx)
+            match = self.match_transaction(tx)
+            if match is not None:
+                to_address, token, amount = match
+                self.queue_deposit(
+                    f"0x{tx.hash.hex()}",
+                    tx["from"],
+                    to_address,
+                    token,
+                    amount,
+                    block.number,
+                )
+
+        native_token = token_registry.native
+        if self.trace_internal_transfers and native_token is not None:
+            await self.process_internal_transfers(block, native_token)
+
+        if self.pending_deposit_repository and block.number in self.pending_deposits:
+            # 整個區塊的入金一次更新 mempool 記錄
+            tx_hashes = [
+                deposit.tx_hash for deposit in self.pending_deposits[block.number]
+            ]
+            try:
+                await asyncio.to_thread(
+                    self.pending_deposit_repository.mark_mined,
+                    tx_hashes,
+                    block.number,
+                )
+            except Exception as e:
+                logger.error(
+                    f"Failed to mark pending deposits of block {block.number} mined: {e}"
+                )
+
+    def match_transaction(self, tx) -> Optional[tuple[str, TokenInfo, int]]:
+        """
+        比對單筆交易是否為轉入監聽地址的入金（區塊掃描與 mempool 監看共用）
 
-    async def process_transaction(self, tx):
+        代幣合約與監聽地址皆為 dict / set 查詢，一次掃描即可比對所有幣種。
+
+        :return: (收款地址, 幣種, 金額最小單位)，不是入金時回傳 None
         """
-        處理單筆交易
+        if not tx.to:
+            return None
+        to_address = tx.to.lower()
+        token = token_registry.by_contract.get(to_address)
+        if token is not None:
+            transfer = self.decode_transfer(tx)
+            if transfer is not None and transfer[0] in self.monitored_addresses:
+                return transfer[0], token, transfer[1]
+            return None
+
+        native_token = token_registry.native
+        if (
+            native_token is not None
+            and tx.value
+            and to_address in self.monitored_addresses
+            # 核心錢包補的 gas 費不是入金
+            and tx["from"].lower() != CORE_WALLET_ADDRESS.lower()
+        ):
+            return to_address, native_token, tx.value
+        return None
+
+    async def process_internal_transfers(self, block, native_token: TokenInfo):
         """
-        # 先檢查 input 存在且長度是否足夠 (至少 68 bytes)
-        # 4 bytes: methodID, 32 bytes: to_address, 32 bytes: amount
-        if tx.input and len(tx.input) >= 68:
-            method_id = f"0x{tx.input[:4].hex()}"
-            if method_id == TRANSFER_METHOD_ID:
-                tx_hash = f"0x{tx.hash.hex()}"
-
-                # 解析 to_address
-                #   前 4 bytes = method ID
-                #   接下來 32 bytes (offset 4:36) 存 address
-                to_address_bytes = tx.input[4:36]
-                to_address = f"0x{to_address_bytes.hex()[-40:]}".lower()
-
-                # 解析 amount (offset 36:68)
-                amount_bytes = tx.input[36:68]
-                if not amount_bytes:
-                    # amount_bytes 可能是空的 => 長度不夠
-                    logger.warning(
-                        f"[SKIP] TxHash={tx_hash} input length insufficient for amount."
-                    )
-                    return
-
-                try:
-                    amount = int(amount_bytes.hex(), 16)
-                except ValueError as ve:
-                    logger.warning(f"[SKIP] TxHash={tx_hash} invalid amount hex: {ve}")
-                    return
-
-                # 檢查是否為監聽地址
-                if to_address in self.monitored_addresses:
-                    logger.info(
-                        f"[USDT TRANSFER] TxHash: {tx_hash}, "
-                        f"From: {tx['from']}, "
-                        f"To: {to_address}, "
-                        f"Amount: {self.web3.from_wei(amount, 'ether')} USDT"
-                    )
+        以 callTracer 追蹤區塊內的合約呼叫，偵測經由合約轉入監聽地址的 BNB
 
-                    # 查詢該地址 USDT 餘額
-                    usdt_contract = self.web3.eth.contract(
-                        address=Web3.to_checksum_address(USDT_CONTRACT_ADDRESS),
-                        abi=USDT_CONTRACT_ABI,
-                    )
-                    balance = usdt_contract.functions.balanceOf(
-                        Web3.to_checksum_address(to_address)
-                    ).call()
-                    balance_in_ether = self.web3.from_wei(balance, "ether")
-
-                    # 如果餘額小於指定限制，跳過處理
-                    if balance_in_ether < int(DEPOSIT_LIMIT):
-                        logger.info(
-                            f"[USDT TRANSFER IGNORED] Address: {to_address}, "
-                            f"Balance: {balance_in_ether} USDT (< {int(DEPOSIT_LIMIT)} USDT)"
-                        )
-                        return
-
-                    await self.handle_deposit(
-                        tx_hash, to_address, amount=balance_in_ether
+        每個區塊只多一次 debug_traceBlockByNumber 呼叫（在 thread 中進行）；節點不支援時停用此功能。
+        """
+        if not self.monitored_addresses:
+            return
+        try:
+            traces = await asyncio.to_thread(
+                self.web3.manager.request_blocking,
+                "debug_traceBlockByNumber",
+                [hex(block.number), {"tracer": "callTracer"}],
+            )
+        except Exception as e:
+            logger.error(
+                f"debug_traceBlockByNumber unavailable, internal transfer detection "
+                f"disabled: {e}"
+            )
+            self.trace_internal_transfers = False
+            return
+
+        core_wallet_address = CORE_WALLET_ADDRESS.lower()
+        for index, trace in enumerate(traces):
+            result = trace.get("result") or {}
+            # 核心錢包發出的交易（例如 disperseEther 批次補 gas）不是入金
+            if result.get("from", "").lower() == core_wallet_address:
+                continue
+            # 交易本身 revert 時所有內部轉帳皆未生效
+            if result.get("error"):
+                continue
+            # 舊版節點的結果不含 txHash，依序對應區塊內的交易
+            tx_hash = trace.get("txHash") or f"0x{block.transactions[index].hash.hex()}"
+            # 同一交易多次轉入同一地址（例如 Disperse 重複的收款人）合併為一筆入金：
+            # 收款地址 -> (第一筆的轉出地址, 合計金額)
+            transfers: dict[str, tuple[str, int]] = {}
+            # 最外層呼叫即交易本身，已在區塊掃描中處理；
+            # revert 的呼叫（含其下所有子呼叫）未生效，不再往下追蹤
+            stack = [
+                call for call in result.get("calls") or [] if not call.get("error")
+            ]
+            while stack:
+                call = stack.pop()
+                stack.extend(
+                    child for child in call.get("calls") or [] if not child.get("error")
+                )
+                value = int(call.get("value") or "0x0", 16)
+                to_address = (call.get("to") or "").lower()
+                if (
+                    value
+                    and call.get("type") == "CALL"
+                    and to_address in self.monitored_addresses
+                    and call.get("from", "").lower() != core_wallet_address
+                ):
+                    from_address, total = transfers.get(
+                        to_address, (call.get("from"), 0)
                     )
-        else:
+                    transfers[to_address] = (from_address, total + value)
+
+            for to_address, (from_address, value) in transfers.items():
+                self.queue_deposit(
+                    tx_hash,
+                    from_address,
+                    to_address,
+                    native_token,
+                    value,
+                    block.number,
+                )
+
+    def decode_transfer(self, tx) -> Optional[tuple[str, int]]:
+        """
+        解析代幣 transfer 的 input
+
+        :return: (收款地址, 金額最小單位)，不是 transfer 時回傳 None
+        """
+        # 先檢查 input 存在且長度是否足夠 (至少 68 bytes)
+        # 4 bytes: methodID, 32 bytes: to_address, 32 bytes: amount
+        if not tx.input or len(tx.input) < 68:
             # 不是 transfer 或是 input 長度不足，直接跳過
+            return None
+        # 直接比對 bytes，不需轉成十六進位字串
+        if tx.input[:4] != TRANSFER_SELECTOR:
+            return None
+
+        # 解析 to_address
+        #   前 4 bytes = method ID
+        #   接下來 32 bytes (offset 4:36) 存 address，取後 20 bytes
+        to_address = f"0x{tx.input[16:36].hex()}"
+
+        # 解析 amount (offset 36:68)
+        amount = int.from_bytes(tx.input[36:68], "big")
+        return to_address, amount
+
+    def queue_deposit(
+        self,
+        tx_hash: str,
+        from_address: str,
+        to_address: str,
+        token: TokenInfo,
+        amount: int,
+        block_number: int,
+    ):
+        """
+        將監聽地址收到的轉帳加入待確認入金
+        """
+        # 高頻記錄：參數延後到背景 thread 格式化，並依幣種限流
+        logger.info(
+            "[%s TRANSFER] TxHash: %s",
+            token.symbol,
+            tx_hash,
+            extra=log_extra(
+                rate_limit=f"transfer:{token.symbol}",
+                event="deposit_detected",
+                tx_hash=tx_hash,
+                from_address=from_address,
+                to_address=to_address,
+                amount=Lazy(token.from_base_units, amount),
+                symbol=token.symbol,
+                block=block_number,
+            ),
+        )
+        self.pending_deposits.setdefault(block_number, []).append(
+            DetectedDeposit(
+                tx_hash=tx_hash,
+                to_address=to_address,
+                currency_id=token.currency_id,
+                amount=amount,
+                block_number=block_number,
+                detected_at=time.perf_counter(),
+            )
+        )
+
+    async def confirm_deposits(self, head_block: int):
+        """
+        將已達確認數的待確認入金進行歸集與入帳
+        """
+        confirmed_block = head_block - DEPOSIT_CONFIRMATIONS
+        confirmed: list[DetectedDeposit] = []
+        for block_number in sorted(self.pending_deposits):
+            if block_number > confirmed_block:
+                break
+            confirmed.extend(self.pending_deposits.pop(block_number))
+        if confirmed:
+            await self.credit_deposits(confirmed)
+        PENDING_DEPOSITS.set(sum(map(len, self.pending_deposits.values())))
+
+    def requeue_deposits(self, deposits: list[DetectedDeposit]):
+        """
+        餘額查詢失敗的入金放回待確認佇列，下一個區塊再重試（檢查點也不會越過它們）
+        """
+        for deposit in deposits:
+            self.pending_deposits.setdefault(deposit.block_number, []).append(deposit)
+
+    def retry_deposits(self, deposits: list[DetectedDeposit], reason: str):
+        """
+        歸集失敗的入金放回待確認佇列，每筆最多重試 SWEEP_MAX_ATTEMPTS 次
+        """
+        retry = []
+        for deposit in deposits:
+            deposit.sweep_attempts += 1
+            if deposit.sweep_attempts < settings.SWEEP_MAX_ATTEMPTS:
+                retry.append(deposit)
+            else:
+                logger.error(
+                    f"Deposit {deposit.tx_hash} to {deposit.to_address} not swept "
+                    f"after {deposit.sweep_attempts} attempts, needs manual review: "
+                    f"{reason}"
+                )
+        self.requeue_deposits(retry)
+
+    async def credit_deposits(self, deposits: list[DetectedDeposit]):
+        """
+        依地址目前的餘額處理已確認的入金
+
+        同一地址、同一幣種的多筆轉帳合併為一次餘額查詢、一次歸集與一筆入帳記錄；
+        所有地址的餘額以 Multicall 合併查詢。
+        """
+        groups: dict[tuple[str, TokenInfo], list[DetectedDeposit]] = {}
+        for deposit in deposits:
+            token = token_registry.by_currency_id.get(deposit.currency_id)
+            if token is None:
+                logger.warning(
+                    "[SKIP] TxHash=%s currency %s is no longer supported.",
+                    deposit.tx_hash,
+                    deposit.currency_id,
+                    extra=log_extra(rate_limit="unsupported_currency"),
+                )
+                continue
+            groups.setdefault((deposit.to_address, token), []).append(deposit)
+        if not groups:
+            return
+
+        try:
+            balances, native_gas_cost = await asyncio.to_thread(
+                self.read_deposit_balances, list(groups)
+            )
+        except Exception as e:
+            logger.error(f"Failed to read deposit balances: {e}")
+            self.requeue_deposits(deposits)
+            return
+
+        for ((address, token), group), balance in zip(groups.items(), balances):
+            if balance is None:
+                logger.error(
+                    f"Failed to read {token.symbol} balance of {address}, "
+                    f"retrying on next block."
+                )
+                self.requeue_deposits(group)
+                continue
+            balance = self.sweepable_balance(token, group, balance, native_gas_cost)
+            await self.credit_deposit(address, token, group, balance)
+
+    @staticmethod
+    def sweepable_balance(
+        token: TokenInfo,
+        deposits: list[DetectedDeposit],
+        balance: int,
+        native_gas_cost: int,
+    ) -> int:
+        """
+        可歸集並入帳的金額（最小單位）
+        """
+        if not token.is_native:
+            return balance
+        # 以比對到的轉帳金額入帳（餘額中可能含核心錢包補入、尚未用掉的 gas），
+        # 歸集的 gas 由入金扣除
+        transferred = sum(deposit.amount for deposit in deposits)
+        return max(min(balance, transferred) - native_gas_cost, 0)
+
+    def read_deposit_balances(
+        self, groups: list[tuple[str, TokenInfo]]
+    ) -> tuple[list[Optional[int]], int]:
+        """
+        以 Multicall 查詢各地址的幣種餘額
+
+        :return: (餘額清單, BNB 歸集所需的 gas 費 wei)
+        """
+        balances = self.multicall.get_balances(
+            [(token.contract_address, address) for address, token in groups]
+        )
+        # BNB 歸集本身要花 gas，入帳金額為扣除 gas 後實際轉入核心錢包的數量
+        native_gas_cost = (
+            BNB_TRANSFER_GAS_LIMIT * self.web3.eth.gas_price
+            if any(token.is_native for _, token in groups)
+            else 0
+        )
+        return balances, native_gas_cost
+
+    async def credit_deposit(
+        self,
+        to_address: str,
+        token: TokenInfo,
+        deposits: list[DetectedDeposit],
+        balance: int,
+    ):
+        """
+        處理單一地址、單一幣種已確認的入金
+
+        :param balance: 地址目前可歸集的餘額（最小單位）
+        """
+        balance_in_token = token.from_base_units(balance)
+
+        # 如果餘額小於該代幣的入金限制，跳過處理
+        if balance_in_token < token.deposit_limit:
+            logger.info(
+                "[%s TRANSFER IGNORED] Address: %s",
+                token.symbol,
+                to_address,
+                extra=log_extra(
+                    rate_limit=f"ignored:{token.symbol}",
+                    event="deposit_below_limit",
+                    to_address=to_address,
+                    balance=balance_in_token,
+                    deposit_limit=token.deposit_limit,
+                    symbol=token.symbol,
+                ),
+            )
             return
 
-    async def handle_deposit(self, tx_hash: str, to_address: str, amount: Decimal):
+        self.sweep_scheduler.submit(
+            SweepJob(to_address, token, deposits, amount=balance_in_token)
+        )
+
+    async def sweep(self, job: SweepJob):
+        """
+        排程器執行的歸集工作；同時進行的歸集會一起送出補 gas 請求，由 GasStation 合併
+        """
+        await self.handle_deposit(job.deposits, job.to_address, token=job.token)
+
+    async def handle_deposit(
+        self,
+        deposits: list[DetectedDeposit],
+        to_address: str,
+        token: TokenInfo,
+    ):
         """
         處理入金邏輯，寫入資料庫
+
+        一次歸集、一筆入帳記錄，入帳記錄的 TxHash 為第一筆轉帳，
+        其餘轉帳記錄在 core_wallet_deposit_source。
+        取得地址鎖後才查詢餘額：排隊期間同一地址的前一次歸集可能已轉走部分餘額。
+        資料庫查詢在 thread 中進行，不阻塞事件迴圈上的其他歸集與區塊監聽。
         """
-        sub_wallet = self.wallet_repository.get_wallet_by_address(to_address)
-        if sub_wallet:
+        sub_wallet = await asyncio.to_thread(
+            self.wallet_repository.get_wallet_by_address, to_address
+        )
+        if not sub_wallet:
+            logger.warning(f"No sub-wallet found for address: {to_address}")
+            return
+
+        # 同一地址同時只允許一個實例歸集與入帳（例如補掃工具與監聽服務同時運作）
+        lock_name = f"sweep:{to_address}"
+        try:
+            locked = await asyncio.to_thread(
+                self.lease_repository.try_acquire,
+                lock_name,
+                self.instance_id,
+                settings.SWEEP_LOCK_TTL,
+            )
+        except Exception as e:
+            logger.error(f"Failed to lock {to_address} for sweeping: {e}")
+            locked = False
+        if not locked:
+            logger.info(
+                "Address %s is busy, retrying on next block.",
+                to_address,
+                extra=log_extra(rate_limit="sweep_busy", event="sweep_busy"),
+            )
+            self.requeue_deposits(deposits)
+            return
+
+        try:
+            # 重掃（重組或接手分片）時略過已入帳的轉帳，避免重複入帳
+            recorded = await asyncio.to_thread(
+                self.monitored_repository.get_recorded_tx_hashes,
+                sub_wallet.SubWalletID,
+                token.currency_id,
+                [deposit.tx_hash for deposit in deposits],
+            )
+            deposits = [
+                deposit for deposit in deposits if deposit.tx_hash not in recorded
+            ]
+            if not deposits:
+                logger.info(f"Deposits to {to_address} already recorded, skipping.")
+                return
+
             try:
-                # 執行資金轉移
-                transfer_result = await self.transfer_funds_to_core_wallet(
-                    to_address, amount
+                balances, native_gas_cost = await asyncio.to_thread(
+                    self.read_deposit_balances, [(to_address, token)]
+                )
+            except Exception as e:
+                logger.error(f"Failed to read deposit balances: {e}")
+                balances = [None]
+            if balances[0] is None:
+                logger.error(
+                    f"Failed to read {token.symbol} balance of {to_address}, "
+                    f"retrying on next block."
+                )
+                self.requeue_deposits(deposits)
+                return
+            amount = token.from_base_units(
+                self.sweepable_balance(token, deposits, balances[0], native_gas_cost)
+            )
+            if amount < token.deposit_limit:
+                # 前一次歸集已一併轉走並入帳這些入金的餘額
+                logger.info(
+                    f"{token.symbol} balance of {to_address} is below the deposit "
+                    f"limit at sweep time, skipping."
                 )
+                return
+
+            # 執行資金轉移
+            sweep_started = time.perf_counter()
+            transfer_result = await self.transfer_funds_to_core_wallet(
+                to_address, amount, token
+            )
+            SWEEP_DURATION.labels("success" if transfer_result else "failure").observe(
+                time.perf_counter() - sweep_started
+            )
 
-                # 如果轉移成功，記錄入金交易
-                if transfer_result:
-                    self.monitored_repository.execute_deposit_transaction(
+            # 如果轉移成功，記錄入金交易
+            if transfer_result:
+                await asyncio.to_thread(
+                    self.monitored_repository.execute_deposit_transaction,
+                    sub_wallet_id=sub_wallet.SubWalletID,
+                    currency_id=token.currency_id,
+                    amount=amount,
+                    fee=token.deposit_fee,
+                    tx_hash=deposits[0].tx_hash,
+                    sources=[
+                        {
+                            "source_tx_hash": deposit.tx_hash,
+                            "amount": token.from_base_units(deposit.amount),
+                            "block_number": deposit.block_number,
+                        }
+                        for deposit in deposits
+                    ],
+                )
+                credited_at = time.perf_counter()
+                for deposit in deposits:
+                    DEPOSIT_CREDIT_LATENCY.observe(credited_at - deposit.detected_at)
+                if self.pending_deposit_repository:
+                    await asyncio.to_thread(
+                        self.pending_deposit_repository.mark_credited,
+                        [deposit.tx_hash for deposit in deposits],
+                    )
+                publish_event(
+                    sub_wallet.SubWalletID,
+                    "deposit",
+                    {
+                        "tx_hashes": [deposit.tx_hash for deposit in deposits],
+                        "currency_id": token.currency_id,
+                        "symbol": token.symbol,
+                        "amount": amount,
+                        "fee": token.deposit_fee,
+                    },
+                )
+                logger.info(
+                    "Deposit recorded: SubWalletID=%s",
+                    sub_wallet.SubWalletID,
+                    extra=log_extra(
+                        event="deposit_credited",
                         sub_wallet_id=sub_wallet.SubWalletID,
-                        currency_id=2,  # USDT 對應的 CurrencyID
                         amount=amount,
-                        fee=DEPOSIT_FEE,
-                        tx_hash=tx_hash,
-                    )
-                    logger.info(
-                        f"Deposit recorded: SubWalletID={sub_wallet.SubWalletID}, "
-                        f"Amount={self.web3.from_wei(amount, 'ether')} USDT"
-                    )
-                else:
-                    logger.error(
-                        f"Transfer to core wallet failed, skipping database update."
-                    )
-            except Exception as db_error:
-                logger.error(f"Failed to record deposit in database: {db_error}")
-        else:
-            logger.warning(f"No sub-wallet found for address: {to_address}")
+                        symbol=token.symbol,
+                        transfers=len(deposits),
+                    ),
+                )
+            else:
+                logger.error(f"Transfer to core wallet failed, retrying on next block.")
+                self.retry_deposits(deposits, "transfer to core wallet failed")
+        except Exception as db_error:
+            logger.error(f"Failed to record deposit in database: {db_error}")
+        finally:
+            try:
+                await asyncio.to_thread(
+                    self.lease_repository.release, lock_name, self.instance_id
+                )
+            except Exception as e:
+                logger.error(f"Failed to unlock {to_address}: {e}")
 
     async def transfer_funds_to_core_wallet(
-        self, from_address: str, amount: Decimal
+        self, from_address: str, amount: Decimal, token: TokenInfo
     ) -> bool:
         """
-        將 USDT 從指定地址轉移到核心錢包
+        將代幣從指定地址轉移到核心錢包
         """
+        if token.is_native:
+            return await self.transfer_bnb_to_core_wallet(from_address, amount)
+
+        # 確保該地址有足夠的 BNB 支付 Gas 費用（已預先補足時立即返回）
+        try:
+            gas_fee = await asyncio.to_thread(
+                self.calculate_fixed_gas_for_usdt_transfer, token
+            )
+            if not await self.gas_station.ensure_gas(
+                from_address, self.web3.to_wei(gas_fee, "ether")
+            ):
+                logger.error(f"Failed to send BNB for gas to {from_address}")
+                return False
+        except Exception as e:
+            logger.error(f"Failed to send BNB for gas: {e}")
+            return False
 
-        # 發送少量 BNB 到該地址，以支付 Gas 費用
+        # 執行代幣轉移
         try:
-            gas_fee = self.calculate_fixed_gas_for_usdt_transfer()
+            logger.info(f"Transferring {amount} {token.symbol} to core wallet")
+
+            # 取得user錢包並解密私鑰
+            user_wallet = await asyncio.to_thread(
+                self.wallet_repository.get_wallet_by_address, from_address
+            )
 
-            # 檢查該地址是否有足夠的 BNB 來支付 Gas 費用
-            from_address = Web3.to_checksum_address(from_address)
-            balance_in_bnb = self.web3.from_wei(
-                self.web3.eth.get_balance(from_address), "ether"
+            sender_private_key = decrypt_wallet_address(
+                user_wallet.EncryptedPrivateKey,
+                user_wallet.KeyMaterial,
+                user_wallet.Salt,
             )
-            send_bnb_amount = gas_fee - balance_in_bnb
 
-            if Decimal(balance_in_bnb) <= gas_fee:
+            # 等待收據期間不阻塞事件迴圈，其他歸集可同時進行
+            token_transfer_result = await asyncio.to_thread(
+                self.transaction_service.transfer_token,
+                sender_private_key,
+                CORE_WALLET_ADDRESS,
+                amount,
+                token,
+            )
+            if token_transfer_result.success:
                 logger.info(
-                    f"Sending {send_bnb_amount} BNB to {from_address} for gas fee"
+                    f"Funds transferred to core wallet. TxHash: {token_transfer_result.tx_hash}"
                 )
-                bnb_transfer_result = self.transaction_service.transfer_bnb(
-                    CORE_WALLET_PRIVATE_KEY, from_address, send_bnb_amount
+                self.gas_station.record_spent(
+                    from_address,
+                    self.web3.to_wei(token_transfer_result.gas_used, "ether"),
                 )
-                if not bnb_transfer_result.success:
-                    logger.error(
-                        f"Failed to send BNB for gas: {bnb_transfer_result.error_message}"
-                    )
-                    return False
+                return True
+            else:
+                logger.error(
+                    f"Failed to transfer {token.symbol}: {token_transfer_result.error_message}"
+                )
+                return False
         except Exception as e:
-            logger.error(f"Failed to send BNB for gas: {e}")
+            logger.error(f"Failed to transfer {token.symbol} to core wallet: {e}")
             return False
 
-        # 執行 USDT 轉移
+    async def transfer_bnb_to_core_wallet(
+        self, from_address: str, amount: Decimal
+    ) -> bool:
+        """
+        將 BNB 從指定地址轉移到核心錢包（gas 由該地址自行支付，不需補 gas）
+        """
         try:
-            logger.info(
-                f"Transferring {self.web3.from_wei(amount, 'ether')} USDT to core wallet"
-            )
+            logger.info(f"Transferring {amount} BNB to core wallet")
 
             # 取得user錢包並解密私鑰
-            user_wallet = self.wallet_repository.get_wallet_by_address(from_address)
+            user_wallet = await asyncio.to_thread(
+                self.wallet_repository.get_wallet_by_address, from_address
+            )
 
             sender_private_key = decrypt_wallet_address(
                 user_wallet.EncryptedPrivateKey,
@@ -263,34 +894,42 @@ class MonitorService:
                 user_wallet.Salt,
             )
 
-            usdt_transfer_result = self.transaction_service.transfer_usdt(
+            bnb_transfer_result = await asyncio.to_thread(
+                self.transaction_service.transfer_bnb,
                 sender_private_key,
                 CORE_WALLET_ADDRESS,
                 amount,
             )
-            if usdt_transfer_result.success:
+            if bnb_transfer_result.success:
                 logger.info(
-                    f"Funds transferred to core wallet. TxHash: {usdt_transfer_result.tx_hash}"
+                    f"Funds transferred to core wallet. TxHash: {bnb_transfer_result.tx_hash}"
                 )
                 return True
             else:
                 logger.error(
-                    f"Failed to transfer USDT: {usdt_transfer_result.error_message}"
+                    f"Failed to transfer BNB: {bnb_transfer_result.error_message}"
                 )
                 return False
         except Exception as e:
-            logger.error(f"Failed to transfer USDT to core wallet: {e}")
+            logger.error(f"Failed to transfer BNB to core wallet: {e}")
             return False
 
-    def calculate_fixed_gas_for_usdt_transfer(self) -> Decimal:
+    def calculate_fixed_gas_for_usdt_transfer(
+        self, token: Optional[TokenInfo] = None
+    ) -> Decimal:
         """
-        計算 USDT 轉移操作所需的 BNB（Gas 費用）。
+        計算 USDT（或指定代幣）轉移到核心錢包所需的 BNB（Gas 費用）。
 
+        :param token: 代幣設定，未指定時為 USDT
         :return: 所需的 BNB 金額
         """
         try:
-            # USDT 轉移的固定 Gas Limit
-            gas_limit = 60000  # 預估的固定 Gas 使用量
+            # 優先使用實際歸集學到的 gas limit，尚無紀錄時使用預估的固定值
+            token = token or token_registry.get_by_symbol("USDT")
+            gas_limit = (
+                gas_limit_cache.get((token.contract_address.lower(), "transfer", False))
+                or DEFAULT_TOKEN_TRANSFER_GAS_LIMIT
+            )
 
             # 獲取當前的 Gas Price（單位：wei）
             gas_price = self.web3.eth.gas_price
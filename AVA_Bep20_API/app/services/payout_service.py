@@ -0,0 +1,241 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from app.core.config import settings
+from app.core.logger import logger
+from app.schemas.currency import TokenInfo
+from app.schemas.transaction import TransactionResult
+from app.services.token_registry import token_registry
+from app.services.transaction_service import TransactionService
+from app.utils.contracts import to_checksum_address
+from app.utils.disperse import Disperse
+from app.utils.transactions import TransactionStatusUnknown
+
+CORE_WALLET_PRIVATE_KEY = settings.CORE_WALLET_PRIVATE_KEY
+
+
+@dataclass
+class PayoutRequest:
+    recipient_address: str
+    amount: Decimal
+    future: Future = field(default_factory=Future)
+
+
+class PayoutBatcher:
+    """
+    批次提領：收集一段時間內的核心錢包提領，以 Disperse.disperseToken 一筆交易送出
+
+    - 收到第一筆提領後等待 PAYOUT_BATCH_WINDOW 秒，或滿 PAYOUT_BATCH_MAX_SIZE 筆即送出
+    - 每筆提領各自取得 TransactionResult（TxHash 相同，gas 依筆數平均分攤）
+    - 批次交易估算 gas 失敗、被節點拒絕或 revert 時（資金未轉出），改為逐筆 transfer，
+      個別回報成功或失敗
+    - 簽名後結果不明（送出逾時、未取得收據）時不重送，整批回報失敗並帶 TxHash，
+      由呼叫端保留鎖定金額待對帳
+
+    批次送出在獨立 thread 中進行，提領端點以 await 等待結果，不佔用 threadpool。
+    """
+
+    def __init__(
+        self, token_symbol: str = "USDT", window: float = None, max_size: int = None
+    ):
+        self.token_symbol = token_symbol
+        self.window = window or settings.PAYOUT_BATCH_WINDOW
+        self.max_size = max(1, max_size or settings.PAYOUT_BATCH_MAX_SIZE)
+        self._queue: queue.Queue[PayoutRequest] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._transaction_service: Optional[TransactionService] = None
+        self._disperse: Optional[Disperse] = None
+
+    @property
+    def queued(self) -> int:
+        """
+        等待送出的提領筆數
+        """
+        return self._queue.qsize()
+
+    async def withdraw(
+        self, recipient_address: str, amount: Decimal
+    ) -> TransactionResult:
+        """
+        提領並等待所屬批次完成
+
+        請求被取消（例如用戶端斷線）時批次仍照常送出，結果由 _log_orphaned 記錄待對帳。
+        """
+        future = self.submit(recipient_address, amount)
+        try:
+            return await asyncio.shield(asyncio.wrap_future(future))
+        except asyncio.CancelledError:
+            future.add_done_callback(
+                lambda done: self._log_orphaned(recipient_address, amount, done)
+            )
+            raise
+
+    @staticmethod
+    def _log_orphaned(recipient_address: str, amount: Decimal, future: Future):
+        """
+        已無人等待的提領完成時記錄結果；鎖定金額未解除也未扣除，需人工對帳
+        """
+        if future.cancelled():
+            return
+        result = future.result()
+        logger.error(
+            f"Withdrawal of {amount} to {recipient_address} finished after its request "
+            f"was cancelled (success={result.success}, TxHash={result.tx_hash}), "
+            f"reserved balance kept locked for reconciliation: {result.error_message}"
+        )
+
+    def submit(self, recipient_address: str, amount: Decimal) -> Future:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="payout-batcher", daemon=True
+                )
+                self._thread.start()
+        request = PayoutRequest(recipient_address, amount)
+        self._queue.put(request)
+        return request.future
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                continue
+
+            try:
+                results = self.pay(batch)
+            except Exception as e:
+                logger.error(f"Payout batch of {len(batch)} failed: {e}")
+                results = [
+                    self._failure(request, f"交易失敗: {str(e)}") for request in batch
+                ]
+            for request, result in zip(batch, results):
+                try:
+                    request.future.set_result(result)
+                except Exception as e:
+                    # 不可讓單筆回報失敗結束 thread（之後的提領將永遠等待）
+                    logger.error(
+                        f"Failed to deliver withdrawal result to "
+                        f"{request.recipient_address} (TxHash={result.tx_hash}): {e}"
+                    )
+
+    def _collect(self) -> list[PayoutRequest]:
+        """
+        收集一個批次；已被取消的請求不送出（鎖定金額未解除，記錄待對帳）
+        """
+        batch = []
+        deadline = None
+        while len(batch) < self.max_size:
+            if deadline is None:
+                request = self._queue.get()
+                deadline = time.monotonic() + self.window
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            # 標記為執行中之後無法再取消，送出後的結果一定能回報
+            if request.future.set_running_or_notify_cancel():
+                batch.append(request)
+            else:
+                logger.error(
+                    f"Withdrawal of {request.amount} to {request.recipient_address} "
+                    f"cancelled before sending, reserved balance kept locked for "
+                    f"reconciliation"
+                )
+        return batch
+
+    def pay(self, batch: list[PayoutRequest]) -> list[TransactionResult]:
+        token = token_registry.get_by_symbol(self.token_symbol)
+        if self._transaction_service is None:
+            self._transaction_service = TransactionService()
+        if len(batch) == 1:
+            return self._pay_each(batch, token)
+
+        values = [token.to_base_units(request.amount) for request in batch]
+        try:
+            if self._disperse is None:
+                self._disperse = Disperse(
+                    self._transaction_service.web3, CORE_WALLET_PRIVATE_KEY
+                )
+            self._disperse.ensure_allowance(token.contract_address, sum(values))
+        except Exception as e:
+            logger.warning(f"Disperse unavailable ({e}), paying out one by one")
+            return self._pay_each(batch, token)
+
+        try:
+            tx_hash, receipt, gas_price = self._disperse.disperse_token(
+                token.contract_address,
+                [request.recipient_address for request in batch],
+                values,
+            )
+        except TransactionStatusUnknown as e:
+            logger.error(f"Payout batch {e.tx_hash} has unknown status: {e}")
+            return [
+                self._failure(request, f"交易失敗: {str(e)}", e.tx_hash)
+                for request in batch
+            ]
+        except Exception as e:
+            # 其餘例外皆發生在交易被節點接受之前（估算 gas 或節點拒絕），逐筆送出不會重複轉帳
+            logger.warning(f"Payout batch not sent ({e}), paying out one by one")
+            return self._pay_each(batch, token)
+
+        if receipt.status != 1:
+            logger.warning(f"Payout batch {tx_hash} reverted, paying out one by one")
+            return self._pay_each(batch, token)
+
+        web3 = self._transaction_service.web3
+        gas_share = (
+            Decimal(web3.from_wei(receipt.gasUsed * gas_price, "ether")) / len(batch)
+        ).normalize()
+        logger.info(f"Payout batch {tx_hash}: {len(batch)} withdrawals")
+        return [
+            TransactionResult(
+                success=True,
+                timestamp=datetime.now().isoformat(),
+                tx_hash=tx_hash,
+                sender_address=self._disperse.sender_address,
+                recipient_address=to_checksum_address(request.recipient_address),
+                amount=request.amount,
+                gas_used=gas_share,
+            )
+            for request in batch
+        ]
+
+    def _pay_each(
+        self, batch: list[PayoutRequest], token: TokenInfo
+    ) -> list[TransactionResult]:
+        return [
+            self._transaction_service.transfer_token(
+                CORE_WALLET_PRIVATE_KEY,
+                request.recipient_address,
+                request.amount,
+                token,
+            )
+            for request in batch
+        ]
+
+    @staticmethod
+    def _failure(
+        request: PayoutRequest, error_message: str, tx_hash: str = None
+    ) -> TransactionResult:
+        return TransactionResult(
+            success=False,
+            timestamp=datetime.now().isoformat(),
+            tx_hash=tx_hash,
+            recipient_address=request.recipient_address,
+            amount=request.amount,
+            error_message=error_message,
+        )
+
+
+payout_batcher = PayoutBatcher()
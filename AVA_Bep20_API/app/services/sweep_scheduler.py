@@ -0,0 +1,233 @@
+import asyncio
+import contextvars
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Awaitable, Callable, Optional
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import SWEEP_QUEUE_AGE, SWEEP_QUEUE_SIZE, SWEEPS_DEFERRED
+from app.core.rpc_tracing import rpc_trace
+from app.repositories.lease_repository import LeaseRepository
+from app.schemas.currency import TokenInfo
+from app.schemas.transaction import DetectedDeposit
+
+# 延後小額歸集時，重新檢查 gas price 的間隔（秒）
+DEFER_RECHECK_INTERVAL = 15
+
+
+@dataclass
+class SweepJob:
+    to_address: str
+    token: TokenInfo
+    deposits: list[DetectedDeposit]
+    # 提交時可歸集的餘額（代幣單位），僅用於排序與延後判斷；歸集開始時重新查詢
+    amount: Decimal
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def key(self) -> tuple[str, int]:
+        return self.to_address, self.token.currency_id
+
+
+class SweepScheduler:
+    """
+    歸集排程：依金額由大到小執行，限制同時進行的歸集數量
+
+    - 同一地址、同一幣種同時只有一個歸集；排隊中的工作會合併之後的入金（金額取最新餘額），
+      歸集中的地址收到新入金時交還給 busy 回呼，下一個區塊重新查詢餘額後再排入
+    - 本實例最多 SWEEP_MAX_CONCURRENCY 個歸集；SWEEP_GLOBAL_CONCURRENCY > 0 時，
+      另以資料庫租約限制所有實例合計的歸集數量
+    - SWEEP_DEFER_MAX_GAS_PRICE_GWEI > 0 時，gas price 高於門檻且金額未達
+      SWEEP_DEFER_MIN_AMOUNTS 的歸集延後執行，最多延後 SWEEP_DEFER_MAX_AGE 秒
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[SweepJob], Awaitable[None]],
+        busy: Callable[[list[DetectedDeposit]], None],
+        get_gas_price: Callable[[], int],
+        lease_repository: LeaseRepository,
+        instance_id: str,
+        max_concurrency: int = None,
+        global_concurrency: int = None,
+    ):
+        self.execute = execute
+        self.busy = busy
+        self.get_gas_price = get_gas_price
+        self.lease_repository = lease_repository
+        self.instance_id = instance_id
+        self.max_concurrency = max(1, max_concurrency or settings.SWEEP_MAX_CONCURRENCY)
+        self.global_concurrency = (
+            settings.SWEEP_GLOBAL_CONCURRENCY
+            if global_concurrency is None
+            else global_concurrency
+        )
+        self.max_gas_price = int(settings.SWEEP_DEFER_MAX_GAS_PRICE_GWEI * 10**9)
+        self.min_amounts = settings.SWEEP_DEFER_MIN_AMOUNTS
+
+        self._queued: dict[tuple[str, int], SweepJob] = {}
+        self._running: dict[tuple[str, int], Optional[str]] = {}  # key -> 全域名額租約
+        self._running_blocks: dict[tuple[str, int], int] = {}
+        self._changed = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+        self._gas_price: Optional[int] = None
+        self._gas_price_read_at = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._queued)
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def submit(self, job: SweepJob):
+        if job.key in self._running:
+            self.busy(job.deposits)
+            return
+        queued = self._queued.get(job.key)
+        if queued is None:
+            self._queued[job.key] = job
+        else:
+            # 新的餘額已包含之前的入金，沿用最早的排隊時間
+            known = {deposit.tx_hash for deposit in queued.deposits}
+            queued.deposits.extend(
+                deposit for deposit in job.deposits if deposit.tx_hash not in known
+            )
+            queued.amount = job.amount
+        SWEEP_QUEUE_SIZE.set(len(self._queued))
+        self._idle.clear()
+        self._changed.set()
+        if self._task is None or self._task.done():
+            # 排程迴圈常駐，不沿用呼叫端（監聽區塊）的 RPCTrace
+            self._task = asyncio.create_task(self.run(), context=contextvars.Context())
+
+    def oldest_block(self) -> Optional[int]:
+        """
+        排隊中或歸集中最舊的入金區塊，檢查點不可越過
+        """
+        blocks = [
+            deposit.block_number
+            for job in self._queued.values()
+            for deposit in job.deposits
+        ]
+        blocks.extend(self._running_blocks.values())
+        return min(blocks) if blocks else None
+
+    async def join(self):
+        """
+        等待所有排隊中（不含延後中）與歸集中的工作完成
+        """
+        while True:
+            await self._idle.wait()
+            if not self._queued or all(map(self._deferrable, self._queued.values())):
+                return
+            # 全域名額已滿，稍後再試
+            await asyncio.sleep(1)
+            self._idle.clear()
+            self._changed.set()
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._changed.wait(), DEFER_RECHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+            try:
+                await self._dispatch()
+            except Exception as e:
+                logger.error(f"Error dispatching sweeps: {e}")
+            if not self._running:
+                self._idle.set()
+
+    async def _dispatch(self):
+        deferred = 0
+        for job in sorted(self._queued.values(), key=lambda j: j.amount, reverse=True):
+            if len(self._running) >= self.max_concurrency:
+                break
+            if job.key in self._running:
+                continue
+            if self._deferrable(job) and await self._should_defer():
+                deferred += 1
+                continue
+            slot = await self._acquire_global_slot()
+            if slot is False:
+                break
+
+            del self._queued[job.key]
+            self._running[job.key] = slot
+            self._running_blocks[job.key] = min(
+                deposit.block_number for deposit in job.deposits
+            )
+            SWEEP_QUEUE_SIZE.set(len(self._queued))
+            SWEEP_QUEUE_AGE.observe(time.monotonic() - job.enqueued_at)
+            asyncio.create_task(self._execute(job))
+        SWEEPS_DEFERRED.set(deferred)
+
+    async def _execute(self, job: SweepJob):
+        try:
+            # 每個歸集各自一個 RPCTrace（task 複製排程迴圈的 context，彼此不共用）
+            with rpc_trace("monitor.sweep", detail=job.to_address):
+                await self.execute(job)
+        except Exception as e:
+            logger.error(f"Sweep of {job.to_address} failed: {e}")
+        finally:
+            slot = self._running.pop(job.key, None)
+            self._running_blocks.pop(job.key, None)
+            if slot:
+                try:
+                    await asyncio.to_thread(
+                        self.lease_repository.release, slot, self.instance_id
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to release sweep slot {slot}: {e}")
+            self._changed.set()
+
+    def _deferrable(self, job: SweepJob) -> bool:
+        return (
+            self.max_gas_price > 0
+            and job.amount < self.min_amounts.get(job.token.symbol, Decimal(0))
+            and time.monotonic() - job.enqueued_at < settings.SWEEP_DEFER_MAX_AGE
+        )
+
+    async def _should_defer(self) -> bool:
+        now = time.monotonic()
+        if self._gas_price is None or now - self._gas_price_read_at > (
+            DEFER_RECHECK_INTERVAL
+        ):
+            try:
+                self._gas_price = await asyncio.to_thread(self.get_gas_price)
+                self._gas_price_read_at = now
+            except Exception as e:
+                logger.error(f"Failed to read gas price, not deferring sweeps: {e}")
+                return False
+        return self._gas_price > self.max_gas_price
+
+    async def _acquire_global_slot(self):
+        """
+        取得全域歸集名額
+
+        :return: 租約名稱；未啟用全域限制時回傳 None；名額已滿時回傳 False
+        """
+        if self.global_concurrency <= 0:
+            return None
+        for index in range(self.global_concurrency):
+            name = f"sweep-slot:{index}"
+            try:
+                acquired = await asyncio.to_thread(
+                    self.lease_repository.try_acquire,
+                    name,
+                    self.instance_id,
+                    settings.SWEEP_LOCK_TTL,
+                )
+            except Exception as e:
+                logger.error(f"Failed to acquire sweep slot: {e}")
+                return False
+            # 已持有的名額（本實例其他歸集）也會續約成功，需跳過
+            if acquired and name not in self._running.values():
+                return name
+        return False
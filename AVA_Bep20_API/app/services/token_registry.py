@@ -0,0 +1,128 @@
+from decimal import Decimal
+from typing import Iterable, Optional
+from app.core.config import settings
+from app.core.logger import logger
+from app.repositories.currency_repository import CurrencyRepository
+from app.schemas.currency import TokenInfo
+
+NATIVE_SYMBOL = "BNB"  # 原生幣，無合約地址
+
+
+def default_deposit_limit(symbol: str) -> Decimal:
+    """
+    未設定 DepositLimit 時的最低入金限制（原生幣以 BNB 計價，與代幣分開設定）
+    """
+    if symbol == NATIVE_SYMBOL:
+        return settings.DEFAULT_NATIVE_DEPOSIT_LIMIT
+    return settings.DEFAULT_DEPOSIT_LIMIT
+
+
+def default_tokens() -> list[TokenInfo]:
+    """
+    資料庫尚未設定幣種時使用的預設清單（與既有的 CurrencyID 對應一致）
+    """
+    return [
+        TokenInfo(
+            currency_id=1,
+            symbol=NATIVE_SYMBOL,
+            contract_address=None,
+            decimals=18,
+            deposit_limit=default_deposit_limit(NATIVE_SYMBOL),
+            deposit_fee=settings.DEFAULT_DEPOSIT_FEE,
+        ),
+        TokenInfo(
+            currency_id=2,
+            symbol="USDT",
+            contract_address=settings.USDT_CONTRACT_ADDRESS.lower(),
+            decimals=18,
+            deposit_limit=default_deposit_limit("USDT"),
+            deposit_fee=settings.DEFAULT_DEPOSIT_FEE,
+        ),
+    ]
+
+
+class TokenRegistry:
+    """
+    系統支援的幣種清單，由 core_wallet_currency 載入
+
+    監聽服務以 by_contract（小寫合約地址 -> 幣種）在一次掃描中比對所有代幣，
+    新增代幣只需在資料表加上一筆記錄，不會增加額外的區塊掃描。
+    索引整體替換而非原地修改，讀取端取得的參考在重新載入時仍保持一致。
+    """
+
+    def __init__(self, currency_repository: CurrencyRepository):
+        self.currency_repository = currency_repository
+        self._set_tokens(default_tokens())
+
+    def _set_tokens(self, tokens: Iterable[TokenInfo]):
+        tokens = list(tokens)
+        self.tokens: list[TokenInfo] = tokens
+        self.by_contract: dict[str, TokenInfo] = {
+            token.contract_address: token for token in tokens if not token.is_native
+        }
+        self.by_currency_id: dict[int, TokenInfo] = {
+            token.currency_id: token for token in tokens
+        }
+        self.by_symbol: dict[str, TokenInfo] = {token.symbol: token for token in tokens}
+
+    @property
+    def native(self) -> Optional[TokenInfo]:
+        return self.by_symbol.get(NATIVE_SYMBOL)
+
+    def get_by_symbol(self, symbol: str) -> TokenInfo:
+        token = self.by_symbol.get(symbol)
+        if token is None:
+            raise KeyError(f"Unsupported currency: {symbol}")
+        return token
+
+    def load(self):
+        """
+        從資料庫重新載入幣種設定；未設定合約地址的代幣沿用預設清單中的地址
+        """
+        defaults = {token.symbol: token for token in default_tokens()}
+        tokens = []
+        for currency in self.currency_repository.get_all_currencies():
+            symbol = currency.CurrencyCode
+            default = defaults.get(symbol)
+            contract_address = currency.ContractAddress or (
+                default.contract_address if default else None
+            )
+            if contract_address is None and symbol != NATIVE_SYMBOL:
+                logger.warning(
+                    f"Currency {symbol} has no contract address, not monitored."
+                )
+                continue
+
+            tokens.append(
+                TokenInfo(
+                    currency_id=currency.CurrencyID,
+                    symbol=symbol,
+                    contract_address=(
+                        contract_address.lower() if contract_address else None
+                    ),
+                    decimals=(
+                        currency.Decimals if currency.Decimals is not None else 18
+                    ),
+                    deposit_limit=Decimal(
+                        currency.DepositLimit
+                        if currency.DepositLimit is not None
+                        else default_deposit_limit(symbol)
+                    ),
+                    deposit_fee=Decimal(
+                        currency.DepositFee
+                        if currency.DepositFee is not None
+                        else settings.DEFAULT_DEPOSIT_FEE
+                    ),
+                )
+            )
+
+        if not tokens:
+            return
+
+        added = {token.symbol for token in tokens} - set(self.by_symbol)
+        self._set_tokens(tokens)
+        if added:
+            logger.info(f"Supported currencies loaded: {sorted(added)}")
+
+
+token_registry = TokenRegistry(CurrencyRepository())
@@ -1,19 +1,30 @@
-from web3 import Web3
 from datetime import datetime
 from decimal import Decimal
+from typing import Optional
+from hexbytes import HexBytes
 from app.core.config import settings
+from app.core.logger import logger
+from app.core.web3_client import get_web3
+from app.schemas.currency import TokenInfo
 from app.schemas.transaction import TransactionResult
+from app.services.token_registry import token_registry
+from app.services.gas_limit_cache import gas_limit_cache
+from app.utils.contracts import encode_transfer, to_checksum_address
+from app.utils.transactions import (
+    TransactionStatusUnknown,
+    broadcast,
+    is_gas_rejection,
+    send_with_nonce,
+)
 
-BSC_NODE_URL = settings.BSC_MAINNET_NODE_URL
-USDT_CONTRACT_ADDRESS = settings.USDT_CONTRACT_ADDRESS
+CORE_WALLET_ADDRESS = settings.CORE_WALLET_ADDRESS
 CORE_WALLET_PRIVATE_KEY = settings.CORE_WALLET_PRIVATE_KEY
 
 
 class TransactionService:
     def __init__(self):
-        self.web3 = Web3(Web3.HTTPProvider(BSC_NODE_URL))
-        if not self.web3.is_connected():
-            raise ConnectionError("無法連接到 BSC 節點")
+        # 共用的 Web3 實例；不在每個請求檢查連線，節點狀態由 /readyz 回報
+        self.web3 = get_web3()
 
     def transfer_usdt(
         self, sender_private_key, recipient_address, amount: Decimal
@@ -25,70 +36,86 @@ class TransactionService:
         :param recipient_address: 接收方地址
         :param amount: 發送 USDT 的數量(注意是美金單位)
         """
-        try:
-            # 將輸入的 USDT 金額轉換為最小單位
-            amount_in_wei = self.web3.to_wei(amount, "ether")  # 將 USDT 轉換為最小單位
-
-            # 確保地址是 checksum 地址
-            contract_address = Web3.to_checksum_address(USDT_CONTRACT_ADDRESS)
-            recipient_address = Web3.to_checksum_address(recipient_address)
-
-            # 準備合約 ABI（這裡假設 USDT 的標準 ERC20 ABI）
-            erc20_abi = [
-                {
-                    "constant": False,
-                    "inputs": [
-                        {"name": "_to", "type": "address"},
-                        {"name": "_value", "type": "uint256"},
-                    ],
-                    "name": "transfer",
-                    "outputs": [{"name": "", "type": "bool"}],
-                    "type": "function",
-                }
-            ]
-
-            # 建立合約物件
-            contract = self.web3.eth.contract(address=contract_address, abi=erc20_abi)
-
-            # 發送交易前獲取 nonce 值
-            sender_address = self.web3.eth.account.from_key(sender_private_key).address
-            nonce = self.web3.eth.get_transaction_count(sender_address)
+        return self.transfer_token(
+            sender_private_key,
+            recipient_address,
+            amount,
+            token_registry.get_by_symbol("USDT"),
+        )
 
-            # 準備交易的輸入數據（用於估算 gas）
-            transfer_function = contract.functions.transfer(
-                recipient_address, amount_in_wei
-            )
+    def transfer_token(
+        self, sender_private_key, recipient_address, amount: Decimal, token: TokenInfo
+    ) -> TransactionResult:
+        """
+        從用戶的錢包中轉帳 BEP-20 代幣到其他用戶的錢包
 
-            # 設定 gas price
-            gas_price = self.web3.eth.gas_price
-            gas_limit = transfer_function.estimate_gas(
-                {
-                    "from": sender_address,
-                    "nonce": nonce,
-                    "gasPrice": gas_price,
-                }
-            )
+        :param sender_private_key: 發送方的私鑰
+        :param recipient_address: 接收方地址
+        :param amount: 發送代幣的數量（代幣單位）
+        :param token: 代幣設定（合約地址與小數位數）
+        """
+        try:
+            # 將輸入的代幣金額依小數位數轉換為最小單位
+            amount_in_wei = token.to_base_units(amount)
 
-            # 為了安全起見，將 gas limit 增加一些餘量（例如增加 10%）
-            gas_limit = int(gas_limit * 1.1)
+            # 確保地址是 checksum 地址（快取，不重複計算 keccak）
+            contract_address = to_checksum_address(token.contract_address)
+            recipient_address = to_checksum_address(recipient_address)
+            sender_address = self.web3.eth.account.from_key(sender_private_key).address
 
-            # 建立交易資料
-            tx = transfer_function.build_transaction(
-                {
-                    "chainId": 56,  # BSC 主網的 Chain ID
-                    "gas": gas_limit,
-                    "gasPrice": gas_price,
-                    "nonce": nonce,
-                    "from": sender_address,
-                }
+            # 以預先計算的 selector 組成 transfer 的 calldata，不需建立合約物件
+            transfer_data = encode_transfer(recipient_address, amount_in_wei)
+
+            # 收款地址為核心錢包時必定已有餘額；其他地址無法得知，以新地址（較高用量）計算
+            gas_key = (
+                token.contract_address.lower(),
+                "transfer",
+                recipient_address.lower() != CORE_WALLET_ADDRESS.lower(),
             )
+            gas_limit = gas_limit_cache.get(gas_key)
+            try:
+                tx_hash, gas_limit, gas_price = self._send_transaction(
+                    contract_address,
+                    transfer_data,
+                    sender_address,
+                    sender_private_key,
+                    gas_limit,
+                )
+            except Exception as e:
+                # 只有節點明確拒絕（交易未被接受）時才改以 estimate_gas 重送；
+                # 結果不明（TransactionStatusUnknown）時重送可能重複轉帳
+                if gas_limit is None or not is_gas_rejection(e):
+                    raise
+                logger.warning(f"Cached gas limit rejected, estimating: {e}")
+                gas_limit_cache.invalidate(gas_key)
+                tx_hash, gas_limit, gas_price = self._send_transaction(
+                    contract_address, transfer_data, sender_address, sender_private_key
+                )
 
-            # 簽名交易
-            signed_tx = self.web3.eth.account.sign_transaction(tx, sender_private_key)
-            # 發送交易，使用 `signed_tx.rawTransaction` 來取得原始交易數據
-            tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
             # 獲取已使用的 gas
             tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
+            if tx_receipt.status != 1 and tx_receipt.gasUsed >= gas_limit:
+                # gas 不足而 revert（資金未轉出）：捨棄學習值，以 estimate_gas 重送
+                logger.warning(
+                    f"{self.web3.to_hex(tx_hash)} ran out of gas ({gas_limit}), "
+                    f"retrying with estimate_gas"
+                )
+                gas_limit_cache.invalidate(gas_key)
+                tx_hash, gas_limit, gas_price = self._send_transaction(
+                    contract_address, transfer_data, sender_address, sender_private_key
+                )
+                tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
+            if tx_receipt.status != 1:
+                # revert 的交易沒有轉出資金，不回傳 TxHash（與送出前失敗相同處理）
+                return TransactionResult(
+                    timestamp=datetime.now().isoformat(),
+                    success=False,
+                    error_message=f"交易失敗: {self.web3.to_hex(tx_hash)} reverted",
+                    sender_address=sender_address,
+                    recipient_address=recipient_address,
+                    amount=amount,
+                )
+            gas_limit_cache.observe(gas_key, tx_receipt.gasUsed)
             gas_used = self.web3.from_wei(tx_receipt.gasUsed * gas_price, "ether")
 
             # 返回交易編號
@@ -102,15 +129,68 @@ class TransactionService:
                 gas_used=gas_used.normalize(),
             )
         except Exception as e:
+            # 已廣播但等待收據失敗、或送出結果不明時保留 TxHash，呼叫端據此判斷資金是否可能已轉出
+            if isinstance(e, TransactionStatusUnknown):
+                unknown_tx_hash = e.tx_hash
+            elif "tx_hash" in locals():
+                unknown_tx_hash = self.web3.to_hex(tx_hash)
+            else:
+                unknown_tx_hash = None
             return TransactionResult(
                 timestamp=datetime.now().isoformat(),
                 success=False,
                 error_message=f"交易失敗: {str(e)}",
+                tx_hash=unknown_tx_hash,
                 sender_address=sender_address if "sender_address" in locals() else None,
                 recipient_address=recipient_address,
                 amount=amount,
             )
 
+    def _send_transaction(
+        self,
+        to_address: str,
+        data: bytes,
+        sender_address: str,
+        sender_private_key,
+        gas_limit: Optional[int] = None,
+    ) -> tuple[HexBytes, int, int]:
+        """
+        簽名並送出合約呼叫；未提供 gas_limit 時以 estimate_gas 估算
+
+        交易只簽名一次，連線錯誤時重送同一筆已簽名交易（見 broadcast）。
+
+        :param to_address: 合約地址（checksum）
+        :param data: calldata
+        :return: (TxHash, gas limit, gas price)
+        :raises TransactionStatusUnknown: 已簽名但無法確認節點是否接受
+        """
+        # 建立交易資料
+        tx = {
+            "chainId": 56,  # BSC 主網的 Chain ID
+            "to": to_address,
+            "data": data,
+            "value": 0,
+            "gasPrice": self.web3.eth.gas_price,
+        }
+        if gas_limit is None:
+            # 為了安全起見，將 gas limit 增加一些餘量（例如增加 10%）
+            gas_limit = int(
+                self.web3.eth.estimate_gas({**tx, "from": sender_address}) * 1.1
+            )
+        tx["gas"] = gas_limit
+
+        def sign_and_send(nonce: int) -> HexBytes:
+            # 簽名交易
+            signed_tx = self.web3.eth.account.sign_transaction(
+                {**tx, "nonce": nonce}, sender_private_key
+            )
+            # 發送交易，使用 `signed_tx.rawTransaction` 來取得原始交易數據
+            return broadcast(self.web3, signed_tx)
+
+        # 核心錢包的 nonce 由共用的配發器決定，避免與批次提領、補 gas 同時送出時重複
+        tx_hash = send_with_nonce(self.web3, sender_address, sign_and_send)
+        return tx_hash, gas_limit, tx["gasPrice"]
+
     def transfer_bnb(
         self, sender_private_key, recipient_address, amount: Decimal
     ) -> TransactionResult:
@@ -124,7 +204,7 @@ class TransactionService:
         try:
             # 將地址轉換為 checksum 地址
             sender_address = self.web3.eth.account.from_key(sender_private_key).address
-            recipient_address = Web3.to_checksum_address(recipient_address)
+            recipient_address = to_checksum_address(recipient_address)
 
             # 設定交易的 nonce 值
             nonce = self.web3.eth.get_transaction_count(sender_address)
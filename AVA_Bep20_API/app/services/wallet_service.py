@@ -1,40 +1,13 @@
-from web3 import Web3
 from decimal import Decimal
-from app.core.config import settings
-
-# 環境變數設定
-BSC_NODE_URL = settings.BSC_MAINNET_NODE_URL
-
-# BEP-20 代幣的標準 ABI
-BEP20_ABI = [
-    {
-        "constant": True,
-        "inputs": [{"name": "_owner", "type": "address"}],
-        "name": "balanceOf",
-        "outputs": [{"name": "balance", "type": "uint256"}],
-        "type": "function",
-    },
-    {
-        "constant": True,
-        "inputs": [],
-        "name": "decimals",
-        "outputs": [{"name": "", "type": "uint8"}],
-        "type": "function",
-    },
-]
-
-# 預設代幣清單（包括 BNB 和 USDT）
-TOKEN_LIST = [
-    {"symbol": "BNB", "address": None},
-    {"symbol": "USDT", "address": settings.USDT_CONTRACT_ADDRESS},
-]
+from app.core.web3_client import get_web3
+from app.services.token_registry import token_registry
+from app.utils.contracts import chain_objects
 
 
 class WalletService:
     def __init__(self):
-        self.web3 = Web3(Web3.HTTPProvider(BSC_NODE_URL))
-        if not self.web3.is_connected():
-            raise ConnectionError("無法連接到 BSC 節點")
+        # 共用的 Web3 實例；不在每個請求檢查連線，節點狀態由 /readyz 回報
+        self.web3 = get_web3()
 
     def create_wallet(self) -> tuple[str, str]:
         """
@@ -50,32 +23,28 @@ class WalletService:
 
     def get_asset_balances_from_blockchain(self, wallet_address: str) -> list[dict]:
         """
-        查詢指定 BEP20 子錢包的所有資產餘額，包含 BNB 和 USDT。
+        查詢指定 BEP20 子錢包的所有資產餘額，幣種與小數位數來自 token_registry。
         資產順序：USDT 優先，其他資產按順序返回。
         """
         assets = []
 
-        for token in TOKEN_LIST:
+        for token in token_registry.tokens:
             try:
-                if token["address"] is None:  # 處理 BNB
+                if token.is_native:  # 處理 BNB
                     balance = self.web3.eth.get_balance(wallet_address)
                     balance_in_ether = Decimal(self.web3.from_wei(balance, "ether"))
-                    assets.append({"symbol": "BNB", "balance": balance_in_ether})
+                    assets.append({"symbol": token.symbol, "balance": balance_in_ether})
                 else:  # 處理 BEP-20 代幣
-                    contract = self.web3.eth.contract(
-                        address=Web3.to_checksum_address(token["address"]),
-                        abi=BEP20_ABI,
-                    )
+                    contract = chain_objects.erc20(self.web3, token.contract_address)
                     balance = contract.functions.balanceOf(wallet_address).call()
-                    decimals = contract.functions.decimals().call()
-                    balance_in_token = Decimal(balance) / Decimal(10**decimals)
                     assets.append(
-                        {"symbol": token["symbol"], "balance": balance_in_token}
+                        {
+                            "symbol": token.symbol,
+                            "balance": token.from_base_units(balance),
+                        }
                     )
             except Exception as e:
-                assets.append(
-                    {"symbol": token["symbol"], "balance": f"Error: {str(e)}"}
-                )
+                assets.append({"symbol": token.symbol, "balance": f"Error: {str(e)}"})
 
         # 調整順序：USDT 優先
         sorted_assets = sorted(assets, key=lambda x: x["symbol"] != "USDT")
@@ -0,0 +1,127 @@
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from web3 import Web3
+    from web3.contract import Contract
+
+# 標準 ERC-20 / BEP-20 ABI（僅列出本系統使用的方法）
+ERC20_ABI = [
+    {
+        "constant": False,
+        "inputs": [
+            {"name": "_to", "type": "address"},
+            {"name": "_value", "type": "uint256"},
+        ],
+        "name": "transfer",
+        "outputs": [{"name": "", "type": "bool"}],
+        "type": "function",
+    },
+    {
+        "constant": True,
+        "inputs": [{"name": "_owner", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"name": "balance", "type": "uint256"}],
+        "type": "function",
+    },
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "decimals",
+        "outputs": [{"name": "", "type": "uint8"}],
+        "type": "function",
+    },
+    {
+        "constant": True,
+        "inputs": [
+            {"name": "_owner", "type": "address"},
+            {"name": "_spender", "type": "address"},
+        ],
+        "name": "allowance",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "type": "function",
+    },
+    {
+        "constant": False,
+        "inputs": [
+            {"name": "_spender", "type": "address"},
+            {"name": "_value", "type": "uint256"},
+        ],
+        "name": "approve",
+        "outputs": [{"name": "", "type": "bool"}],
+        "type": "function",
+    },
+]
+
+# 預先計算的方法 selector，熱路徑上直接組 calldata，不經過 ABI 編碼
+TRANSFER_SELECTOR = bytes.fromhex(settings.TRANSFER_METHOD_ID.removeprefix("0x"))
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")  # keccak("balanceOf(address)")[:4]
+
+
+@lru_cache(maxsize=settings.CHECKSUM_ADDRESS_CACHE_SIZE)
+def _checksum(address: str) -> str:
+    # 匯入本模組時不載入 web3，快取未命中時才需要
+    from web3 import Web3
+
+    return Web3.to_checksum_address(address)
+
+
+def to_checksum_address(address: str) -> str:
+    """
+    Web3.to_checksum_address 加上 LRU 快取（每次轉換需計算一次 keccak）
+
+    以小寫地址為快取鍵，同一地址不論輸入大小寫只計算一次。
+    """
+    return _checksum(address.lower())
+
+
+def address_word(address: str) -> bytes:
+    """
+    將地址編碼為 ABI 的 32 bytes 參數
+    """
+    return bytes.fromhex(address[2:]).rjust(32, b"\0")
+
+
+def encode_transfer(recipient_address: str, amount: int) -> bytes:
+    """
+    組成 transfer(address,uint256) 的 calldata
+    """
+    return (
+        TRANSFER_SELECTOR + address_word(recipient_address) + amount.to_bytes(32, "big")
+    )
+
+
+def encode_balance_of(owner: str) -> bytes:
+    """
+    組成 balanceOf(address) 的 calldata
+    """
+    return BALANCE_OF_SELECTOR + address_word(owner)
+
+
+class ChainObjects:
+    """
+    快取合約物件：web3.eth.contract 每次都會解析 ABI 並建立新的類別，
+    同一 (Web3 實例, 合約地址) 只建立一次
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contracts: dict[tuple["Web3", str], "Contract"] = {}
+
+    def erc20(self, web3: "Web3", address: str) -> "Contract":
+        key = (web3, address.lower())
+        contract = self._contracts.get(key)
+        if contract is None:
+            with self._lock:
+                contract = self._contracts.get(key)
+                if contract is None:
+                    contract = web3.eth.contract(
+                        address=to_checksum_address(address), abi=ERC20_ABI
+                    )
+                    self._contracts[key] = contract
+        return contract
+
+
+chain_objects = ChainObjects()
@@ -0,0 +1,123 @@
+from typing import TYPE_CHECKING
+from app.core.config import settings
+from app.utils.contracts import chain_objects, to_checksum_address
+from app.utils.transactions import TransactionStatusUnknown, broadcast, send_with_nonce
+
+if TYPE_CHECKING:
+    from web3 import Web3
+    from web3.types import TxReceipt
+
+# Disperse（https://disperse.app）：一筆交易轉給多個地址
+# disperseToken 以 transferFrom 從呼叫者轉出，需先 approve 合約
+DISPERSE_ABI = [
+    {
+        "inputs": [
+            {"name": "recipients", "type": "address[]"},
+            {"name": "values", "type": "uint256[]"},
+        ],
+        "name": "disperseEther",
+        "outputs": [],
+        "stateMutability": "payable",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"name": "token", "type": "address"},
+            {"name": "recipients", "type": "address[]"},
+            {"name": "values", "type": "uint256[]"},
+        ],
+        "name": "disperseToken",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+]
+
+MAX_UINT256 = 2**256 - 1
+
+
+class Disperse:
+    """
+    以 Disperse 合約批次轉帳，由 private_key 對應的錢包簽名送出
+    """
+
+    def __init__(self, web3: "Web3", private_key: str, address: str = None):
+        self.web3 = web3
+        self.private_key = private_key
+        self.sender_address = web3.eth.account.from_key(private_key).address
+        address = address or settings.DISPERSE_CONTRACT_ADDRESS
+        if not address:
+            raise ValueError("DISPERSE_CONTRACT_ADDRESS is not configured")
+        self.address = to_checksum_address(address)
+        self.contract = web3.eth.contract(address=self.address, abi=DISPERSE_ABI)
+
+    def ensure_allowance(self, token_address: str, amount: int):
+        """
+        核心錢包對 Disperse 的代幣授權不足時，授權最大額度（只需一次）
+        """
+        token = chain_objects.erc20(self.web3, token_address)
+        allowance = token.functions.allowance(self.sender_address, self.address).call()
+        if allowance >= amount:
+            return
+        tx_hash, receipt, _ = self.send(
+            token.functions.approve(self.address, MAX_UINT256)
+        )
+        if receipt.status != 1:
+            raise RuntimeError(f"Approve for Disperse reverted: {tx_hash}")
+
+    def disperse_token(
+        self, token_address: str, recipients: list[str], values: list[int]
+    ) -> tuple[str, "TxReceipt", int]:
+        return self.send(
+            self.contract.functions.disperseToken(
+                to_checksum_address(token_address),
+                [to_checksum_address(recipient) for recipient in recipients],
+                values,
+            )
+        )
+
+    def disperse_ether(
+        self, recipients: list[str], values: list[int]
+    ) -> tuple[str, "TxReceipt", int]:
+        return self.send(
+            self.contract.functions.disperseEther(
+                [to_checksum_address(recipient) for recipient in recipients],
+                values,
+            ),
+            value=sum(values),
+        )
+
+    def send(self, function, value: int = 0) -> tuple[str, "TxReceipt", int]:
+        """
+        估算 gas、簽名並送出合約呼叫，等待收據
+
+        估算 gas 失敗或節點明確拒絕時交易未被接受，直接拋出原本的例外；
+        簽名之後的其他失敗（送出逾時、等待收據失敗）一律視為結果不明。
+
+        :return: (TxHash, 收據, gas price)
+        :raises TransactionStatusUnknown: 交易可能已送出，結果不明
+        """
+        gas_price = self.web3.eth.gas_price
+        params = {
+            "from": self.sender_address,
+            "gasPrice": gas_price,
+            "value": value,
+        }
+        # 與 transfer_token 相同，gas limit 增加 10% 餘量
+        gas_limit = int(function.estimate_gas(params) * 1.1)
+
+        def sign_and_send(nonce: int):
+            tx = function.build_transaction(
+                {**params, "nonce": nonce, "chainId": 56, "gas": gas_limit}
+            )
+            signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
+            return broadcast(self.web3, signed_tx)
+
+        tx_hash = self.web3.to_hex(
+            send_with_nonce(self.web3, self.sender_address, sign_and_send)
+        )
+        try:
+            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
+        except Exception as e:
+            raise TransactionStatusUnknown(tx_hash, str(e)) from e
+        return tx_hash, receipt, gas_price
@@ -0,0 +1,148 @@
+from typing import TYPE_CHECKING, Optional
+from app.core.config import settings
+from app.core.logger import logger
+from app.utils.contracts import address_word, encode_balance_of, to_checksum_address
+
+if TYPE_CHECKING:
+    from web3 import Web3
+
+# Multicall3 只需要 aggregate3，其餘唯讀呼叫以原始 calldata 組成
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    }
+]
+
+# keccak("getEthBalance(address)")[:4]
+GET_ETH_BALANCE_SELECTOR = bytes.fromhex("4d2301cc")
+
+
+class Multicall:
+    """
+    以 Multicall3 的 aggregate3 將多個唯讀呼叫合併為一次 eth_call
+
+    MULTICALL3_ADDRESS 為空時退回逐一呼叫，結果格式相同。
+    """
+
+    def __init__(self, web3: "Web3", address: str = None, batch_size: int = None):
+        self.web3 = web3
+        address = settings.MULTICALL3_ADDRESS if address is None else address
+        self.address = to_checksum_address(address) if address else None
+        self.batch_size = max(1, batch_size or settings.MULTICALL_BATCH_SIZE)
+        self.contract = (
+            web3.eth.contract(address=self.address, abi=MULTICALL3_ABI)
+            if self.address
+            else None
+        )
+
+    def aggregate(self, calls: list[tuple[str, bytes]]) -> list[Optional[bytes]]:
+        """
+        執行多個唯讀呼叫，個別失敗的呼叫回傳 None
+
+        :param calls: (合約地址, calldata) 列表
+        """
+        results = []
+        for start in range(0, len(calls), self.batch_size):
+            batch = calls[start : start + self.batch_size]
+            if self.contract is None:
+                results.extend(self._call_each(batch))
+                continue
+            response = self.contract.functions.aggregate3(
+                [(to_checksum_address(target), True, data) for target, data in batch]
+            ).call()
+            results.extend(
+                bytes(return_data) if success else None
+                for success, return_data in response
+            )
+        return results
+
+    def _call_each(self, calls: list[tuple[str, bytes]]) -> list[Optional[bytes]]:
+        results = []
+        for target, data in calls:
+            try:
+                results.append(
+                    bytes(
+                        self.web3.eth.call(
+                            {"to": to_checksum_address(target), "data": data}
+                        )
+                    )
+                )
+            except Exception as e:
+                logger.warning(f"eth_call to {target} failed: {e}")
+                results.append(None)
+        return results
+
+    def get_balances(
+        self, queries: list[tuple[Optional[str], str]]
+    ) -> list[Optional[int]]:
+        """
+        批次查詢餘額（最小單位），查詢失敗的項目回傳 None
+
+        :param queries: (代幣合約地址, 持有者地址) 列表，合約地址為 None 表示 BNB
+        """
+        if self.contract is None:
+            # 沒有 Multicall3 時無法以 eth_call 查詢 BNB 餘額，改用 eth_getBalance
+            token_balances = iter(
+                self._decode_uint(data)
+                for data in self._call_each(
+                    [
+                        (contract, encode_balance_of(owner))
+                        for contract, owner in queries
+                        if contract is not None
+                    ]
+                )
+            )
+            return [
+                (
+                    self._get_native_balance(owner)
+                    if contract is None
+                    else next(token_balances)
+                )
+                for contract, owner in queries
+            ]
+
+        calls = [
+            (
+                (self.address, GET_ETH_BALANCE_SELECTOR + address_word(owner))
+                if contract is None
+                else (contract, encode_balance_of(owner))
+            )
+            for contract, owner in queries
+        ]
+        return [self._decode_uint(data) for data in self.aggregate(calls)]
+
+    def _get_native_balance(self, owner: str) -> Optional[int]:
+        try:
+            return self.web3.eth.get_balance(to_checksum_address(owner))
+        except Exception as e:
+            logger.warning(f"eth_getBalance for {owner} failed: {e}")
+            return None
+
+    @staticmethod
+    def _decode_uint(data: Optional[bytes]) -> Optional[int]:
+        if data is None or len(data) < 32:
+            return None
+        return int.from_bytes(data[:32], "big")
@@ -0,0 +1,134 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Optional, TypeVar
+from app.core.config import settings
+from app.core.logger import logger
+
+if TYPE_CHECKING:
+    from hexbytes import HexBytes
+    from web3 import Web3
+
+T = TypeVar("T")
+
+# 節點回覆以下錯誤時交易未被接受，nonce 可重新同步後重送
+NONCE_REJECTIONS = ("nonce too low", "replacement transaction underpriced")
+# 節點以以下錯誤拒絕時交易未被接受，可改以 estimate_gas 的 gas limit 重送
+GAS_REJECTIONS = ("intrinsic gas too low", "out of gas", "gas required exceeds")
+# 送出已簽名交易遇到連線錯誤或逾時時，以同一筆交易重送的次數
+BROADCAST_ATTEMPTS = 3
+
+
+class TransactionStatusUnknown(Exception):
+    """
+    交易已簽名且可能已被節點接受，但未確認送出結果或未取得收據，結果不明
+
+    呼叫端不可再以新交易重送（可能重複轉帳），應保留 tx_hash 待對帳。
+    """
+
+    def __init__(self, tx_hash: str, message: str):
+        super().__init__(message)
+        self.tx_hash = tx_hash
+
+
+def _is_rpc_error(error: Exception) -> bool:
+    from web3.exceptions import Web3RPCError
+
+    return isinstance(error, Web3RPCError)
+
+
+def is_nonce_rejection(error: Exception) -> bool:
+    message = str(error).lower()
+    return _is_rpc_error(error) and any(
+        rejection in message for rejection in NONCE_REJECTIONS
+    )
+
+
+def is_gas_rejection(error: Exception) -> bool:
+    message = str(error).lower()
+    return _is_rpc_error(error) and any(
+        rejection in message for rejection in GAS_REJECTIONS
+    )
+
+
+def broadcast(web3: "Web3", signed_tx) -> "HexBytes":
+    """
+    送出已簽名的交易
+
+    - 節點明確拒絕（Web3RPCError）時交易未被接受，直接拋出
+    - 連線錯誤或逾時時節點可能已接受，以同一筆已簽名交易重送（hash 相同，不會重複轉帳）；
+      重送後被拒絕或仍失敗時拋出 TransactionStatusUnknown
+    """
+    for attempt in range(1, BROADCAST_ATTEMPTS + 1):
+        try:
+            return web3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        except Exception as e:
+            if not _is_rpc_error(e):
+                # 連線錯誤或逾時：節點可能已接受，重送同一筆交易
+                if attempt < BROADCAST_ATTEMPTS:
+                    logger.warning(
+                        f"Broadcast of {web3.to_hex(signed_tx.hash)} failed, "
+                        f"resending the same transaction: {e}"
+                    )
+                    time.sleep(0.5 * attempt)
+                    continue
+            elif "already known" in str(e).lower():
+                # 先前逾時的送出已被節點接受
+                return signed_tx.hash
+            elif attempt == 1:
+                # 節點明確拒絕，交易未被接受
+                raise
+            # 重送後被拒絕（先前的送出可能已上鏈，例如回覆 nonce too low）或重送次數用盡
+            raise TransactionStatusUnknown(web3.to_hex(signed_tx.hash), str(e)) from e
+
+
+class NonceAllocator:
+    """
+    依序配發單一錢包的 nonce，同一 process 內所有由該錢包送出的交易共用
+
+    - 第一次使用時以 'pending' 交易數為起點，之後在記憶體中遞增
+    - 送出失敗時下次重新以 'pending' 同步；節點回覆 nonce too low
+      （例如其他 process 以同一錢包送出）時同步後重試一次
+    - 簽名與送出期間持有鎖，等待收據不持有
+    """
+
+    def __init__(self, address: str):
+        self.address = address
+        self._lock = threading.Lock()
+        self._next: Optional[int] = None
+
+    def send(self, web3: "Web3", sign_and_send: Callable[[int], T]) -> T:
+        """
+        以配發的 nonce 呼叫 sign_and_send(nonce)，成功後 nonce 才遞增
+        """
+        with self._lock:
+            for attempt in range(2):
+                if self._next is None:
+                    self._next = web3.eth.get_transaction_count(self.address, "pending")
+                nonce = self._next
+                try:
+                    result = sign_and_send(nonce)
+                except Exception as e:
+                    self._next = None
+                    if attempt == 0 and is_nonce_rejection(e):
+                        logger.warning(
+                            f"Nonce {nonce} of {self.address} rejected, resyncing: {e}"
+                        )
+                        continue
+                    raise
+                self._next = nonce + 1
+                return result
+
+
+# 核心錢包同時由批次提領、單筆提領與補 gas（監聽與回補 CLI 的歸集前）送出交易
+core_wallet_nonces = NonceAllocator(settings.CORE_WALLET_ADDRESS)
+
+
+def send_with_nonce(
+    web3: "Web3", sender_address: str, sign_and_send: Callable[[int], T]
+) -> T:
+    """
+    核心錢包經由 core_wallet_nonces 配發 nonce；子錢包同一時間只有一筆歸集，直接以 'pending' 取得
+    """
+    if sender_address.lower() == core_wallet_nonces.address.lower():
+        return core_wallet_nonces.send(web3, sign_and_send)
+    return sign_and_send(web3.eth.get_transaction_count(sender_address, "pending"))
@@ -0,0 +1,525 @@
+"""
+API 負載測試
+
+以 uvicorn 在本機啟動完整的 FastAPI 應用，節點為 JSON-RPC 替身、資料庫為 SQLite，
+預先寫入指定數量的用戶、子錢包、餘額與交易記錄，再以多個並行的已驗證用戶端持續送出請求，
+回報每個路由的 RPS 與延遲百分位數，用於比較 service / repository 層改版前後的差異：
+
+    cd AVA_Bep20_API
+    python -m benchmarks.api_load_test --users 1000 --transactions-per-user 20 \\
+        --concurrency 50 --duration 30
+    python -m benchmarks.api_load_test --routes balance-from-system,withdraw-usdt --json
+    python -m benchmarks.api_load_test --rpc-latency-ms 50 --database-url sqlite:///load.db
+
+- 驗證：get_current_user 以 dependency override 取代，Bearer token 即為 AccountID
+- /withdraw-usdt 的存儲程序 core_wallet_WithdrawTransaction 在 SQLite 不存在，
+  以等效的 UPDATE + INSERT 取代（LoadTestTransactionRepository）
+- /wallet/create 的私鑰加密預設以固定字串取代（不在量測範圍內），--real-encryption 改用實際實作
+- 預設不執行 lifespan（不啟動區塊監聽等背景工作），--with-lifespan 可一併量測其影響
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from benchmarks.fake_chain import FakeChain, FakeRPCServer
+from benchmarks.offline import (
+    configure_offline_environment,
+    create_offline_tables,
+    percentile,
+)
+
+ROUTES = {
+    "wallet-create": ("POST", "/api/v1/wallet/create"),
+    "balance-from-blockchain": ("GET", "/api/v1/wallet/balance-from-blockchain"),
+    "balance-from-system": ("GET", "/api/v1/wallet/balance-from-system"),
+    "withdraw-usdt": ("POST", "/api/v1/transaction/withdraw-usdt"),
+}
+
+# 每位用戶的初始餘額（足夠整個測試期間提領）
+SEED_USDT_BALANCE = 10**9
+SEED_BNB_BALANCE = 10
+WITHDRAW_AMOUNT = 11
+
+
+def _random_address(rng: random.Random) -> str:
+    return "0x" + rng.getrandbits(160).to_bytes(20, "big").hex()
+
+
+def _random_hash(rng: random.Random) -> str:
+    return "0x" + rng.getrandbits(256).to_bytes(32, "big").hex()
+
+
+def configure_sqlite(engine):
+    """
+    SQLite 預設一次只允許一個寫入者，改用 WAL 並等待鎖，避免並行提領直接失敗
+    """
+    from sqlalchemy import event
+
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=10000")
+        cursor.close()
+
+
+def seed_database(
+    chain: FakeChain, user_count: int, transactions_per_user: int, seed: int
+) -> list[str]:
+    """
+    建立資料表並寫入用戶、子錢包、餘額與交易記錄，子錢包的鏈上 USDT 餘額同步寫入替身節點
+
+    :return: 已有子錢包的 AccountID 列表
+    """
+    from sqlalchemy import insert
+    from app.db.session import SessionLocal
+    from app.models.core_wallet_balance import CoreWalletBalance
+    from app.models.core_wallet_currency import CoreWalletCurrency
+    from app.models.core_wallet_sub_wallet import CoreWalletSubWallet
+    from app.models.core_wallet_transaction import (
+        CoreWalletTransaction,
+        TransactionTypeEnum,
+    )
+
+    accounts_table = create_offline_tables()
+
+    rng = random.Random(seed)
+    now = datetime.now()
+    accounts = [f"loadtest-{index + 1}" for index in range(user_count)]
+    addresses = [_random_address(rng) for _ in accounts]
+    for address in addresses:
+        chain.token_balances[address] = rng.randrange(1, 1000) * 10**18
+
+    def chunked(rows: list[dict], size: int = 5000):
+        for start in range(0, len(rows), size):
+            yield rows[start : start + size]
+
+    with SessionLocal() as session:
+        session.execute(
+            insert(CoreWalletCurrency),
+            [
+                {"CurrencyID": 1, "CurrencyCode": "BNB", "Decimals": 18},
+                {
+                    "CurrencyID": 2,
+                    "CurrencyCode": "USDT",
+                    "ContractAddress": chain.token_address,
+                    "Decimals": 18,
+                },
+            ],
+        )
+        for rows in chunked(
+            [
+                {
+                    "AccountID": account,
+                    "Password": "",
+                    "Name": account,
+                    "CreateTime": now,
+                }
+                for account in accounts
+            ]
+        ):
+            session.execute(insert(accounts_table), rows)
+        for rows in chunked(
+            [
+                {
+                    "SubWalletID": index + 1,
+                    "AccountID": account,
+                    "SubWalletAddress": address,
+                    "EncryptedPrivateKey": "",
+                    "KeyMaterial": "",
+                    "Salt": "",
+                }
+                for index, (account, address) in enumerate(zip(accounts, addresses))
+            ]
+        ):
+            session.execute(insert(CoreWalletSubWallet), rows)
+        for rows in chunked(
+            [
+                {
+                    "SubWalletID": index + 1,
+                    "CurrencyID": currency_id,
+                    "AvailableBalance": balance,
+                    "LockedBalance": 0,
+                    "LastUpdatedTime": now,
+                }
+                for index in range(user_count)
+                for currency_id, balance in (
+                    (1, SEED_BNB_BALANCE),
+                    (2, SEED_USDT_BALANCE),
+                )
+            ]
+        ):
+            session.execute(insert(CoreWalletBalance), rows)
+        for rows in chunked(
+            [
+                {
+                    "SubWalletID": index + 1,
+                    "CurrencyID": 2,
+                    "RecipientAddress": _random_address(rng),
+                    "Amount": rng.randrange(10, 1000),
+                    "GasUsed": 0,
+                    "TxHash": _random_hash(rng),
+                    "TransactionType": rng.choice(
+                        (TransactionTypeEnum.deposit, TransactionTypeEnum.withdrawal)
+                    ),
+                    "Success": True,
+                    "CreateTime": now,
+                }
+                for index in range(user_count)
+                for _ in range(transactions_per_user)
+            ]
+        ):
+            session.execute(insert(CoreWalletTransaction), rows)
+        session.commit()
+    return accounts
+
+
+def build_app(real_encryption: bool):
+    """
+    取得應用並套用負載測試用的 override（必須在設定環境變數之後呼叫）
+    """
+    from decimal import Decimal
+    from fastapi import Header
+    from sqlalchemy import insert, update
+    from app.main import app
+    from app.core.dependencies import get_transaction_repository
+    from app.core.security import get_current_user
+    from app.db.session import SessionLocal
+    from app.models.core_wallet_balance import CoreWalletBalance
+    from app.models.core_wallet_transaction import (
+        CoreWalletTransaction,
+        TransactionTypeEnum,
+    )
+    from app.repositories.transaction_repository import TransactionRepository
+    import app.api.v1.wallet_controller as wallet_controller
+
+    class LoadTestTransactionRepository(TransactionRepository):
+        """
+        以 UPDATE + INSERT 取代存儲程序 core_wallet_WithdrawTransaction
+        """
+
+        def finalize_withdraw_transaction(
+            self,
+            from_sub_wallet_id: int,
+            currency_id: int,
+            to_address: str,
+            amount: Decimal,
+            gas_used: Decimal,
+            fee: Decimal,
+            tx_hash: str,
+        ):
+            now = datetime.now()
+            with SessionLocal() as session:
+                try:
+                    result = session.execute(
+                        update(CoreWalletBalance)
+                        .where(
+                            (CoreWalletBalance.SubWalletID == from_sub_wallet_id)
+                            & (CoreWalletBalance.CurrencyID == currency_id)
+                            & (CoreWalletBalance.LockedBalance >= amount)
+                        )
+                        .values(
+                            LockedBalance=CoreWalletBalance.LockedBalance - amount,
+                            LastUpdatedTime=now,
+                        )
+                    )
+                    if result.rowcount != 1:
+                        raise ValueError(
+                            f"No reserved balance of {amount} for "
+                            f"SubWalletID={from_sub_wallet_id}"
+                        )
+                    session.execute(
+                        insert(CoreWalletTransaction).values(
+                            SubWalletID=from_sub_wallet_id,
+                            CurrencyID=currency_id,
+                            RecipientAddress=to_address,
+                            Amount=amount,
+                            GasUsed=gas_used,
+                            TxHash=tx_hash,
+                            TransactionType=TransactionTypeEnum.withdrawal,
+                            Success=True,
+                            CreateTime=now,
+                        )
+                    )
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    raise e
+
+    async def current_user(authorization: str = Header(...)) -> str:
+        return authorization.removeprefix("Bearer ")
+
+    app.dependency_overrides[get_current_user] = current_user
+    app.dependency_overrides[get_transaction_repository] = LoadTestTransactionRepository
+    if not real_encryption:
+        wallet_controller.encrypt_wallet_address = lambda private_key: (
+            "loadtest",
+            "loadtest",
+            "loadtest",
+        )
+    return app
+
+
+class ServerThread:
+    """
+    在背景執行緒以 uvicorn 執行應用（僅綁定 127.0.0.1 的隨機埠）
+    """
+
+    def __init__(self, app, with_lifespan: bool):
+        import uvicorn
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.bind(("127.0.0.1", 0))
+        config = uvicorn.Config(
+            app,
+            log_level="warning",
+            access_log=False,
+            lifespan="on" if with_lifespan else "off",
+        )
+        self.server = uvicorn.Server(config)
+        self._thread = threading.Thread(
+            target=self.server.run, kwargs={"sockets": [self._socket]}, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, timeout: float = 30):
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("API server failed to start")
+            time.sleep(0.05)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self._thread.join(timeout=30)
+        self._socket.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class LoadGenerator:
+    """
+    並行送出請求並記錄每個路由的延遲與狀態碼
+    """
+
+    def __init__(self, base_url: str, accounts: list[str], routes: list[str], seed):
+        self.base_url = base_url
+        self.accounts = accounts
+        self.routes = routes
+        self.rng = random.Random(seed)
+        self.latencies: dict[str, list[float]] = {route: [] for route in routes}
+        self.statuses: dict[str, Counter] = {route: Counter() for route in routes}
+        self.failures: dict[str, str] = {}
+        self._new_accounts = 0
+
+    def build_request(self, route: str) -> tuple[str, str, dict, dict]:
+        method, path = ROUTES[route]
+        if route == "wallet-create":
+            # 每次以尚未建立子錢包的新帳號建立
+            self._new_accounts += 1
+            account = f"loadtest-new-{self._new_accounts}"
+        else:
+            account = self.rng.choice(self.accounts)
+        body = None
+        if route == "withdraw-usdt":
+            body = {
+                "recipient_address": _random_address(self.rng),
+                "amount": WITHDRAW_AMOUNT,
+            }
+        return method, path, {"Authorization": f"Bearer {account}"}, body
+
+    async def send(self, session, route: str, record: bool = True) -> int:
+        method, path, headers, body = self.build_request(route)
+        start = time.perf_counter()
+        try:
+            async with session.request(
+                method, self.base_url + path, headers=headers, json=body
+            ) as response:
+                payload = await response.read()
+                status = response.status
+        except Exception as e:
+            payload = str(e).encode()
+            status = 0
+        elapsed = time.perf_counter() - start
+        if status >= 400 or status == 0:
+            self.failures.setdefault(route, payload[:500].decode(errors="replace"))
+        if record:
+            self.latencies[route].append(elapsed)
+            self.statuses[route][status] += 1
+        return status
+
+    async def run(
+        self, concurrency: int, duration: float, max_requests: int, after_warmup=None
+    ) -> float:
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            # 暖機：每個路由先送一次，不列入統計
+            for route in self.routes:
+                await self.send(session, route, record=False)
+            if after_warmup is not None:
+                after_warmup()
+
+            deadline = time.perf_counter() + duration
+            sent = 0
+
+            async def worker():
+                nonlocal sent
+                while time.perf_counter() < deadline and (
+                    not max_requests or sent < max_requests
+                ):
+                    sent += 1
+                    await self.send(session, self.rng.choice(self.routes))
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return time.perf_counter() - started
+
+
+def summarize(generator: LoadGenerator, elapsed: float, chain: FakeChain) -> dict:
+    routes = {}
+    for route in generator.routes:
+        latencies = generator.latencies[route]
+        statuses = generator.statuses[route]
+        errors = sum(
+            count for status, count in statuses.items() if status >= 400 or status == 0
+        )
+        routes[route] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p90_ms": percentile(latencies, 90) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": max(latencies, default=0.0) * 1000,
+            "statuses": {str(status): count for status, count in statuses.items()},
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {
+        "elapsed_s": elapsed,
+        "requests": total,
+        "rps": total / elapsed if elapsed else 0.0,
+        "rpc_calls_per_request": (
+            sum(chain.method_counts.values()) / total if total else 0.0
+        ),
+        "rpc_calls_by_method": dict(chain.method_counts.most_common()),
+        "routes": routes,
+        "first_failures": generator.failures,
+    }
+
+
+def print_report(result: dict):
+    print(
+        f"elapsed: {result['elapsed_s']:.2f} s, requests: {result['requests']}, "
+        f"throughput: {result['rps']:.1f} req/s, "
+        f"rpc calls / request: {result['rpc_calls_per_request']:.2f}"
+    )
+    print(
+        f"{'route':<24} {'requests':>8} {'errors':>7} {'rps':>8} "
+        f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    )
+    for route, stats in result["routes"].items():
+        print(
+            f"{route:<24} {stats['requests']:>8} {stats['errors']:>7} "
+            f"{stats['rps']:>8.1f} {stats['p50_ms']:>8.2f} {stats['p90_ms']:>8.2f} "
+            f"{stats['p99_ms']:>8.2f} {stats['max_ms']:>8.2f}"
+        )
+    for route, message in result["first_failures"].items():
+        print(f"first failure of {route}: {message}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=1000, help="預先建立的用戶數")
+    parser.add_argument(
+        "--transactions-per-user", type=int, default=20, help="每位用戶的交易記錄數"
+    )
+    parser.add_argument(
+        "--routes",
+        default=",".join(ROUTES),
+        help=f"以逗號分隔的路由（{', '.join(ROUTES)}），隨機平均分配",
+    )
+    parser.add_argument("--concurrency", type=int, default=50, help="並行用戶端數量")
+    parser.add_argument("--duration", type=float, default=30, help="量測秒數")
+    parser.add_argument(
+        "--max-requests", type=int, default=0, help="請求數上限，0 表示不限制"
+    )
+    parser.add_argument(
+        "--rpc-latency-ms", type=float, default=0.0, help="模擬節點往返延遲"
+    )
+    parser.add_argument(
+        "--database-url", help="預設為暫存目錄中的 SQLite 檔案（需為空資料庫）"
+    )
+    parser.add_argument("--real-encryption", action="store_true")
+    parser.add_argument("--with-lifespan", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="輸出 JSON 供 CI 比較")
+    args = parser.parse_args(argv)
+    args.routes = [route.strip() for route in args.routes.split(",") if route.strip()]
+    unknown = [route for route in args.routes if route not in ROUTES]
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    chain = FakeChain.synthetic(
+        block_count=1, txs_per_block=0, monitored_count=0, seed=args.seed
+    )
+    chain.latency = args.rpc_latency_ms / 1000
+
+    with FakeRPCServer(chain) as rpc_server:
+        configure_offline_environment(
+            rpc_server.url, chain.token_address, args.database_url
+        )
+        from app.db.session import get_engine
+
+        configure_sqlite(get_engine())
+        accounts = seed_database(
+            chain, args.users, args.transactions_per_user, args.seed
+        )
+        app = build_app(args.real_encryption)
+
+        with ServerThread(app, args.with_lifespan) as api_server:
+            generator = LoadGenerator(api_server.url, accounts, args.routes, args.seed)
+            elapsed = asyncio.run(
+                generator.run(
+                    args.concurrency,
+                    args.duration,
+                    args.max_requests,
+                    after_warmup=chain.reset_counters,
+                )
+            )
+        result = summarize(generator, elapsed, chain)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
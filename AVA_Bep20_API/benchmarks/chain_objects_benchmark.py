@@ -0,0 +1,126 @@
+"""
+每筆轉帳的鏈上物件開銷 benchmark（不連線節點，只量測本機 CPU 時間）
+
+    decode  : 監聽時解析一筆 transfer input（字串比對 method ID -> bytes 比對 selector）
+    encode  : transfer_token 組 calldata（每次建 ABI 與合約物件 -> 預先計算的 selector）
+    contract: 查詢餘額時取得代幣合約物件（每次 web3.eth.contract -> chain_objects 快取）
+    checksum: 地址 checksum 轉換（每次計算 keccak -> LRU 快取）
+
+    cd AVA_Bep20_API
+    python -m benchmarks.chain_objects_benchmark --transfers 20000
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.fake_chain import encode_transfer_input
+from benchmarks.offline import configure_offline_environment, percentile
+
+USDT_CONTRACT_ADDRESS = "0x" + "55" * 20
+
+
+def time_per_call(func, items: list, repeat: int) -> list[float]:
+    """
+    :return: 每輪平均每次呼叫的耗時（秒）
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        samples.append((time.perf_counter() - start) / len(items))
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--transfers", type=int, default=20_000)
+    parser.add_argument("--addresses", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    configure_offline_environment("http://127.0.0.1:9", USDT_CONTRACT_ADDRESS)
+
+    from hexbytes import HexBytes
+    from web3 import Web3
+    from app.utils.contracts import (
+        ERC20_ABI,
+        TRANSFER_SELECTOR,
+        chain_objects,
+        encode_transfer,
+        to_checksum_address,
+    )
+
+    web3 = Web3()
+    rng = random.Random(1)
+    # 監聽地址數量有限，同一地址會重複出現
+    addresses = [
+        "0x" + rng.getrandbits(160).to_bytes(20, "big").hex()
+        for _ in range(args.addresses)
+    ]
+    transfers = [
+        (rng.choice(addresses), rng.randrange(1, 10**24)) for _ in range(args.transfers)
+    ]
+    inputs = [HexBytes(encode_transfer_input(to, amount)) for to, amount in transfers]
+    method_id = "0x" + TRANSFER_SELECTOR.hex()
+
+    def decode_before(data):
+        if f"0x{data[:4].hex()}" != method_id:
+            return None
+        return f"0x{data[4:36].hex()[-40:]}".lower(), int(data[36:68].hex(), 16)
+
+    def decode_after(data):
+        if data[:4] != TRANSFER_SELECTOR:
+            return None
+        return f"0x{data[16:36].hex()}", int.from_bytes(data[36:68], "big")
+
+    def encode_before(transfer):
+        contract = web3.eth.contract(
+            address=Web3.to_checksum_address(USDT_CONTRACT_ADDRESS), abi=ERC20_ABI
+        )
+        return contract.encode_abi(
+            "transfer", args=[Web3.to_checksum_address(transfer[0]), transfer[1]]
+        )
+
+    def encode_after(transfer):
+        to_checksum_address(USDT_CONTRACT_ADDRESS)
+        return encode_transfer(to_checksum_address(transfer[0]), transfer[1])
+
+    def contract_before(_):
+        return web3.eth.contract(
+            address=Web3.to_checksum_address(USDT_CONTRACT_ADDRESS), abi=ERC20_ABI
+        )
+
+    def contract_after(_):
+        return chain_objects.erc20(web3, USDT_CONTRACT_ADDRESS)
+
+    # 確認兩種做法的結果一致
+    for data, transfer in zip(inputs[:100], transfers[:100]):
+        assert decode_before(data) == decode_after(data)
+        assert HexBytes(encode_before(transfer)) == HexBytes(encode_after(transfer))
+
+    print(
+        f"transfers: {args.transfers}, addresses: {args.addresses}, "
+        f"repeat: {args.repeat}"
+    )
+    for name, before, after, items in (
+        ("decode", decode_before, decode_after, inputs),
+        ("encode", encode_before, encode_after, transfers),
+        ("contract", contract_before, contract_after, transfers),
+        ("checksum", Web3.to_checksum_address, to_checksum_address, addresses * 10),
+    ):
+        # 編碼與建立合約物件較慢，抽樣量測即可
+        if name in ("encode", "contract"):
+            items = items[:2000]
+        before_p50 = percentile(time_per_call(before, items, args.repeat), 50)
+        after_p50 = percentile(time_per_call(after, items, args.repeat), 50)
+        print(
+            f"{name:<9}: before {before_p50 * 1e6:8.2f} us  "
+            f"after {after_p50 * 1e6:8.2f} us  "
+            f"speedup x{before_p50 / after_p50:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
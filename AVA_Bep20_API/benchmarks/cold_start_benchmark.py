@@ -0,0 +1,258 @@
+"""
+冷啟動時間量測
+
+每輪以全新的 Python process 執行（不共用已匯入的模組），量測：
+
+    import  : 匯入 app.main 的時間
+    healthz : 從啟動 uvicorn process 到 /healthz 第一次回應 200（第一個服務的請求）
+    readyz  : 從啟動到 /readyz?monitor=1 回應 200（背景服務建立完成、節點與資料庫可連線）
+    shutdown: 送出 SIGINT 到 process 結束（取消背景任務、釋放租約、寫出日誌）
+
+    cd AVA_Bep20_API
+    python -m benchmarks.cold_start_benchmark --runs 5
+    python -m benchmarks.cold_start_benchmark --node-down   # 節點無法連線時仍應開始服務
+    python -m benchmarks.cold_start_benchmark --import-profile 15
+
+節點為 JSON-RPC 替身（--node-down 時指向未開放的埠），資料庫為暫存目錄中的 SQLite。
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from typing import Optional
+
+from benchmarks.fake_chain import FakeChain, FakeRPCServer
+from benchmarks.offline import (
+    configure_offline_environment,
+    create_offline_tables,
+    percentile,
+)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_SCRIPT = (
+    "import time; start = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - start)"
+)
+# 沒有服務監聽的埠，模擬節點無法連線
+UNREACHABLE_NODE_URL = "http://127.0.0.1:9"
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(env: dict) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        env=env,
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def request(url: str) -> Optional[tuple[int, bytes]]:
+    """
+    :return: (狀態碼, body)，尚無法連線時回傳 None
+    """
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+    except OSError:
+        return None
+
+
+def wait_for_status(
+    url: str, process: subprocess.Popen, deadline: float, interval: float
+) -> tuple[bool, Optional[bytes]]:
+    """
+    輪詢直到回應 200 或超過 deadline
+
+    :return: (是否回應 200, 最後一次的 body)
+    """
+    body = None
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode}")
+        response = request(url)
+        if response is not None:
+            status, body = response
+            if status == 200:
+                return True, body
+        time.sleep(interval)
+    return False, body
+
+
+def measure_server(env: dict, ready_timeout: float, log_file) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+        cwd=APP_DIR,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    try:
+        healthy, _ = wait_for_status(
+            f"{base_url}/healthz", process, start + ready_timeout, 0.005
+        )
+        healthz_s = time.perf_counter() - start if healthy else None
+        ready, body = wait_for_status(
+            f"{base_url}/readyz?monitor=1", process, start + ready_timeout, 0.02
+        )
+        readyz_s = time.perf_counter() - start if ready else None
+    finally:
+        stop_start = time.perf_counter()
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return {
+        "healthz_s": healthz_s,
+        "readyz_s": readyz_s,
+        "shutdown_s": time.perf_counter() - stop_start,
+        "not_ready_reasons": [] if ready or body is None else not_ready_reasons(body),
+    }
+
+
+def not_ready_reasons(body: bytes) -> list[str]:
+    status = json.loads(body)
+    return status.get("reasons", []) + status.get("monitor_reasons", [])
+
+
+def import_profile(env: dict, top: int) -> list[tuple[str, float]]:
+    """
+    以 -X importtime 統計各頂層套件的匯入時間（self 時間加總，秒）
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env,
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    totals = defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        totals[name.strip().split(".")[0]] += int(self_us) / 1e6
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def summarize(values: list[Optional[float]]) -> dict:
+    measured = [value for value in values if value is not None]
+    if not measured:
+        return {"runs": 0}
+    return {
+        "runs": len(measured),
+        "p50_ms": percentile(measured, 50) * 1000,
+        "min_ms": min(measured) * 1000,
+        "max_ms": max(measured) * 1000,
+    }
+
+
+def print_report(result: dict):
+    print(
+        f"runs: {result['runs']}, node: {'down' if result['node_down'] else 'up'}, "
+        f"python: {result['python']}"
+    )
+    print(f"{'phase':<9} {'runs':>5} {'p50 ms':>9} {'min ms':>9} {'max ms':>9}")
+    for phase, stats in result["phases"].items():
+        if not stats["runs"]:
+            print(f"{phase:<9} {0:>5} {'-':>9} {'-':>9} {'-':>9}")
+            continue
+        print(
+            f"{phase:<9} {stats['runs']:>5} {stats['p50_ms']:>9.1f} "
+            f"{stats['min_ms']:>9.1f} {stats['max_ms']:>9.1f}"
+        )
+    if result["not_ready_reasons"]:
+        print(f"not ready: {'; '.join(result['not_ready_reasons'])}")
+    if result["import_profile"]:
+        print("import time by package (self, ms):")
+        for package, seconds in result["import_profile"]:
+            print(f"  {package:<24} {seconds * 1000:>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--ready-timeout", type=float, default=30, help="每輪等待 /readyz 的秒數"
+    )
+    parser.add_argument("--node-down", action="store_true", help="節點指向未開放的埠")
+    parser.add_argument(
+        "--import-profile", type=int, default=0, help="列出匯入最慢的 N 個套件"
+    )
+    parser.add_argument("--log", help="API process 的輸出寫入此檔案（預設捨棄）")
+    parser.add_argument("--json", action="store_true", help="輸出 JSON 供 CI 比較")
+    args = parser.parse_args(argv)
+
+    chain = FakeChain.synthetic(block_count=1, txs_per_block=0, monitored_count=0)
+    with FakeRPCServer(chain) as rpc_server:
+        node_url = UNREACHABLE_NODE_URL if args.node_down else rpc_server.url
+        configure_offline_environment(node_url, chain.token_address)
+        # 監聽與租約需要的資料表先建立好，量測不包含建表
+        create_offline_tables()
+        env = dict(os.environ)
+
+        imports, servers = [], []
+        with open(args.log or os.devnull, "a") as log_file:
+            for _ in range(args.runs):
+                imports.append(measure_import(env))
+                servers.append(measure_server(env, args.ready_timeout, log_file))
+        profile = (
+            import_profile(env, args.import_profile) if args.import_profile else []
+        )
+
+    result = {
+        "runs": args.runs,
+        "node_down": args.node_down,
+        "python": sys.version.split()[0],
+        "phases": {
+            "import": summarize(imports),
+            "healthz": summarize([server["healthz_s"] for server in servers]),
+            "readyz": summarize([server["readyz_s"] for server in servers]),
+            "shutdown": summarize([server["shutdown_s"] for server in servers]),
+        },
+        "not_ready_reasons": servers[-1]["not_ready_reasons"] if servers else [],
+        "import_profile": profile,
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""
+離線 BSC JSON-RPC 替身
+
+在本機啟動一個 HTTP JSON-RPC 伺服器，重播預先錄製或合成的區塊，
+讓 MonitorService 等元件可以在沒有網路的 CI 環境下被量測。
+"""
+
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRANSFER_METHOD_ID = "0xa9059cbb"  # transfer(address,uint256)
+BALANCE_OF_METHOD_ID = "0x70a08231"  # balanceOf(address)
+AGGREGATE3_METHOD_ID = "0x82ad56cb"  # aggregate3((address,bool,bytes)[])
+GET_ETH_BALANCE_METHOD_ID = "0x4d2301cc"  # getEthBalance(address)
+MULTICALL3_ADDRESS = "0xca11bde05977b3631167028862be2a173976ca11"
+CHAIN_ID = 56
+
+
+def _hex(value: int) -> str:
+    return hex(value)
+
+
+def _random_bytes(rng: random.Random, size: int) -> str:
+    return "0x" + rng.getrandbits(size * 8).to_bytes(size, "big").hex()
+
+
+def encode_transfer_input(to_address: str, amount: int) -> str:
+    """
+    編碼 BEP-20 transfer(address,uint256) 的 input
+    """
+    return (
+        TRANSFER_METHOD_ID
+        + to_address[2:].lower().rjust(64, "0")
+        + hex(amount)[2:].rjust(64, "0")
+    )
+
+
+class FakeChain:
+    """
+    記憶體中的區塊鏈狀態，負責回應 JSON-RPC 請求並統計呼叫次數
+    """
+
+    def __init__(
+        self,
+        blocks: list[dict],
+        token_address: str,
+        monitored_addresses: list[str],
+        token_balances: dict[str, int] = None,
+    ):
+        self.blocks = {int(block["number"], 16): block for block in blocks}
+        self.first_block = min(self.blocks)
+        self.last_block = max(self.blocks)
+        self.token_address = token_address.lower()
+        self.monitored_addresses = monitored_addresses
+        self.token_balances = token_balances or {}
+        self.gas_price = 1_000_000_000
+        # 模擬節點往返延遲（秒），用於觀察預抓等重疊 I/O 的效果
+        self.latency = 0.0
+
+        # 交易 hash 對應所在區塊，用於計算偵測延遲
+        self.tx_block = {
+            tx["hash"]: int(block["number"], 16)
+            for block in blocks
+            for tx in block["transactions"]
+            if isinstance(tx, dict)
+        }
+
+        # 鏈頭一開始停在第一個區塊，監聽器記下起點後再一次釋出其餘區塊
+        self.head = self.first_block
+        self._release_head_after_first_poll = True
+
+        self.method_counts = Counter()
+        self.block_requested_at: dict[int, float] = {}
+        self._sent_transactions: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def synthetic(
+        cls,
+        block_count: int = 200,
+        txs_per_block: int = 150,
+        usdt_density: float = 0.2,
+        hit_ratio: float = 0.05,
+        monitored_count: int = 1000,
+        start_block: int = 40_000_000,
+        seed: int = 1,
+    ) -> "FakeChain":
+        """
+        產生合成區塊
+
+        :param usdt_density: 每筆交易為 USDT transfer 的機率
+        :param hit_ratio: USDT transfer 的收款方為監聽地址的機率
+        """
+        rng = random.Random(seed)
+        token_address = _random_bytes(rng, 20)
+        monitored = [_random_bytes(rng, 20) for _ in range(monitored_count)]
+        balances: dict[str, int] = {}
+
+        blocks = []
+        parent_hash = _random_bytes(rng, 32)
+        for offset in range(block_count):
+            number = start_block + offset
+            block_hash = _random_bytes(rng, 32)
+            transactions = []
+            for index in range(txs_per_block):
+                tx = {
+                    "hash": _random_bytes(rng, 32),
+                    "from": _random_bytes(rng, 20),
+                    "nonce": _hex(rng.randrange(1 << 16)),
+                    "gas": _hex(60_000),
+                    "gasPrice": _hex(1_000_000_000),
+                    "blockHash": block_hash,
+                    "blockNumber": _hex(number),
+                    "transactionIndex": _hex(index),
+                    "type": "0x0",
+                    "chainId": _hex(CHAIN_ID),
+                    "v": "0x93",
+                    "r": _random_bytes(rng, 32),
+                    "s": _random_bytes(rng, 32),
+                }
+                if rng.random() < usdt_density:
+                    if monitored and rng.random() < hit_ratio:
+                        recipient = rng.choice(monitored)
+                    else:
+                        recipient = _random_bytes(rng, 20)
+                    amount = rng.randrange(1, 1000) * 10**18
+                    balances[recipient] = balances.get(recipient, 0) + amount
+                    tx.update(
+                        to=token_address,
+                        value="0x0",
+                        input=encode_transfer_input(recipient, amount),
+                    )
+                else:
+                    tx.update(
+                        to=_random_bytes(rng, 20),
+                        value=_hex(rng.randrange(1, 10**18)),
+                        input="0x",
+                    )
+                transactions.append(tx)
+
+            blocks.append(_block_header(number, block_hash, parent_hash, transactions))
+            parent_hash = block_hash
+
+        return cls(blocks, token_address, monitored, balances)
+
+    @classmethod
+    def from_file(
+        cls,
+        path: str,
+        token_address: str,
+        monitored_addresses: list[str] = None,
+        hit_ratio: float = 0.05,
+        seed: int = 1,
+    ) -> "FakeChain":
+        """
+        從 JSON Lines 檔案載入錄製的區塊（每行一個 eth_getBlockByNumber 的 full result）
+
+        若未指定監聽地址，則依 hit_ratio 從 USDT 收款方中抽樣。
+        """
+        rng = random.Random(seed)
+        token_address = token_address.lower()
+        with open(path, "r", encoding="utf-8") as f:
+            blocks = [json.loads(line) for line in f if line.strip()]
+
+        recipients: dict[str, int] = {}
+        for block in blocks:
+            for tx in block["transactions"]:
+                data = tx.get("input", "0x")
+                if (tx.get("to") or "").lower() == token_address and data.startswith(
+                    TRANSFER_METHOD_ID
+                ):
+                    recipient = "0x" + data[34:74].lower()
+                    recipients[recipient] = recipients.get(recipient, 0) + int(
+                        data[74:138] or "0", 16
+                    )
+
+        if monitored_addresses is None:
+            monitored_addresses = [
+                address for address in recipients if rng.random() < hit_ratio
+            ]
+        return cls(blocks, token_address, monitored_addresses, recipients)
+
+    # ----------------------------------------------------------------- RPC
+    def handle(self, request: dict) -> dict:
+        method = request.get("method")
+        params = request.get("params") or []
+        with self._lock:
+            self.method_counts[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        handler = getattr(self, f"rpc_{method}", None)
+        if handler is None:
+            return {
+                "jsonrpc": "2.0",
+                "id": request.get("id"),
+                "error": {"code": -32601, "message": f"Method {method} not found"},
+            }
+        try:
+            result = handler(*params)
+        except Exception as e:
+            return {
+                "jsonrpc": "2.0",
+                "id": request.get("id"),
+                "error": {"code": -32000, "message": str(e)},
+            }
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    def reset_counters(self):
+        with self._lock:
+            self.method_counts.clear()
+            self.block_requested_at.clear()
+
+    def rpc_web3_clientVersion(self):
+        return "FakeChain/1.0"
+
+    def rpc_net_version(self):
+        return str(CHAIN_ID)
+
+    def rpc_eth_chainId(self):
+        return _hex(CHAIN_ID)
+
+    def rpc_eth_blockNumber(self):
+        head = self.head
+        if self._release_head_after_first_poll:
+            self._release_head_after_first_poll = False
+            self.head = self.last_block
+        return _hex(head)
+
+    def rpc_eth_getBlockByNumber(self, block_id, full_transactions=False):
+        if block_id == "latest":
+            number = self.head
+        elif block_id in ("earliest", "pending", "safe", "finalized"):
+            number = self.first_block if block_id == "earliest" else self.head
+        else:
+            number = int(block_id, 16)
+        if number > self.head or number not in self.blocks:
+            return None
+
+        with self._lock:
+            self.block_requested_at.setdefault(number, time.perf_counter())
+        block = self.blocks[number]
+        if full_transactions:
+            return block
+        return dict(block, transactions=[tx["hash"] for tx in block["transactions"]])
+
+    def rpc_eth_gasPrice(self):
+        return _hex(self.gas_price)
+
+    def rpc_eth_getBalance(self, address, block_id="latest"):
+        return _hex(10**16)
+
+    def rpc_eth_getTransactionCount(self, address, block_id="latest"):
+        return _hex(0)
+
+    def rpc_eth_estimateGas(self, transaction, block_id=None):
+        return _hex(52_000)
+
+    def rpc_eth_call(self, transaction, block_id="latest"):
+        to = (transaction.get("to") or "").lower()
+        data = transaction.get("data") or transaction.get("input") or "0x"
+        if to == MULTICALL3_ADDRESS:
+            return self._multicall(data)
+        if to == self.token_address and data.startswith(BALANCE_OF_METHOD_ID):
+            owner = "0x" + data[34:74].lower()
+            return "0x" + hex(self.token_balances.get(owner, 0))[2:].rjust(64, "0")
+        if data.startswith("0x313ce567"):  # decimals()
+            return "0x" + hex(18)[2:].rjust(64, "0")
+        raise ValueError(f"Unsupported eth_call to {to}")
+
+    def _multicall(self, data: str) -> str:
+        """
+        模擬 Multicall3：aggregate3 逐一執行子呼叫，getEthBalance 回傳 BNB 餘額
+        """
+        from eth_abi import decode, encode
+
+        if data.startswith(GET_ETH_BALANCE_METHOD_ID):
+            balance = int(self.rpc_eth_getBalance("0x" + data[34:74]), 16)
+            return "0x" + hex(balance)[2:].rjust(64, "0")
+        if not data.startswith(AGGREGATE3_METHOD_ID):
+            raise ValueError("Unsupported multicall method")
+
+        (calls,) = decode(["(address,bool,bytes)[]"], bytes.fromhex(data[10:]))
+        results = []
+        for target, allow_failure, call_data in calls:
+            try:
+                result = self.rpc_eth_call(
+                    {"to": target, "data": "0x" + call_data.hex()}
+                )
+                results.append((True, bytes.fromhex(result[2:])))
+            except Exception:
+                if not allow_failure:
+                    raise
+                results.append((False, b""))
+        return "0x" + encode(["(bool,bytes)[]"], [results]).hex()
+
+    def rpc_eth_sendRawTransaction(self, raw_transaction):
+        from eth_utils import keccak
+
+        tx_hash = "0x" + keccak(hexstr=raw_transaction).hex()
+        with self._lock:
+            self._sent_transactions[tx_hash] = {"raw": raw_transaction}
+        return tx_hash
+
+    def rpc_eth_getTransactionReceipt(self, tx_hash):
+        if tx_hash not in self._sent_transactions:
+            return None
+        return {
+            "transactionHash": tx_hash,
+            "transactionIndex": "0x0",
+            "blockHash": "0x" + "00" * 32,
+            "blockNumber": _hex(self.head),
+            "from": "0x" + "00" * 20,
+            "to": "0x" + "00" * 20,
+            "cumulativeGasUsed": _hex(52_000),
+            "gasUsed": _hex(52_000),
+            "effectiveGasPrice": _hex(self.gas_price),
+            "contractAddress": None,
+            "logs": [],
+            "logsBloom": "0x" + "00" * 256,
+            "status": "0x1",
+            "type": "0x0",
+        }
+
+
+def _block_header(
+    number: int, block_hash: str, parent_hash: str, transactions: list
+) -> dict:
+    return {
+        "number": _hex(number),
+        "hash": block_hash,
+        "parentHash": parent_hash,
+        "nonce": "0x0000000000000000",
+        "sha3Uncles": "0x" + "00" * 32,
+        "logsBloom": "0x" + "00" * 256,
+        "transactionsRoot": "0x" + "00" * 32,
+        "stateRoot": "0x" + "00" * 32,
+        "receiptsRoot": "0x" + "00" * 32,
+        "miner": "0x" + "00" * 20,
+        "difficulty": "0x2",
+        "totalDifficulty": _hex(number * 2),
+        "extraData": "0x",
+        "size": _hex(1000 + 200 * len(transactions)),
+        "gasLimit": _hex(140_000_000),
+        "gasUsed": _hex(60_000 * len(transactions)),
+        "timestamp": _hex(1_700_000_000 + number * 3),
+        "transactions": transactions,
+        "uncles": [],
+    }
+
+
+class FakeRPCServer:
+    """
+    以背景執行緒運行的 JSON-RPC HTTP 伺服器（僅綁定 127.0.0.1）
+    """
+
+    def __init__(self, chain: FakeChain, host: str = "127.0.0.1", port: int = 0):
+        self.chain = chain
+        chain_ref = chain
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+                if isinstance(payload, list):
+                    response = [chain_ref.handle(item) for item in payload]
+                else:
+                    response = chain_ref.handle(payload)
+                body = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                return
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
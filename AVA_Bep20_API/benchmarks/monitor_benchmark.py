@@ -0,0 +1,274 @@
+"""
+MonitorService 吞吐量 benchmark
+
+啟動本機 JSON-RPC 替身重播合成（或錄製）區塊，搭配記憶體 repository 驅動
+MonitorService.monitor_blockchain，回報 blocks/s、每區塊 RPC 次數、
+偵測延遲 p50/p99 與記憶體高峰。不需要網路，可直接在 CI 執行：
+
+    cd AVA_Bep20_API
+    python -m benchmarks.monitor_benchmark --blocks 200 --txs-per-block 150
+    python -m benchmarks.monitor_benchmark --rpc-latency-ms 50 --prefetch 1
+    python -m benchmarks.monitor_benchmark --blocks-file recorded.jsonl \\
+        --token-address 0x55d398326f99059ff775485246999027b3197955 --json
+
+偵測延遲定義為：替身節點第一次收到該區塊的 eth_getBlockByNumber 請求，
+到 MonitorService 寫入對應入金紀錄的時間差。
+歸集（transfer_funds_to_core_wallet）需要解密子錢包私鑰，不在量測範圍內，固定視為成功。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from benchmarks.fake_chain import FakeChain, FakeRPCServer
+from benchmarks.offline import configure_offline_environment, percentile
+
+
+class InMemoryMonitoredRepository:
+    """
+    以記憶體取代 MonitoredRepository，記錄每筆入金寫入的時間
+    """
+
+    def __init__(self, addresses: list[str]):
+        self.addresses = addresses
+        self.deposits: list[tuple[float, dict]] = []
+
+    def get_all_addresses(self):
+        return list(self.addresses)
+
+    def execute_deposit_transaction(self, **kwargs):
+        self.deposits.append((time.perf_counter(), kwargs))
+
+    def get_recorded_tx_hashes(self, sub_wallet_id, currency_id, tx_hashes):
+        return set()
+
+
+class InMemoryLeaseRepository:
+    """
+    以記憶體取代 LeaseRepository（單一實例量測，歸集鎖一律取得成功）
+    """
+
+    def try_acquire(self, lease_name, holder_id, ttl_seconds) -> bool:
+        return True
+
+    def release(self, lease_name, holder_id):
+        return None
+
+
+class InMemoryGasStation:
+    """
+    取代 GasStation（歸集不在量測範圍內，補 gas 一律視為成功）
+    """
+
+    async def ensure_gas(self, address, required_wei) -> bool:
+        return True
+
+    def record_spent(self, address, gas_wei):
+        return None
+
+
+class InMemoryWalletRepository:
+    """
+    以記憶體取代 WalletRepository，僅提供監聽流程需要的查詢
+    """
+
+    def __init__(self, addresses: list[str]):
+        self.wallets = {
+            address.lower(): SimpleNamespace(
+                SubWalletID=index + 1,
+                AccountID=f"bench-{index + 1}",
+                SubWalletAddress=address,
+                EncryptedPrivateKey="",
+                KeyMaterial="",
+                Salt="",
+            )
+            for index, address in enumerate(addresses)
+        }
+
+    def get_wallet_by_address(self, wallet_address: str):
+        return self.wallets.get(wallet_address.lower())
+
+
+def build_chain(args) -> FakeChain:
+    if args.blocks_file:
+        if not args.token_address:
+            raise SystemExit("--token-address is required with --blocks-file")
+        return FakeChain.from_file(
+            args.blocks_file,
+            token_address=args.token_address,
+            hit_ratio=args.hit_ratio,
+            seed=args.seed,
+        )
+    return FakeChain.synthetic(
+        block_count=args.blocks,
+        txs_per_block=args.txs_per_block,
+        usdt_density=args.usdt_density,
+        hit_ratio=args.hit_ratio,
+        monitored_count=args.monitored,
+        seed=args.seed,
+    )
+
+
+def build_monitor_service(chain: FakeChain, done: asyncio.Event):
+    """
+    建立接上記憶體 repository 的 MonitorService（必須在設定環境變數之後呼叫）
+    """
+    from app.services.monitor_service import MonitorService
+    from app.services.transaction_service import TransactionService
+
+    class BenchmarkMonitorService(MonitorService):
+        async def process_block(self, block_number: int, block=None):
+            await super().process_block(block_number, block)
+            if block_number >= chain.last_block:
+                done.set()
+
+        async def transfer_funds_to_core_wallet(
+            self, from_address, amount, token
+        ) -> bool:
+            return True
+
+    monitored_repository = InMemoryMonitoredRepository(chain.monitored_addresses)
+    wallet_repository = InMemoryWalletRepository(chain.monitored_addresses)
+    monitor_service = BenchmarkMonitorService(
+        monitored_repository,
+        wallet_repository,
+        TransactionService(),
+        lease_repository=InMemoryLeaseRepository(),
+    )
+    monitor_service.gas_station = InMemoryGasStation()
+    monitor_service.monitored_addresses = {
+        address.lower() for address in chain.monitored_addresses
+    }
+    return monitor_service, monitored_repository
+
+
+async def run_benchmark(chain: FakeChain, args) -> dict:
+    done = asyncio.Event()
+    monitor_service, monitored_repository = build_monitor_service(chain, done)
+    chain.reset_counters()
+
+    if args.trace_memory:
+        tracemalloc.start()
+
+    started = time.perf_counter()
+    monitor_task = asyncio.create_task(monitor_service.monitor_blockchain())
+    try:
+        await asyncio.wait_for(done.wait(), timeout=args.max_seconds)
+        await asyncio.wait_for(
+            monitor_service.sweep_scheduler.join(), timeout=args.max_seconds
+        )
+    finally:
+        elapsed = time.perf_counter() - started
+        monitor_task.cancel()
+        await asyncio.gather(monitor_task, return_exceptions=True)
+
+    traced_peak = None
+    if args.trace_memory:
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    latencies = [
+        recorded_at - chain.block_requested_at[chain.tx_block[deposit["tx_hash"]]]
+        for recorded_at, deposit in monitored_repository.deposits
+        if chain.tx_block.get(deposit["tx_hash"]) in chain.block_requested_at
+    ]
+    blocks = chain.last_block - chain.first_block + 1
+    rpc_calls = sum(chain.method_counts.values())
+
+    return {
+        "blocks": blocks,
+        "transactions": sum(len(b["transactions"]) for b in chain.blocks.values()),
+        "deposits": len(monitored_repository.deposits),
+        "elapsed_s": elapsed,
+        "blocks_per_s": blocks / elapsed if elapsed else 0.0,
+        "rpc_calls_per_block": rpc_calls / blocks,
+        "rpc_calls_by_method": dict(chain.method_counts.most_common()),
+        "detection_latency_p50_ms": percentile(latencies, 50) * 1000,
+        "detection_latency_p99_ms": percentile(latencies, 99) * 1000,
+        # Linux 回傳 KB，macOS 回傳 bytes
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        / (1024 * 1024 if sys.platform == "darwin" else 1024),
+        "traced_peak_mb": traced_peak / (1024 * 1024) if traced_peak else None,
+    }
+
+
+def print_report(result: dict):
+    print(f"blocks               : {result['blocks']}")
+    print(f"transactions         : {result['transactions']}")
+    print(f"deposits recorded    : {result['deposits']}")
+    print(f"elapsed              : {result['elapsed_s']:.3f} s")
+    print(f"throughput           : {result['blocks_per_s']:.1f} blocks/s")
+    print(f"rpc calls / block    : {result['rpc_calls_per_block']:.2f}")
+    for method, count in result["rpc_calls_by_method"].items():
+        print(f"  {method:<28}: {count}")
+    print(f"detection latency p50: {result['detection_latency_p50_ms']:.2f} ms")
+    print(f"detection latency p99: {result['detection_latency_p99_ms']:.2f} ms")
+    print(f"peak RSS             : {result['peak_rss_mb']:.1f} MB")
+    if result["traced_peak_mb"] is not None:
+        print(f"peak traced memory   : {result['traced_peak_mb']:.1f} MB")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--blocks", type=int, default=200)
+    parser.add_argument("--txs-per-block", type=int, default=150)
+    parser.add_argument(
+        "--usdt-density", type=float, default=0.2, help="USDT transfer 佔交易比例"
+    )
+    parser.add_argument(
+        "--hit-ratio", type=float, default=0.05, help="USDT transfer 命中監聽地址比例"
+    )
+    parser.add_argument("--monitored", type=int, default=1000, help="監聽地址數量")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--blocks-file", help="錄製區塊的 JSON Lines 檔案")
+    parser.add_argument("--token-address", help="錄製區塊中的 USDT 合約地址")
+    parser.add_argument(
+        "--confirmations",
+        type=int,
+        default=0,
+        help="DEPOSIT_CONFIRMATIONS，大於 0 時最後幾個區塊的入金不會入帳",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=4,
+        help="MONITOR_PREFETCH_WINDOW，1 表示逐一抓取與處理",
+    )
+    parser.add_argument(
+        "--rpc-latency-ms", type=float, default=0.0, help="模擬節點往返延遲"
+    )
+    parser.add_argument("--max-seconds", type=float, default=300)
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="以 tracemalloc 量測（會降低吞吐量）",
+    )
+    parser.add_argument("--json", action="store_true", help="輸出 JSON 供 CI 比較")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    chain = build_chain(args)
+    chain.latency = args.rpc_latency_ms / 1000
+
+    with FakeRPCServer(chain) as server:
+        configure_offline_environment(server.url, chain.token_address)
+        os.environ["DEPOSIT_CONFIRMATIONS"] = str(args.confirmations)
+        os.environ["MONITOR_PREFETCH_WINDOW"] = str(args.prefetch)
+        result = asyncio.run(run_benchmark(chain, args))
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
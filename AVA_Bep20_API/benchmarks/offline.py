@@ -0,0 +1,91 @@
+"""
+離線執行 benchmark 時使用的環境設定
+
+Settings 於匯入 app 模組時即讀取環境變數，因此必須在匯入任何 app 模組之前呼叫。
+"""
+
+import os
+import tempfile
+
+# 僅供離線量測使用的測試私鑰與地址，切勿用於真實資金
+OFFLINE_CORE_WALLET_PRIVATE_KEY = "0x" + "11" * 32
+OFFLINE_CORE_WALLET_ADDRESS = "0x" + "c0" * 20
+
+
+def configure_offline_environment(
+    node_url: str, usdt_contract_address: str, database_url: str = None
+):
+    """
+    將所有必要設定指向本機替身，確保不會連到真實節點或資料庫
+    """
+    if database_url is None:
+        database_url = "sqlite:///" + os.path.join(
+            tempfile.mkdtemp(prefix="bep20-bench-"), "bench.db"
+        )
+
+    os.environ.update(
+        {
+            "DATABASE_URL": database_url,
+            "JWT_SECRET_KEY": "offline-benchmark",
+            "BSC_MAINNET_NODE_URL": node_url,
+            "BSC_TESTNET_NODE_URL": node_url,
+            "WALLET_ENCRYPTION_KEY": "offline-benchmark",
+            "USDT_CONTRACT_ADDRESS": usdt_contract_address,
+            "TRANSFER_METHOD_ID": "0xa9059cbb",
+            "CORE_WALLET_ADDRESS": OFFLINE_CORE_WALLET_ADDRESS,
+            "CORE_WALLET_PRIVATE_KEY": OFFLINE_CORE_WALLET_PRIVATE_KEY,
+        }
+    )
+    return database_url
+
+
+def create_offline_tables():
+    """
+    建立所有資料表，回傳 account 資料表供寫入用戶
+
+    Account.AccountID 為字串主鍵卻標記 autoincrement，SQLAlchemy 無法以該模型建表或 INSERT
+    （既有資料庫的 account 已存在，init_db 會略過），改以相同欄位的本地資料表建立與寫入。
+    """
+    from sqlalchemy import Boolean, Column, DateTime, MetaData, String, Table
+    from app.db.session import get_engine
+    from app.models.base import Base
+    import app.models.account  # noqa: F401
+    import app.models.core_wallet_balance  # noqa: F401
+    import app.models.core_wallet_currency  # noqa: F401
+    import app.models.core_wallet_deposit_source  # noqa: F401
+    import app.models.core_wallet_monitor_lease  # noqa: F401
+    import app.models.core_wallet_pending_deposit  # noqa: F401
+    import app.models.core_wallet_sub_wallet  # noqa: F401
+    import app.models.core_wallet_transaction  # noqa: F401
+
+    accounts = Table(
+        "account",
+        MetaData(),
+        Column("AccountID", String, primary_key=True, autoincrement=False),
+        Column("Password", String, nullable=False),
+        Column("Name", String, nullable=False),
+        Column("Phone", String, nullable=True),
+        Column("CreateTime", DateTime, nullable=False),
+        Column("IsEmailVerify", Boolean, default=False),
+    )
+    Base.metadata.create_all(
+        bind=get_engine(),
+        tables=[
+            table
+            for table in Base.metadata.sorted_tables
+            if table.name != accounts.name
+        ],
+    )
+    accounts.create(bind=get_engine(), checkfirst=True)
+    return accounts
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """
+    以 nearest-rank 方式計算百分位數
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
@@ -0,0 +1,109 @@
+"""
+交易記錄序列化 benchmark
+
+比較 /get-deposit-transactions 改版前後，將 N 筆交易記錄轉成 HTTP body 的耗時：
+
+    before  : ORM 物件 -> jsonable_encoder -> JSONResponse（改版前的預設路徑）
+    pydantic: tuple -> response_model 驗證 -> JSONResponse（僅宣告 response_model 的做法）
+    after   : tuple -> dict -> ORJSONDecimalResponse（目前端點的做法）
+
+    cd AVA_Bep20_API
+    python -m benchmarks.serialization_benchmark --rows 10000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from benchmarks.offline import configure_offline_environment, percentile
+
+
+def build_rows(count: int, seed: int = 1) -> list[tuple]:
+    from app.models.core_wallet_transaction import TransactionTypeEnum
+
+    rng = random.Random(seed)
+    created = datetime(2024, 1, 1)
+    return [
+        (
+            index + 1,
+            1,
+            2,
+            "0x" + rng.getrandbits(160).to_bytes(20, "big").hex(),
+            Decimal(rng.randrange(10, 100000)) / Decimal(100),
+            Decimal(rng.randrange(1, 10**6)) / Decimal(10**10),
+            "0x" + rng.getrandbits(256).to_bytes(32, "big").hex(),
+            TransactionTypeEnum.deposit,
+            True,
+            created + timedelta(seconds=index),
+        )
+        for index in range(count)
+    ]
+
+
+def time_it(func, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    configure_offline_environment("http://127.0.0.1:9", "0x" + "00" * 20)
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+    from app.api.v1.transaction_controller import render_transaction_rows
+    from app.models.core_wallet_transaction import CoreWalletTransaction
+    from app.repositories.transaction_repository import TRANSACTION_HISTORY_FIELDS
+    from app.schemas.transaction import TransactionRecord
+
+    rows = build_rows(args.rows)
+    orm_objects = [
+        CoreWalletTransaction(**dict(zip(TRANSACTION_HISTORY_FIELDS, row)))
+        for row in rows
+    ]
+    adapter = TypeAdapter(list[TransactionRecord])
+
+    def before():
+        return JSONResponse(jsonable_encoder(orm_objects)).body
+
+    def with_response_model():
+        records = adapter.validate_python(
+            [dict(zip(TRANSACTION_HISTORY_FIELDS, row)) for row in rows]
+        )
+        return JSONResponse(adapter.dump_python(records, mode="json")).body
+
+    def after():
+        return render_transaction_rows(rows).body
+
+    print(f"rows: {args.rows}, repeat: {args.repeat}")
+    baseline = None
+    for name, func in (
+        ("before", before),
+        ("pydantic", with_response_model),
+        ("after", after),
+    ):
+        body_size = len(func())
+        samples = time_it(func, args.repeat)
+        p50 = percentile(samples, 50)
+        baseline = baseline or p50
+        print(
+            f"{name:<9}: p50 {p50 * 1000:8.2f} ms  "
+            f"min {min(samples) * 1000:8.2f} ms  "
+            f"body {body_size / 1024:7.1f} KB  "
+            f"speedup x{baseline / p50:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()